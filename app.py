@@ -1,11 +1,51 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
-from fonctions import segmentation, extraction, lancer_aleatoire, decode_ean13_signature  # Import des fonctions
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fonctions import decode_ean13_signature  # Import des fonctions
+from session import ScanSession
+from base_produits import charger_base
+from instrumentation import ajouter_crochet, retirer_crochet
+
+# Taches de calcul en parallele (les convolutions liberent le GIL)
+TRAVAILLEURS = 2
+
+# Periode (ms) de scrutation des taches terminees par la boucle Tk
+PERIODE_SCRUTATION = 50
+
+
+class Annulation(Exception):
+    """Levee dans un travailleur quand sa tache a ete annulee."""
+
+
+class Tache:
+    """
+    Travail execute hors du thread Tk.
+
+    Remarque:
+        - fonction() tourne dans un travailleur et ne touche pas a l'interface ;
+          succes(resultat), echec(erreur) et annulation() sont appeles ensuite
+          dans la boucle Tk.
+        - L'annulation est cooperative : elle prend effet a la fin de l'etape
+          de calcul en cours (voir BarcodeApp._crochet).
+    """
+
+    def __init__(self, libelle, fonction, succes, echec, annulation=None, entree=None):
+        self.libelle = libelle
+        self.fonction = fonction
+        self.succes = succes
+        self.echec = echec
+        self.annulation = annulation
+        self.entree = entree
+        self.annulee = threading.Event()
+        self.future = None
+        self.etape = None  # Derniere etape de calcul terminee
 
 
 class BarcodeApp(tk.Tk):
@@ -25,11 +65,24 @@ class BarcodeApp(tk.Tk):
         # Variables
         self.image = None
         self.image_path = ""
+        self.session = None
+        self.detected_region = None
         self.binary_signature = None
         self.decoded_barcode = None
+        self.database_path = None  # Base choisie une fois, conservee entre les verifications
+
+        # File d'images et taches en cours
+        self.file_images = []   # Entrees {chemin, session, apercu, code, statut}
+        self.current = None     # Indice de l'image affichee
+        self.taches = []
+        self.pool = ThreadPoolExecutor(max_workers=TRAVAILLEURS)
+        self._locale = threading.local()
+        self._evenements = queue.Queue()
+        ajouter_crochet(self._crochet)
 
         # Creer l'interface
         self.setup_ui()
+        self._scrutation = self.after(PERIODE_SCRUTATION, self._scruter)
 
     
     def create_gradient(self):
@@ -70,6 +123,26 @@ class BarcodeApp(tk.Tk):
         self.reset_button = tk.Button(self.frame, text="Reinitialiser", command=self.reset_app,  fg="black", font=("Arial", 12))
         self.reset_button.grid(row=0, column=7, padx=10, pady=5)
 
+        # Bouton d'annulation des traitements en cours
+        self.cancel_button = tk.Button(self.frame, text="Annuler", command=self.cancel_tasks, state="disabled", fg="black", font=("Arial", 12))
+        self.cancel_button.grid(row=0, column=8, padx=10, pady=5)
+
+        # Decodage automatique des images chargees (en arriere-plan)
+        self.decodage_auto = tk.BooleanVar(value=True)
+        tk.Checkbutton(self.frame, text="Decodage automatique", variable=self.decodage_auto,
+                       font=("Arial", 12)).grid(row=1, column=0, columnspan=2, padx=10)
+
+        # Progression des traitements
+        self.progress = ttk.Progressbar(self.canvas, mode="indeterminate", length=400)
+        self.progress.place(relx=0.5, rely=0.13, anchor="n")
+        self.progress_label = tk.Label(self.canvas, text="", font=("Arial", 10))
+        self.progress_label.place(relx=0.5, rely=0.17, anchor="n")
+
+        # File des images chargees (selection de l'image affichee)
+        self.queue_list = tk.Listbox(self.canvas, font=("Arial", 10), exportselection=False)
+        self.queue_list.place(x=10, rely=0.6, anchor="w", width=180, height=500)
+        self.queue_list.bind("<<ListboxSelect>>", self.on_select_image)
+
         # Zone d'affichage d'image
         self.image_label = tk.Label(self.canvas, bg="#ffffff", bd=2, relief="sunken")
         self.image_label.place(relx=0.5, rely=0.6, anchor="center", width=800, height=500)
@@ -103,24 +176,209 @@ class BarcodeApp(tk.Tk):
         self.quit_button.place(relx=0.5, rely=0.975, anchor="center")  # Centrage en bas
 
     def load_image(self):
-        """Charger une image depuis le fichier."""
+        """Ajouter une ou plusieurs images a la file de traitement."""
         try:
-            file_path = filedialog.askopenfilename(
-                title="Selectionner une image",
+            file_paths = filedialog.askopenfilenames(
+                title="Selectionner une ou plusieurs images",
                 filetypes=[("Images", "*.png;*.jpg;*.jpeg")]
             )
-            if not file_path:
+            if not file_paths:
                 self.feedback.config(text="Aucune image selectionnee.")
                 return
 
-            self.image_path = file_path
-            self.image = Image.open(file_path)
-            self.display_image(self.image)
-            self.feedback.config(text="Image chargee avec succes.")
+            premiere = len(self.file_images)
+            for file_path in file_paths:
+                entree = {'chemin': file_path, 'session': None, 'apercu': None,
+                          'code': None, 'statut': "en attente"}
+                self.file_images.append(entree)
+                self.queue_list.insert(tk.END, self._texte_entree(entree))
+                self._soumettre(Tache(
+                    os.path.basename(file_path),
+                    lambda chemin=file_path: self._preparer_image(chemin),
+                    succes=lambda resultat, entree=entree: self._image_prete(entree, resultat),
+                    echec=lambda e, entree=entree: self._image_en_echec(entree, e),
+                    annulation=lambda entree=entree: self._statut(entree, "annulee"),
+                    entree=entree))
+
+            if self.current is None:
+                self._selectionner(premiere)
+            self.feedback.config(text=f"{len(file_paths)} image(s) ajoutee(s) a la file.")
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible de charger l'image : {str(e)}")
             self.feedback.config(text="Erreur lors du chargement.")
 
+    @staticmethod
+    def _preparer_image(chemin):
+        """Chargement d'une image et de son apercu (dans un travailleur)."""
+        apercu = Image.open(chemin).resize((800, 500))
+        # Image decodee une seule fois pour la segmentation et l'extraction ;
+        # les convolutions utilisent tous les coeurs (latence interactive)
+        session = ScanSession(chemin, workers=os.cpu_count() or 1)
+        return session, apercu
+
+    @staticmethod
+    def _decoder_session(session):
+        """Segmentation et decodage automatiques d'une image chargee (dans un travailleur)."""
+        try:
+            session.segmenter()
+            code, _ = session.decoder()
+        except ValueError:
+            code = None
+        return code
+
+    def _image_prete(self, entree, resultat):
+        # La session est disponible des le chargement : segmentation et
+        # extraction manuelles n'attendent pas le decodage automatique
+        entree['session'], entree['apercu'] = resultat
+        self._statut(entree, "chargee")
+        if self.current is not None and self.file_images[self.current] is entree:
+            self._selectionner(self.current)
+        if self.decodage_auto.get():
+            self._soumettre(Tache(
+                os.path.basename(entree['chemin']),
+                lambda session=entree['session']: self._decoder_session(session),
+                succes=lambda code, entree=entree: self._image_decodee(entree, code),
+                echec=lambda e, entree=entree: self._image_en_echec(entree, e),
+                annulation=lambda entree=entree: self._statut(entree, "annulee"),
+                entree=entree))
+
+    def _image_decodee(self, entree, code):
+        entree['code'] = code
+        self._statut(entree, code or "non decode")
+        if code is not None and self.current is not None and self.file_images[self.current] is entree:
+            self.decoded_barcode = code
+
+    def _image_en_echec(self, entree, e):
+        self._statut(entree, "erreur")
+        self.feedback.config(text=f"Erreur sur {os.path.basename(entree['chemin'])} : {e}")
+
+    def _texte_entree(self, entree):
+        return f"{os.path.basename(entree['chemin'])} - {entree['statut']}"
+
+    def _statut(self, entree, statut):
+        """Mettre a jour le statut d'une image dans la file."""
+        entree['statut'] = statut
+        # Recherche par identite : deux entrees du meme fichier peuvent etre egales
+        i = next((i for i, e in enumerate(self.file_images) if e is entree), None)
+        if i is None:
+            return
+        self.queue_list.delete(i)
+        self.queue_list.insert(i, self._texte_entree(entree))
+        if i == self.current:
+            self.queue_list.selection_set(i)
+
+    def on_select_image(self, event):
+        """Afficher l'image choisie dans la file."""
+        selection = self.queue_list.curselection()
+        if selection and selection[0] != self.current:
+            self._selectionner(selection[0])
+
+    def _selectionner(self, i):
+        """Faire de l'image i l'image courante (resultats deja calcules conserves)."""
+        entree = self.file_images[i]
+        self.current = i
+        self.image_path = entree['chemin']
+        self.session = entree['session']
+        self.image = entree['apercu']
+        self.detected_region = None
+        self.binary_signature = None
+        self.decoded_barcode = entree['code']
+        self.queue_list.selection_clear(0, tk.END)
+        self.queue_list.selection_set(i)
+        if self.image is not None:
+            self.display_image(self.image)
+        else:
+            self.image_label.config(image="")
+
+    # Execution en arriere-plan ------------------------------------------------
+
+    def _soumettre(self, tache):
+        """Confier une tache au pool de travailleurs."""
+        tache.future = self.pool.submit(self._executer, tache)
+        self.taches.append(tache)
+        self.cancel_button.config(state="normal")
+
+    def _executer(self, tache):
+        # Dans le travailleur : la tache courante est visible du crochet
+        self._locale.tache = tache
+        try:
+            if tache.annulee.is_set():
+                raise Annulation()
+            return tache.fonction()
+        finally:
+            self._locale.tache = None
+
+    def _crochet(self, evenement, donnees):
+        """Crochet d'instrumentation : progression et point d'annulation."""
+        tache = getattr(self._locale, 'tache', None)
+        if tache is None:
+            return
+        if evenement == 'etape':
+            self._evenements.put((tache, donnees['etape']))
+        if tache.annulee.is_set():
+            raise Annulation()
+
+    def _scruter(self):
+        """Relever progression et taches terminees (boucle Tk uniquement)."""
+        try:
+            self._relever()
+        finally:
+            self._scrutation = self.after(PERIODE_SCRUTATION, self._scruter)
+
+    def _relever(self):
+        while not self._evenements.empty():
+            tache, tache.etape = self._evenements.get_nowait()
+            if tache.entree is not None and not tache.annulee.is_set():
+                self._statut(tache.entree, tache.etape + "...")
+
+        for tache in [t for t in self.taches if t.future.done()]:
+            self.taches.remove(tache)
+            if tache.future.cancelled() or isinstance(tache.future.exception(), Annulation):
+                if tache.annulation:
+                    tache.annulation()
+            elif tache.future.exception() is not None:
+                tache.echec(tache.future.exception())
+            else:
+                tache.succes(tache.future.result())
+
+        if self.taches:
+            self.progress.start(10)
+            tache = next((t for t in self.taches if t.future.running()), self.taches[0])
+            etape = f" - {tache.etape}" if tache.etape else ""
+            self.progress_label.config(text=f"{len(self.taches)} tache(s) en cours : {tache.libelle}{etape}")
+        else:
+            self.progress.stop()
+            self.progress_label.config(text="")
+            self.cancel_button.config(state="disabled")
+
+    def cancel_tasks(self):
+        """Annuler les taches en attente et en cours."""
+        for tache in self.taches:
+            tache.annulee.set()
+            tache.future.cancel()
+        self.feedback.config(text="Traitement annule.")
+
+    def _erreur(self, action):
+        """Rappel d'echec standard pour une etape ("la segmentation", ...)."""
+        def echec(e):
+            messagebox.showerror("Erreur", f"Erreur lors de {action} : {str(e)}")
+            self.feedback.config(text=f"Erreur lors de {action}.")
+        return echec
+
+    def _annulee(self):
+        self.feedback.config(text="Traitement annule.")
+
+    def _session_prete(self):
+        """Verifier qu'une image est chargee et prete (sinon prevenir l'utilisateur)."""
+        if not self.image_path:
+            messagebox.showerror("Erreur", "Aucune image chargee !")
+            self.feedback.config(text="Erreur : Chargez une image.")
+            return False
+        if self.session is None:
+            messagebox.showinfo("Patience", "Image en cours de traitement, reessayez dans un instant.")
+            return False
+        return True
+
     def display_image(self, img):
         """Afficher une image redimensionnee."""
         img = img.resize((800, 500))
@@ -132,171 +390,176 @@ class BarcodeApp(tk.Tk):
 
     def segment_image(self):
         """Segmentation reelle avec extraction depuis le fichier segmentation."""
-        try:
-            # Mise à jour du feedback pour informer l'utilisateur
-            self.feedback.config(text="Segmentation en cours...")
-            self.update_idletasks()
-    
-            # Verifier si une image est chargee
-            if not self.image_path:
-                messagebox.showerror("Erreur", "Aucune image chargee !")
-                self.feedback.config(text="Erreur : Chargez une image.")
-                return
-    
-            # Appel de la fonction de segmentation
-            mask, region = segmentation(self.image_path)
-    
-            # Affichage du resultat
-            plt.figure(figsize=(8, 4))
-            plt.subplot(1, 2, 1)
-            plt.imshow(region, cmap='gray')
-            plt.title("Region detectee")
-            plt.axis("off")
-    
-            plt.subplot(1, 2, 2)
-            plt.imshow(mask, cmap='gray')
-            plt.title("Masque final")
-            plt.axis("off")
-    
-            plt.tight_layout()
-            plt.show()
-    
-            # Mise à jour du feedback
-            self.feedback.config(text="Segmentation terminee.")
-        except Exception as e:
-            # Gestion des erreurs avec message d'alerte
-            messagebox.showerror("Erreur", f"Erreur lors de la segmentation : {str(e)}")
-            self.feedback.config(text="Erreur lors de la segmentation.")
+        # Verifier si une image est chargee
+        if not self._session_prete():
+            return
+        session = self.session
+
+        def segmenter():
+            min_row, min_col, max_row, max_col = session.segmenter()
+            region = session.image[min_row:max_row, min_col:max_col]
+            return session.coins, region, session.masque
+
+        # Segmentation sur l'image deja chargee, hors du thread Tk
+        self.feedback.config(text="Segmentation en cours...")
+        self._soumettre(Tache("Segmentation", segmenter,
+                              succes=lambda resultat: self._afficher_segmentation(session, resultat),
+                              echec=self._erreur("la segmentation"), annulation=self._annulee))
+
+    def _afficher_segmentation(self, session, resultat):
+        if session is not self.session:
+            return
+        self.detected_region, region, mask = resultat
+
+        # Affichage du resultat
+        plt.figure(figsize=(8, 4))
+        plt.subplot(1, 2, 1)
+        plt.imshow(region, cmap='gray')
+        plt.title("Region detectee")
+        plt.axis("off")
+
+        plt.subplot(1, 2, 2)
+        plt.imshow(mask, cmap='gray')
+        plt.title("Masque final")
+        plt.axis("off")
+
+        plt.tight_layout()
+        plt.show()
+
+        # Mise à jour du feedback
+        self.feedback.config(text="Segmentation terminee.")
 
 
     def extract_signature(self):
         """Extraction des signatures avec un rayon manuel ou aleatoire."""
-        try:
-            # Feedback initial
-            self.feedback.config(text="Extraction en cours...")
-            self.update_idletasks()
-    
-            # Verifier si une image est chargee
-            if not self.image_path:
-                messagebox.showerror("Erreur", "Aucune image chargee !")
-                self.feedback.config(text="Erreur : Chargez une image.")
-                return
-    
-            # Verifier si la segmentation a ete realisee (avec des coins detectes)
-            if not hasattr(self, 'detected_region') or self.detected_region is None:
-                messagebox.showerror("Erreur", "Aucune region detectee. Lancez la segmentation d'abord.")
-                self.feedback.config(text="Erreur : Pas de region detectee.")
-                return
-    
-            # Recuperer les coins detectes pour la zone d'interet
-            C1, C2, C3, C4 = self.detected_region  # Coins detectes apres segmentation
-    
-            # Verifier le mode choisi (manuel ou aleatoire)
-            if self.mode_var.get() == "manuel":
-                messagebox.showinfo("Instruction", "Cliquez sur deux points pour definir un rayon.")
-                self.feedback.config(text="Attente de la selection manuelle...")
-                self.points = []  # Reinitialiser les points pour la selection manuelle
-                self.canvas.bind("<Button-1>", self.on_click_manual)
-                return
-    
-            elif self.mode_var.get() == "aleatoire":
-                # Generer un rayon aleatoire avec la fonction lancer_aleatoire
-                p1, p2 = lancer_aleatoire(C1, C2, C3, C4)
-                points = (p1, p2)
-    
-            # Appeler la fonction d'extraction pour obtenir la signature binaire
-            self.binary_signature = extraction(self.image_path, points[0], points[1])
-    
-            # Verifier si l'extraction a reussi
-            if self.binary_signature is None:
+        # Verifier si une image est chargee
+        if not self._session_prete():
+            return
+
+        # Verifier si la segmentation a ete realisee (avec des coins detectes)
+        if not hasattr(self, 'detected_region') or self.detected_region is None:
+            messagebox.showerror("Erreur", "Aucune region detectee. Lancez la segmentation d'abord.")
+            self.feedback.config(text="Erreur : Pas de region detectee.")
+            return
+
+        # Verifier le mode choisi (manuel ou aleatoire)
+        if self.mode_var.get() == "manuel":
+            messagebox.showinfo("Instruction", "Cliquez sur deux points pour definir un rayon.")
+            self.feedback.config(text="Attente de la selection manuelle...")
+            self.points = []  # Reinitialiser les points pour la selection manuelle
+            self.canvas.bind("<Button-1>", self.on_click_manual)
+            return
+
+        session = self.session
+
+        def extraire():
+            # Generer un rayon aleatoire dans la region detectee
+            p1, p2 = session.lancer_rayon()
+            signature = session.extraire(p1, p2)
+            if signature is None:
                 raise ValueError("Signature non extraite ou invalide.")
-    
-            # Afficher la signature binaire extraite
-            plt.figure()
-            plt.step(range(len(self.binary_signature)), self.binary_signature, where='mid')
-            plt.title("Signature binaire extraite")
-            plt.xlabel("Position")
-            plt.ylabel("Valeur (0 ou 1)")
-            plt.grid(True)
-            plt.show()
-    
-            # Mise à jour du feedback
-            self.feedback.config(text="Extraction terminee avec succes.")
-    
-        except Exception as e:
-            # Gestion des erreurs
-            messagebox.showerror("Erreur", f"Erreur lors de l'extraction : {str(e)}")
-            self.feedback.config(text="Erreur lors de l'extraction.")
-    
-    
+            return signature
+
+        self.feedback.config(text="Extraction en cours...")
+        self._soumettre(Tache("Extraction", extraire,
+                              succes=lambda signature: self._afficher_signature(session, signature),
+                              echec=self._erreur("l'extraction"), annulation=self._annulee))
+
+    def _afficher_signature(self, session, signature):
+        if session is not self.session:
+            return
+        self.binary_signature = signature
+
+        # Afficher la signature binaire extraite
+        plt.figure()
+        plt.step(range(len(self.binary_signature)), self.binary_signature, where='mid')
+        plt.title("Signature binaire extraite")
+        plt.xlabel("Position")
+        plt.ylabel("Valeur (0 ou 1)")
+        plt.grid(True)
+        plt.show()
+
+        # Mise à jour du feedback
+        self.feedback.config(text="Extraction terminee avec succes.")
+
+
     def decode_barcode(self):
         """Decodage en utilisant la fonction du fichier fonctions.py."""
-        try:
-            # Feedback pour l'utilisateur
-            self.feedback.config(text="Decodage en cours...")
-            self.update_idletasks()
-    
-            # Verifier si une signature a ete extraite
-            if self.binary_signature is None:
-                messagebox.showerror("Erreur", "Aucune signature disponible pour le decodage.")
-                self.feedback.config(text="Erreur : Aucune signature detectee.")
-                return
-    
-            # Appeler la fonction de decodage
-            self.decoded_barcode = decode_ean13_signature(self.binary_signature)
-    
-            # Mise à jour du feedback avec le code-barres detecte
-            self.feedback.config(text=f"Code-barres detecte : {self.decoded_barcode}")
-            messagebox.showinfo("Decodage Reussi", f"Code-barres : {self.decoded_barcode}")
-    
-        except Exception as e:
-            # Gestion des erreurs
-            messagebox.showerror("Erreur", f"Erreur lors du decodage : {str(e)}")
-            self.feedback.config(text="Erreur lors du decodage.")
+        # Verifier si une signature a ete extraite
+        if self.binary_signature is None:
+            messagebox.showerror("Erreur", "Aucune signature disponible pour le decodage.")
+            self.feedback.config(text="Erreur : Aucune signature detectee.")
+            return
+
+        # Appeler la fonction de decodage
+        signature = self.binary_signature
+        self.feedback.config(text="Decodage en cours...")
+        self._soumettre(Tache("Decodage", lambda: decode_ean13_signature(signature),
+                              succes=self._afficher_code, echec=self._erreur("le decodage"),
+                              annulation=self._annulee))
+
+    def _afficher_code(self, code):
+        self.decoded_barcode = code
+
+        # Mise à jour du feedback avec le code-barres detecte
+        self.feedback.config(text=f"Code-barres detecte : {self.decoded_barcode}")
+        messagebox.showinfo("Decodage Reussi", f"Code-barres : {self.decoded_barcode}")
 
     def verify_database(self):
         """Verifier dans la base de donnees."""
         try:
-            self.feedback.config(text="Verification dans la base...")
-            self.update_idletasks()
-    
             # Verifier si un code-barres a ete decode
             if not self.decoded_barcode:
                 messagebox.showwarning("Attention", "Aucun code-barres decode. Veuillez lancer le decodage d'abord.")
                 self.feedback.config(text="Erreur : Pas de code-barres decode.")
                 return
     
-            # Charger la base de donnees (fichier texte contenant une liste de codes-barres valides)
-            database_path = filedialog.askopenfilename(
-                title="Charger la base de donnees",
-                filetypes=[("Fichiers texte", "*.txt")]
-            )
+            # Choisir la base de donnees au premier appel seulement
+            # (index .npy, ou fichier texte indexe automatiquement)
+            if not self.database_path:
+                self.database_path = filedialog.askopenfilename(
+                    title="Charger la base de donnees",
+                    filetypes=[("Base de produits", "*.npy *.txt"), ("Index", "*.npy"),
+                               ("Fichiers texte", "*.txt")]
+                )
     
-            if not database_path:
+            if not self.database_path:
                 self.feedback.config(text="Erreur : Aucune base de donnees selectionnee.")
                 return
     
-            # Lire la base de donnees
-            with open(database_path, 'r') as file:
-                database = [line.strip() for line in file.readlines()]
-    
-            # Verifier si le code-barres est dans la base
-            if self.decoded_barcode in database:
-                messagebox.showinfo("Resultat", f"Produit trouve : {self.decoded_barcode}")
-                self.feedback.config(text="Produit trouve dans la base.")
-            else:
-                messagebox.showwarning("Resultat", f"Produit non trouve : {self.decoded_barcode}")
-                self.feedback.config(text="Produit non trouve dans la base.")
-    
+            # Ouvrir l'index (mis en cache, rouvert seulement s'il a change) et
+            # chercher le code hors du thread Tk : la premiere ouverture d'un
+            # fichier texte construit l'index
+            code, database_path = self.decoded_barcode, self.database_path
+            self.feedback.config(text="Verification dans la base...")
+            self._soumettre(Tache("Verification", lambda: charger_base(database_path).contient(code),
+                                  succes=lambda trouve: self._afficher_verification(code, trouve),
+                                  echec=self._erreur("la verification"), annulation=self._annulee))
+
         except Exception as e:
             # Gestion des erreurs
             messagebox.showerror("Erreur", f"Erreur lors de la verification : {str(e)}")
             self.feedback.config(text="Erreur lors de la verification.")
 
+    def _afficher_verification(self, code, trouve):
+        # Verifier si le code-barres est dans la base
+        if trouve:
+            messagebox.showinfo("Resultat", f"Produit trouve : {code}")
+            self.feedback.config(text="Produit trouve dans la base.")
+        else:
+            messagebox.showwarning("Resultat", f"Produit non trouve : {code}")
+            self.feedback.config(text="Produit non trouve dans la base.")
+
     def reset_app(self):
         """Reinitialiser l'application."""
+        self.cancel_tasks()
+        self.file_images = []
+        self.current = None
+        self.queue_list.delete(0, tk.END)
         self.image = None
         self.image_path = ""
+        self.session = None
+        self.detected_region = None
         self.binary_signature = None
         self.decoded_barcode = None
         self.image_label.config(image="")
@@ -306,6 +569,10 @@ class BarcodeApp(tk.Tk):
         """Quitter l'application."""
         self.feedback.config(text="Fermeture de l'application...")
         self.update_idletasks()
+        self.cancel_tasks()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        retirer_crochet(self._crochet)
+        self.after_cancel(self._scrutation)
         self.destroy()  # Ferme la fenetre principale
 
 
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Jan 27 14:03:21 2025
+
+@author: Mehdi
+
+Base de produits indexee pour la verification des codes lus
+
+Le catalogue (fichier texte, un code par ligne) est converti une seule fois
+en un index : tableau trie de codes en uint64 (format .npy), ouvert ensuite
+en memoire projetee (mmap) sans etre relu. Une recherche est une recherche
+dichotomique, en O(log n), et une recherche par lot un seul appel a
+np.searchsorted. Les mises a jour sont ecrites dans deux petits fichiers
+d'ajouts et de retraits, fusionnes dans l'index quand ils grossissent.
+
+Exemples :
+    python base_produits.py construire catalogue.txt
+    python base_produits.py chercher catalogue.npy 4006381333931 5901234123457
+    python base_produits.py ajouter catalogue.npy 4006381333931
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import argparse
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from instrumentation import bilan, compter, journal
+
+###############################################################################
+#                              PARAMETRES                                     #
+###############################################################################
+
+# Lignes lues a la fois lors de la construction de l'index
+LIGNES_PAR_BLOC = 1_000_000
+
+# Taille des ajouts/retraits (relative a l'index) declenchant une fusion
+FUSION_RELATIVE = 0.01
+FUSION_MIN = 100_000
+
+# Longueur maximale d'un code (GTIN-14), gardee dans les bits de poids faible
+LONGUEUR_MAX = 14
+BITS_LONGUEUR = 4
+
+###############################################################################
+#                               CONVERSION                                    #
+###############################################################################
+
+def en_entiers(codes):
+    """
+    Convertit des codes (chaines de chiffres ou entiers) en tableau uint64.
+
+    Retourne:
+        numpy.ndarray: Une valeur par code ; 0 pour un code invalide (vide,
+        non numerique ou de plus de LONGUEUR_MAX chiffres), qui n'est jamais
+        dans la base.
+
+    Remarque:
+        - La longueur du code est gardee dans les BITS_LONGUEUR bits de
+          poids faible : '0123' et '123' restent deux codes distincts, comme
+          dans une comparaison de chaines.
+    """
+    if isinstance(codes, (str, int, np.integer)):
+        codes = [codes]
+    textes = [code if isinstance(code, str) else str(code) for code in codes]
+    return np.array([int(texte) << BITS_LONGUEUR | len(texte)
+                     if texte.isascii() and texte.isdigit() and len(texte) <= LONGUEUR_MAX else 0
+                     for texte in textes], dtype=np.uint64)
+
+
+def _contient(trie, valeurs):
+    """Appartenance de chaque valeur a un tableau trie (recherche dichotomique)."""
+    if len(trie) == 0:
+        return np.zeros(len(valeurs), dtype=bool)
+    positions = np.searchsorted(trie, valeurs)
+    positions[positions == len(trie)] = len(trie) - 1
+    return trie[positions] == valeurs
+
+
+###############################################################################
+#                         CONSTRUCTION DE L'INDEX                             #
+###############################################################################
+
+def chemin_index(catalogue):
+    """Chemin de l'index associe a un catalogue texte (meme nom, extension .npy)."""
+    return os.path.splitext(catalogue)[0] + '.npy'
+
+
+def _ecrire(chemin, codes):
+    """Ecrit un tableau .npy de facon atomique (fichier temporaire puis renommage)."""
+    temporaire = chemin + '.tmp.npy'
+    np.save(temporaire, codes)
+    os.replace(temporaire, chemin)
+
+
+def _charger_delta(index, suffixe):
+    """Ajouts ou retraits d'un index (tableau vide s'il n'y en a pas)."""
+    chemin = index + suffixe
+    if os.path.exists(chemin):
+        return np.load(chemin)
+    return np.zeros(0, dtype=np.uint64)
+
+
+def construire_index(catalogue, index=None):
+    """
+    Construit l'index trie d'un catalogue texte (un code par ligne).
+
+    Parametres:
+        catalogue (str): Fichier texte ; lignes vides et espaces ignores.
+        index (str): Chemin de l'index (par defaut, voir chemin_index).
+
+    Retourne:
+        str: Chemin de l'index ecrit.
+
+    Remarque:
+        - Les lignes qui ne sont pas des codes (en-tetes, libelles) sont
+          ignorees et comptees (compteur 'lignes_ignorees').
+    """
+    index = index or chemin_index(catalogue)
+    blocs = []
+    ignorees = 0
+    with open(catalogue, 'r') as fichier:
+        while True:
+            lignes = [ligne.strip() for _, ligne in zip(range(LIGNES_PAR_BLOC), fichier)]
+            if not lignes:
+                break
+            valeurs = en_entiers([ligne for ligne in lignes if ligne])
+            ignorees += int((valeurs == 0).sum())
+            blocs.append(valeurs[valeurs != 0])
+    if ignorees:
+        compter('lignes_ignorees', ignorees)
+        journal(f"{catalogue} : {ignorees} lignes qui ne sont pas des codes ignorees")
+
+    # Tri en place puis suppression des doublons
+    codes = np.concatenate(blocs) if blocs else np.zeros(0, dtype=np.uint64)
+    codes.sort()
+    codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))] if len(codes) else codes
+    _ecrire(index, codes)
+    for suffixe in ('.ajouts.npy', '.retraits.npy'):
+        if os.path.exists(index + suffixe):
+            os.remove(index + suffixe)
+    return index
+
+
+###############################################################################
+#                                 BASE                                        #
+###############################################################################
+
+class BaseProduits:
+    """
+    Index de codes produits en memoire projetee, avec mises a jour incrementales.
+
+    Parametres:
+        index (str): Chemin de l'index .npy (voir construire_index).
+
+    Remarque:
+        - Un code est present s'il est dans l'index ou dans les ajouts, et
+          absent des retraits ; ajouts et retraits sont de petits tableaux
+          tries, charges entierement en memoire.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.codes = np.load(index, mmap_mode='r')
+        self.ajouts = _charger_delta(index, '.ajouts.npy')
+        self.retraits = _charger_delta(index, '.retraits.npy')
+
+    def __len__(self):
+        return (len(self.codes) + len(self.ajouts)
+                - int(_contient(self.codes, self.retraits).sum()))
+
+    # Recherche ---------------------------------------------------------------
+
+    def contient_lot(self, codes):
+        """
+        Recherche un lot de codes.
+
+        Parametres:
+            codes (iterable): Codes (chaines de chiffres ou entiers).
+
+        Retourne:
+            numpy.ndarray: Presence (booleen) de chaque code.
+        """
+        valeurs = en_entiers(codes)
+        presents = _contient(self.codes, valeurs) | _contient(self.ajouts, valeurs)
+        return presents & ~_contient(self.retraits, valeurs) & (valeurs != 0)
+
+    def contient(self, code):
+        """Presence d'un code dans la base."""
+        return bool(self.contient_lot([code])[0])
+
+    __contains__ = contient
+
+    # Mises a jour ------------------------------------------------------------
+
+    def ajouter(self, codes):
+        """Ajoute des codes (ecrits dans le fichier d'ajouts, fusion si necessaire)."""
+        valeurs = en_entiers(codes)
+        self._ajouter_valeurs(valeurs[valeurs != 0])
+        self._enregistrer()
+
+    def retirer(self, codes):
+        """Retire des codes (ecrits dans le fichier de retraits, fusion si necessaire)."""
+        valeurs = en_entiers(codes)
+        self._retirer_valeurs(valeurs[valeurs != 0])
+        self._enregistrer()
+
+    def _ajouter_valeurs(self, valeurs):
+        self.retraits = np.setdiff1d(self.retraits, valeurs).astype(np.uint64)
+        nouveaux = valeurs[~_contient(self.codes, valeurs)]
+        self.ajouts = np.union1d(self.ajouts, nouveaux).astype(np.uint64)
+
+    def _retirer_valeurs(self, valeurs):
+        self.ajouts = np.setdiff1d(self.ajouts, valeurs).astype(np.uint64)
+        anciens = valeurs[_contient(self.codes, valeurs)]
+        self.retraits = np.union1d(self.retraits, anciens).astype(np.uint64)
+
+    def _enregistrer(self):
+        seuil = max(FUSION_MIN, FUSION_RELATIVE * len(self.codes))
+        if len(self.ajouts) + len(self.retraits) > seuil:
+            self.fusionner()
+            return
+        _ecrire(self.index + '.ajouts.npy', self.ajouts)
+        _ecrire(self.index + '.retraits.npy', self.retraits)
+
+    def fusionner(self):
+        """Reecrit l'index avec les ajouts et retraits, puis le rouvre."""
+        codes = np.asarray(self.codes)
+        fusion = np.union1d(codes[~_contient(self.retraits, codes)], self.ajouts).astype(np.uint64)
+
+        # La projection de l'ancien index est liberee avant son remplacement
+        del codes
+        self.codes = None
+        _ecrire(self.index, fusion)
+        for suffixe in ('.ajouts.npy', '.retraits.npy'):
+            if os.path.exists(self.index + suffixe):
+                os.remove(self.index + suffixe)
+        self.__init__(self.index)
+
+
+###############################################################################
+#                               CHARGEMENT                                    #
+###############################################################################
+
+def _signature_fichiers(index):
+    """Dates de modification de l'index et de ses mises a jour (cle de cache)."""
+    return tuple(os.path.getmtime(chemin) if os.path.exists(chemin) else None
+                 for chemin in (index, index + '.ajouts.npy', index + '.retraits.npy'))
+
+
+@lru_cache(maxsize=8)
+def _base_en_cache(index, signature):
+    return BaseProduits(index)
+
+
+def charger_base(chemin):
+    """
+    Ouvre la base d'un index ou d'un catalogue texte, avec mise en cache.
+
+    Parametres:
+        chemin (str): Index .npy, ou catalogue .txt (l'index est alors
+            construit a cote s'il manque ou s'il est plus ancien ; les ajouts
+            et retraits de l'ancien index sont reportes sur le nouveau).
+
+    Retourne:
+        BaseProduits: Base partagee entre les verifications ; elle est
+        rouverte si l'index a ete modifie sur disque.
+    """
+    if not chemin.endswith('.npy'):
+        index = chemin_index(chemin)
+        if not os.path.exists(index) or os.path.getmtime(index) < os.path.getmtime(chemin):
+            # Les mises a jour incrementales survivent a la reconstruction
+            ajouts = _charger_delta(index, '.ajouts.npy')
+            retraits = _charger_delta(index, '.retraits.npy')
+            construire_index(chemin, index)
+            if len(ajouts) + len(retraits):
+                base = BaseProduits(index)
+                base._ajouter_valeurs(ajouts)
+                base._retirer_valeurs(retraits)
+                base._enregistrer()
+        chemin = index
+    chemin = os.path.abspath(chemin)
+    return _base_en_cache(chemin, _signature_fichiers(chemin))
+
+
+###############################################################################
+#                                   MAIN                                      #
+###############################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index de la base de produits.")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    construire = commandes.add_parser('construire', help="Construit l'index d'un catalogue texte.")
+    construire.add_argument('catalogue')
+    construire.add_argument('--index', help="Chemin de l'index (defaut : catalogue .npy).")
+
+    for nom, aide in (('chercher', "Recherche des codes."), ('ajouter', "Ajoute des codes."),
+                      ('retirer', "Retire des codes.")):
+        commande = commandes.add_parser(nom, help=aide)
+        commande.add_argument('index')
+        commande.add_argument('codes', nargs='*')
+        commande.add_argument('--fichier', help="Fichier texte de codes, un par ligne.")
+    args = parser.parse_args(argv)
+
+    if args.commande == 'construire':
+        index = construire_index(args.catalogue, args.index)
+        ignorees = bilan()['compteurs'].get('lignes_ignorees', 0)
+        print(f"{len(np.load(index, mmap_mode='r'))} codes indexes dans {index}"
+              + (f" ({ignorees} lignes ignorees)" if ignorees else ""))
+        return
+
+    codes = list(args.codes)
+    if args.fichier:
+        with open(args.fichier) as fichier:
+            codes += [ligne.strip() for ligne in fichier if ligne.strip()]
+
+    base = BaseProduits(args.index)
+    if args.commande == 'chercher':
+        for code, present in zip(codes, base.contient_lot(codes)):
+            print(f"{code} {'present' if present else 'absent'}")
+    elif args.commande == 'ajouter':
+        base.ajouter(codes)
+    else:
+        base.retirer(codes)
+
+
+###############################################################################
+#                            EXECUTION DU PROGRAMME                           #
+###############################################################################
+
+if __name__ == "__main__":
+    main()
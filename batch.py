@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Jan 19 09:40:12 2025
+
+@author: Mehdi
+
+Decodage par lots, sans interface : les images sont reparties sur un pool de
+processus et chaque resultat est ecrit des qu'il est disponible, a raison
+d'un enregistrement JSON par ligne.
+
+Exemples :
+    python batch.py images/ --workers 8 --sortie resultats.jsonl
+    python batch.py "scans/**/*.jpg" --pyramide 2
+    python batch.py --liste fichiers.txt
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import instrumentation
+import noyau
+
+###############################################################################
+#                              PARAMETRES                                     #
+###############################################################################
+
+EXTENSIONS_IMAGES = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+# Nombre de taches en vol par processus : borne la memoire sur les gros lots
+TACHES_PAR_WORKER = 4
+
+###############################################################################
+#                          SELECTION DES IMAGES                               #
+###############################################################################
+
+def lister_images(entrees, liste=None):
+    """
+    Enumere les images a traiter, sans charger la liste complete en memoire.
+
+    Parametres:
+        entrees (list): Dossiers (parcourus recursivement), fichiers ou motifs glob.
+        liste (str): Fichier texte optionnel contenant un chemin par ligne.
+
+    Retourne:
+        generator: Chemins des images, dans l'ordre des entrees.
+    """
+    for entree in entrees:
+        if os.path.isdir(entree):
+            for dossier, _, fichiers in os.walk(entree):
+                for nom in sorted(fichiers):
+                    if nom.lower().endswith(EXTENSIONS_IMAGES):
+                        yield os.path.join(dossier, nom)
+        elif glob.has_magic(entree):
+            yield from sorted(glob.iglob(entree, recursive=True))
+        else:
+            yield entree
+
+    if liste:
+        with open(liste, 'r') as fichier:
+            for ligne in fichier:
+                chemin = ligne.strip()
+                if chemin:
+                    yield chemin
+
+
+###############################################################################
+#                         DECODAGE D'UNE IMAGE                                #
+###############################################################################
+
+def decoder_image(image_path, max_attempts=16, pyramide=0, memoire_max=None,
+                  multi=False, budget=None):
+    """
+    Enchaine segmentation, lancers de rayons, extraction et decodage sur une image.
+
+    Parametres:
+        image_path (str): Chemin de l'image.
+        max_attempts (int): Nombre maximal de lignes de balayage.
+        pyramide (int): Niveaux de reduction pour la segmentation.
+        memoire_max (int): Budget memoire (octets) de la segmentation.
+        multi (bool): Decode toutes les regions candidates, et non la seule
+            plus grande ; l'enregistrement contient alors la liste `codes`.
+        budget (float): Temps (s) de decodage partage par les regions en mode multi.
+
+    Retourne:
+        dict: Enregistrement {image, code, statut, tentatives, temps,
+        compteurs} ; les temps sont cumules par etape, en secondes, et les
+        compteurs sont ceux de l'instrumentation pour cette image. Le statut
+        est 'ok', 'echec_decodage', 'echec_segmentation', 'echec_chargement'
+        (image absente ou illisible) ou 'erreur'.
+    """
+    instrumentation.reinitialiser()
+    resultat = {'image': image_path, 'code': None, 'statut': None,
+                'tentatives': 0, 'temps': {}, 'compteurs': {}}
+    temps = resultat['temps']
+
+    def chrono(etape, debut):
+        temps[etape] = temps.get(etape, 0.0) + time.perf_counter() - debut
+
+    # Fichier absent, illisible ou corrompu : distinct d'un echec de segmentation
+    try:
+        debut = time.perf_counter()
+        session = noyau.ScanSession(image_path, pyramide=pyramide, memoire_max=memoire_max)
+        chrono('chargement', debut)
+    except Exception as e:
+        resultat['statut'] = 'echec_chargement'
+        resultat['erreur'] = f"{type(e).__name__}: {e}"
+        return resultat
+
+    try:
+        debut = time.perf_counter()
+        if multi:
+            candidats = session.candidats()
+            if not candidats:
+                raise ValueError("Aucune region coherente detectee.")
+        else:
+            session.segmenter()
+        chrono('segmentation', debut)
+    except ValueError:
+        resultat['statut'] = 'echec_segmentation'
+        resultat['compteurs'] = instrumentation.bilan()['compteurs']
+        return resultat
+    except Exception as e:
+        resultat['statut'] = 'erreur'
+        resultat['erreur'] = str(e)
+        return resultat
+
+    debut = time.perf_counter()
+    if multi:
+        # Balayage de toutes les regions candidates, en parallele
+        lectures = noyau.decoder_regions(session.image, candidats, max_attempts, budget)
+        resultat['codes'] = [lecture['code'] for lecture in lectures]
+        code = resultat['codes'][0] if lectures else None
+        lignes = sum(lecture['lignes'] for lecture in lectures)
+    else:
+        # Balayage du rectangle oriente jusqu'au premier code valide
+        code, lignes = session.decoder(max_attempts)
+    chrono('balayage', debut)
+
+    resultat.update(code=code, tentatives=lignes, compteurs=instrumentation.bilan()['compteurs'],
+                    statut='ok' if code is not None else 'echec_decodage')
+    return resultat
+
+
+###############################################################################
+#                              TRAITEMENT PAR LOTS                            #
+###############################################################################
+
+def traiter_lot(chemins, sortie, workers=None, max_attempts=16, pyramide=0,
+                memoire_max=None, multi=False, budget=None):
+    """
+    Decode un ensemble d'images sur un pool de processus.
+
+    Parametres:
+        chemins (iterable): Chemins des images (consommes au fil de l'eau).
+        sortie (file): Flux texte recevant un enregistrement JSON par ligne.
+        workers (int): Nombre de processus (par defaut, un par coeur).
+        max_attempts (int): Nombre maximal de lignes de balayage par image.
+        pyramide (int): Niveaux de reduction pour la segmentation.
+        memoire_max (int): Budget memoire (octets) de la segmentation, par processus.
+        multi, budget: Lecture de tous les codes de chaque image (voir decoder_image).
+
+    Retourne:
+        dict: Nombre d'images traitees par statut.
+
+    Remarque:
+        - Une tache en echec (exception hors de decoder_image, ou processus
+          tue, par exemple faute de memoire) produit un enregistrement
+          'erreur' pour son image, et le lot continue.
+        - Un pool casse par un processus tue est remplace ; les images qui y
+          etaient en cours sont relancees une a une, seules dans le pool,
+          pour que seule l'image fautive finisse en 'erreur'.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_en_vol = workers * TACHES_PAR_WORKER
+    bilan = {}
+    chemins = iter(chemins)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        en_vol = {}     # tache -> chemin de l'image
+        relances, relancees = [], set()
+        epuise = False
+        while en_vol or relances or not epuise:
+            # Image a relancer apres un pool casse : seule dans le pool
+            if relances and not en_vol:
+                chemin = relances.pop(0)
+                tache = pool.submit(decoder_image, chemin, max_attempts,
+                                    pyramide, memoire_max, multi, budget)
+                en_vol[tache] = chemin
+
+            # Alimentation du pool sans depasser max_en_vol taches en attente
+            while not relances and not epuise and len(en_vol) < max_en_vol:
+                chemin = next(chemins, None)
+                if chemin is None:
+                    epuise = True
+                    break
+                tache = pool.submit(decoder_image, chemin, max_attempts,
+                                    pyramide, memoire_max, multi, budget)
+                en_vol[tache] = chemin
+
+            if not en_vol:
+                break
+            termines, _ = wait(en_vol, return_when=FIRST_COMPLETED)
+            pool_casse = False
+            for tache in termines:
+                chemin = en_vol.pop(tache)
+                try:
+                    resultat = tache.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        pool_casse = True
+                        if chemin not in relancees:
+                            relancees.add(chemin)
+                            relances.append(chemin)
+                            continue
+                    resultat = {'image': chemin, 'code': None, 'statut': 'erreur',
+                                'tentatives': 0, 'temps': {}, 'compteurs': {},
+                                'erreur': f"{type(e).__name__}: {e}"}
+                sortie.write(json.dumps(resultat, default=_json_numpy) + '\n')
+                sortie.flush()
+                bilan[resultat['statut']] = bilan.get(resultat['statut'], 0) + 1
+
+            if pool_casse:
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown()
+
+    return bilan
+
+
+def _json_numpy(valeur):
+    """Serialise les scalaires numpy eventuels des enregistrements."""
+    # NumPy n'est pas importe ici : sans lui, aucun scalaire numpy n'existe
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(valeur, np.generic):
+        return valeur.item()
+    raise TypeError(f"Type non serialisable : {type(valeur).__name__}")
+
+
+###############################################################################
+#                                   MAIN                                      #
+###############################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decodage EAN-13 par lots.")
+    parser.add_argument('entrees', nargs='*',
+                        help="Dossiers, fichiers ou motifs glob (entre guillemets).")
+    parser.add_argument('--liste', help="Fichier texte avec un chemin d'image par ligne.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Nombre de processus (defaut : nombre de coeurs).")
+    parser.add_argument('--sortie', default='-',
+                        help="Fichier JSON Lines de sortie (defaut : sortie standard).")
+    parser.add_argument('--tentatives', type=int, default=16,
+                        help="Nombre maximal de lignes de balayage par image.")
+    parser.add_argument('--pyramide', type=int, default=0,
+                        help="Niveaux de reduction pour la segmentation.")
+    parser.add_argument('--memoire', type=int, default=None,
+                        help="Budget memoire de segmentation par processus, en Mo "
+                             "(les grandes images sont traitees par tuiles).")
+    parser.add_argument('--multi', action='store_true',
+                        help="Lit tous les codes de chaque image, pas seulement le plus grand.")
+    parser.add_argument('--budget', type=float, default=None,
+                        help="Temps de decodage par image en mode --multi, en secondes.")
+    args = parser.parse_args(argv)
+
+    if not args.entrees and not args.liste:
+        parser.error("aucune image a traiter.")
+
+    chemins = lister_images(args.entrees, args.liste)
+    memoire_max = args.memoire * 2**20 if args.memoire else None
+    debut = time.perf_counter()
+    if args.sortie == '-':
+        bilan = traiter_lot(chemins, sys.stdout, args.workers, args.tentatives,
+                            args.pyramide, memoire_max, args.multi, args.budget)
+    else:
+        with open(args.sortie, 'w') as sortie:
+            bilan = traiter_lot(chemins, sortie, args.workers, args.tentatives,
+                                args.pyramide, memoire_max, args.multi, args.budget)
+
+    total = sum(bilan.values())
+    duree = time.perf_counter() - debut
+    print(f"{total} images en {duree:.1f} s ({total / max(duree, 1e-9):.1f} images/s) : {bilan}",
+          file=sys.stderr)
+
+
+###############################################################################
+#                            EXECUTION DU PROGRAMME                           #
+###############################################################################
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Jan 25 10:18:52 2025
+
+@author: Mehdi
+
+Banc de mesure reproductible sur des corpus EAN-13 synthetiques
+
+Des images etiquetees sont generees pour chaque combinaison de taille,
+taille de module, rotation, flou, bruit et contraste ; chaque etape de la
+chaine (segmentation, lancer des lignes, extraction, decodage) est
+chronometree separement. Le rapport (debit, latences p50/p95/p99 par etape,
+pic memoire, taux de lecture) est ecrit en JSON pour comparer deux versions
+du code avant d'accepter une modification.
+
+Exemples :
+    python benchmark.py --sortie avant.json
+    python benchmark.py --angles 0,30,90 --flous 0,1.5 --sortie apres.json --reference avant.json
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+from scipy import ndimage
+
+from decodage_signature import (cle_controle, encode_ean13, decode_ean13_tolerant, decode_ean13_profils,
+                                CONFIANCE_MIN, CONFIANCE_MIN_PROFIL)
+from fonctions import lignes_balayage, extraction_multiple, profils_multiple
+from session import ScanSession
+
+###############################################################################
+#                              PARAMETRES                                     #
+###############################################################################
+
+# Etapes chronometrees, dans l'ordre de la chaine
+ETAPES = ('segmentation', 'lancer', 'extraction', 'decodage')
+
+# Hauteur des barres, en fraction de la longueur du symbole (EAN-13 : 25,93 / 37,29)
+HAUTEUR_RELATIVE = 0.7
+
+###############################################################################
+#                          GENERATION DU CORPUS                               #
+###############################################################################
+
+def generer_code(rng):
+    """Code EAN-13 aleatoire (12 chiffres tires, cle de controle calculee)."""
+    chiffres = rng.integers(0, 10, 12)
+    return ''.join(map(str, chiffres)) + str(cle_controle(chiffres))
+
+
+def generer_image(code, taille=(800, 600), module=3, angle=0.0, flou=0.5,
+                  bruit=0.02, contraste=1.0, rng=None):
+    """
+    Image synthetique d'un code EAN-13 centre, sur fond clair.
+
+    Parametres:
+        code (str): Code EAN-13 (13 chiffres).
+        taille (tuple): (largeur, hauteur) de l'image en pixels.
+        module (float): Largeur d'un module en pixels.
+        angle (float): Rotation du symbole, en degres.
+        flou (float): Ecart-type du flou gaussien (pixels), 0 pour aucun.
+        bruit (float): Ecart-type du bruit gaussien additif.
+        contraste (float): Ecart entre niveaux clair et sombre, dans ]0, 1].
+        rng (numpy.random.Generator): Generateur pour le bruit.
+
+    Retourne:
+        numpy.ndarray: Image (hauteur, largeur) en niveaux de gris dans [0, 1].
+    """
+    rng = rng or np.random.default_rng()
+    largeur, hauteur = taille
+    signature = encode_ean13(code)
+    longueur = 95 * module
+
+    # Coordonnees de chaque pixel dans le repere du symbole
+    theta = np.radians(angle)
+    y, x = np.mgrid[0:hauteur, 0:largeur].astype(float)
+    x -= largeur / 2
+    y -= hauteur / 2
+    a = x * np.cos(theta) + y * np.sin(theta) + longueur / 2
+    b = -x * np.sin(theta) + y * np.cos(theta)
+
+    modules = np.floor(a / module).astype(int)
+    dans_symbole = (modules >= 0) & (modules < 95) & (np.abs(b) < HAUTEUR_RELATIVE * longueur / 2)
+    noir = np.zeros((hauteur, largeur), dtype=bool)
+    noir[dans_symbole] = signature[modules[dans_symbole]] == 1
+
+    image = np.where(noir, 0.5 - contraste / 2, 0.5 + contraste / 2)
+    if flou > 0:
+        image = ndimage.gaussian_filter(image, flou)
+    if bruit > 0:
+        image = image + rng.normal(0, bruit, image.shape)
+    return np.clip(image, 0, 1)
+
+
+def scenarios(tailles, modules, angles, flous, bruits, contrastes):
+    """Produit cartesien des parametres de generation, un dict par scenario."""
+    for taille, module, angle, flou, bruit, contraste in itertools.product(
+            tailles, modules, angles, flous, bruits, contrastes):
+        yield {'taille': taille, 'module': module, 'angle': angle,
+               'flou': flou, 'bruit': bruit, 'contraste': contraste}
+
+
+###############################################################################
+#                                MESURES                                      #
+###############################################################################
+
+def chaine_par_etapes(image, n_lignes=16, profils=True):
+    """
+    Execute la chaine de lecture etape par etape, en chronometrant chacune.
+
+    Parametres:
+        image (numpy.ndarray): Image en niveaux de gris.
+        n_lignes (int): Nombre de lignes de balayage (toutes extraites).
+        profils (bool): Sans lecture apres seuillage, decode les profils
+            d'intensite des lignes (voir decode_ean13_profils).
+
+    Retourne:
+        tuple: (code lu ou None, temps par etape en secondes).
+    """
+    temps = {}
+
+    debut = time.perf_counter()
+    try:
+        coins = ScanSession(image).coins_orientes
+    except ValueError:
+        temps['segmentation'] = time.perf_counter() - debut
+        return None, temps
+    temps['segmentation'] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    lignes = lignes_balayage(*coins, n_lignes)
+    temps['lancer'] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    signatures, valides = extraction_multiple(image, lignes)
+    temps['extraction'] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    codes, confiances, _, _ = decode_ean13_tolerant(signatures)
+    lus = [code for code, confiance, valide in zip(codes, confiances, valides)
+           if valide and confiance >= CONFIANCE_MIN]
+    temps['decodage'] = time.perf_counter() - debut
+    if any(lus) or not profils:
+        return next((code for code in lus if code is not None), None), temps
+
+    debut = time.perf_counter()
+    intensites, valides = profils_multiple(image, lignes)
+    temps['extraction'] += time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    codes, confiances, _ = decode_ean13_profils(intensites)
+    lus = [code for code, confiance, valide in zip(codes, confiances, valides)
+           if valide and confiance >= CONFIANCE_MIN_PROFIL]
+    temps['decodage'] += time.perf_counter() - debut
+    return next((code for code in lus if code is not None), None), temps
+
+
+def pic_memoire(image, n_lignes=16):
+    """Pic d'allocation (octets) de la chaine complete, mesure par tracemalloc."""
+    tracemalloc.start()
+    try:
+        chaine_par_etapes(image, n_lignes)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _percentiles(valeurs):
+    """Latences p50, p95 et p99 en millisecondes."""
+    if not valeurs:
+        return None
+    p50, p95, p99 = np.percentile(np.asarray(valeurs) * 1e3, [50, 95, 99])
+    return {'p50': p50, 'p95': p95, 'p99': p99}
+
+
+def mesurer_scenario(scenario, n_images, graine, n_lignes=16, memoire=True, profils=True):
+    """
+    Genere et lit n_images images d'un scenario.
+
+    Retourne:
+        dict: Scenario, taux de lecture et de fausses lectures, debit
+        (images/s), latences par etape et totales, pic memoire (Mo).
+    """
+    rng = np.random.default_rng(graine)
+    latences = {etape: [] for etape in ETAPES + ('total',)}
+    lus = faux = 0
+    pic = 0
+
+    for _ in range(n_images):
+        code = generer_code(rng)
+        image = generer_image(code, rng=rng, **scenario)
+
+        lu, temps = chaine_par_etapes(image, n_lignes, profils)
+        for etape, duree in temps.items():
+            latences[etape].append(duree)
+        latences['total'].append(sum(temps.values()))
+        if lu == code:
+            lus += 1
+        elif lu is not None:
+            faux += 1
+        if memoire:
+            pic = max(pic, pic_memoire(image, n_lignes))
+
+    total = sum(latences['total'])
+    return {'scenario': scenario, 'images': n_images,
+            'taux_lecture': lus / n_images, 'taux_faux': faux / n_images,
+            'debit': n_images / total if total > 0 else None,
+            'latences_ms': {etape: _percentiles(valeurs) for etape, valeurs in latences.items()},
+            'pic_memoire_mo': pic / 2**20 if memoire else None}
+
+
+def comparer(resultats, reference):
+    """Affiche l'evolution de la latence p50 et du taux de lecture par scenario."""
+    anciens = {json.dumps(r['scenario'], sort_keys=True): r for r in reference['scenarios']}
+    for r in resultats['scenarios']:
+        ancien = anciens.get(json.dumps(r['scenario'], sort_keys=True))
+        if ancien is None:
+            continue
+        p50, p50_ancien = r['latences_ms']['total']['p50'], ancien['latences_ms']['total']['p50']
+        print(f"{_libelle(r['scenario']):48s} p50 {p50_ancien:8.1f} -> {p50:8.1f} ms "
+              f"({100 * (p50 / p50_ancien - 1):+6.1f} %), lecture "
+              f"{100 * ancien['taux_lecture']:5.1f} -> {100 * r['taux_lecture']:5.1f} %")
+
+
+def _libelle(scenario):
+    largeur, hauteur = scenario['taille']
+    return (f"{largeur}x{hauteur} m{scenario['module']} a{scenario['angle']} "
+            f"f{scenario['flou']} b{scenario['bruit']} c{scenario['contraste']}")
+
+
+###############################################################################
+#                                   MAIN                                      #
+###############################################################################
+
+def _liste(type_):
+    return lambda texte: [type_(v) for v in texte.split(',')]
+
+
+def _tailles(texte):
+    return [tuple(int(v) for v in taille.split('x')) for taille in texte.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc de mesure EAN-13 synthetique.")
+    parser.add_argument('--images', type=int, default=20, help="Images par scenario.")
+    parser.add_argument('--tailles', type=_tailles, default=[(800, 600)],
+                        help="Tailles LxH separees par des virgules.")
+    parser.add_argument('--modules', type=_liste(float), default=[3.0],
+                        help="Largeurs de module en pixels.")
+    parser.add_argument('--angles', type=_liste(float), default=[0.0, 30.0, 90.0],
+                        help="Rotations en degres.")
+    parser.add_argument('--flous', type=_liste(float), default=[0.5])
+    parser.add_argument('--bruits', type=_liste(float), default=[0.02])
+    parser.add_argument('--contrastes', type=_liste(float), default=[1.0])
+    parser.add_argument('--lignes', type=int, default=16, help="Lignes de balayage par image.")
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--sans-profils', action='store_true',
+                        help="Lecture apres seuillage seulement (sans decode_ean13_profils).")
+    parser.add_argument('--sans-memoire', action='store_true',
+                        help="Ne mesure pas le pic memoire (deux fois plus rapide).")
+    parser.add_argument('--sortie', default='benchmark.json', help="Rapport JSON.")
+    parser.add_argument('--reference', help="Rapport JSON precedent a comparer.")
+    args = parser.parse_args(argv)
+
+    # Le bruit de la segmentation utilise le generateur global
+    np.random.seed(args.graine)
+
+    resultats = {'parametres': {k: v for k, v in vars(args).items() if k not in ('sortie', 'reference')},
+                 'environnement': {'python': platform.python_version(), 'numpy': np.__version__,
+                                   'scipy': scipy.__version__, 'machine': platform.machine(),
+                                   'systeme': platform.platform()},
+                 'scenarios': []}
+
+    liste = scenarios(args.tailles, args.modules, args.angles, args.flous,
+                      args.bruits, args.contrastes)
+    for indice, scenario in enumerate(liste):
+        r = mesurer_scenario(scenario, args.images, [args.graine, indice],
+                             args.lignes, not args.sans_memoire, not args.sans_profils)
+        resultats['scenarios'].append(r)
+        latence = r['latences_ms']['total']
+        memoire = f"{r['pic_memoire_mo']:7.1f} Mo" if r['pic_memoire_mo'] is not None else ''
+        print(f"{_libelle(scenario):48s} lecture {100 * r['taux_lecture']:5.1f} % "
+              f"p50 {latence['p50']:7.1f} p95 {latence['p95']:7.1f} p99 {latence['p99']:7.1f} ms "
+              f"{r['debit']:6.1f} img/s {memoire}", file=sys.stderr)
+
+    with open(args.sortie, 'w') as fichier:
+        json.dump(resultats, fichier, indent=1)
+
+    if args.reference:
+        with open(args.reference) as fichier:
+            comparer(resultats, json.load(fichier))
+
+
+###############################################################################
+#                            EXECUTION DU PROGRAMME                           #
+###############################################################################
+
+if __name__ == "__main__":
+    main()
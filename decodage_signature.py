@@ -8,12 +8,149 @@ code decodage
 @author: Mehdi
 """
 
+import numpy as np
+
+###############################################################################
+#                          TABLES DE DECODAGE                                 #
+###############################################################################
+
+# Motifs des chiffres 0 a 9 (l'indice est le chiffre code)
+CODE_L = ['0001101', '0011001', '0010011', '0111101', '0100011',
+          '0110001', '0101111', '0111011', '0110111', '0001011']
+CODE_G = ['0100111', '0110011', '0011011', '0100001', '0011101',
+          '0111001', '0000101', '0010001', '0001001', '0010111']
+CODE_R = ['1110010', '1100110', '1101100', '1000010', '1011100',
+          '1001110', '1010000', '1000100', '1001000', '1110100']
+
+# Motifs de parite de la partie gauche, indexes par le premier chiffre
+PARITES = ['LLLLLL', 'LLGLGG', 'LLGGLG', 'LLGGGL', 'LGLLGG',
+           'LGGLLG', 'LGGGLL', 'LGLGLG', 'LGLGGL', 'LGGLGL']
+
+# Motifs de garde et leurs positions dans la signature de 95 bits
+GARDES = ((slice(0, 3), [1, 0, 1], "gauche"),
+          (slice(45, 50), [0, 1, 0, 1, 0], "central"),
+          (slice(92, 95), [1, 0, 1], "droit"))
+
+# Poids binaires pour empaqueter 7 modules (ou 6 parites) en un entier
+POIDS_7 = 1 << np.arange(6, -1, -1)
+POIDS_6 = 1 << np.arange(5, -1, -1)
+
+
+def _table(motifs, taille):
+    """Table de correspondance entier -> chiffre (-1 si motif invalide)."""
+    table = np.full(taille, -1, dtype=np.int8)
+    for chiffre, motif in enumerate(motifs):
+        table[int(motif, 2)] = chiffre
+    return table
+
+
+# Tables de 128 entrees (7 bits) et de 64 entrees (6 parites, G = 1)
+TABLE_L = _table(CODE_L, 128)
+TABLE_G = _table(CODE_G, 128)
+TABLE_R = _table(CODE_R, 128)
+TABLE_PARITE = _table([p.replace('L', '0').replace('G', '1') for p in PARITES], 64)
+
+
+
+def _table_distances(motifs):
+    """Distances de Hamming (128, 10) de chaque groupe de 7 modules a chaque motif."""
+    groupes = np.arange(128)[:, None] ^ np.array([int(motif, 2) for motif in motifs])[None, :]
+    return np.unpackbits(groupes.astype(np.uint8)[..., None], axis=-1).sum(axis=-1).astype(np.int8)
+
+
+# Tables de distances (128, 10) pour le decodage tolerant
+DISTANCES_L = _table_distances(CODE_L)
+DISTANCES_G = _table_distances(CODE_G)
+DISTANCES_R = _table_distances(CODE_R)
+
+# Motifs de parite (10, 6) : G = True, indexes par le premier chiffre
+MOTIFS_PARITE = np.array([[p == 'G' for p in parite] for parite in PARITES])
+
+# Probabilite qu'un module soit mal lu, pour la confiance du decodage tolerant
+PROBA_ERREUR_MODULE = 0.1
+
+# Confiance minimale d'une lecture tolerante acceptee. Mesure sur 10 000
+# signatures synthetiques : au plus ~1 fausse lecture pour 1000 signatures
+# abimees (1 a 4 % de modules faux, ou 2 a 4 modules faux) ; 0,7 en accepte
+# jusqu'a 1,6 pour 1000, 0,5 jusqu'a 14. Prix de cette prudence : un seul
+# module faux n'est corrige que sur 37 % des signatures (28 % s'il tombe
+# dans un chiffre plutot que dans une garde), contre 79 % au seuil 0,5.
+# Une ligne non corrigee reste lisible par les autres lignes du balayage
+CONFIANCE_MIN = 0.8
+
+# Poids des 13 chiffres dans la cle de controle
+POIDS_CLE = np.array([1, 3] * 6 + [1])
+
+# Codes de statut renvoyes par decode_ean13_lot
+DECODAGE_OK = 0
+ERREUR_GARDE = 1
+ERREUR_MOTIF = 2
+ERREUR_PARITE = 3
+ERREUR_CLE = 4
+
+###############################################################################
+#                               DECODAGE                                      #
+###############################################################################
+
+def cle_controle(chiffres):
+    """
+    Cle de controle EAN-13 des 12 premiers chiffres.
+
+    Parametres:
+        chiffres (array-like): Chiffres du code, de forme (..., 12) ou (..., 13).
+
+    Retourne:
+        numpy.ndarray ou int: Cle attendue pour chaque code.
+    """
+    chiffres = np.asarray(chiffres)
+    # Positions impaires (1ere, 3e, ..., 11e) + 3 x positions paires (2e, ..., 12e)
+    total = chiffres[..., 0:12:2].sum(axis=-1) + 3 * chiffres[..., 1:12:2].sum(axis=-1)
+    return (10 - total % 10) % 10
+
+
+def _groupes(signatures):
+    """Groupes de 7 modules (N, 6) des parties gauche et droite, en entiers."""
+    n = len(signatures)
+    return (signatures[:, 3:45].reshape(n, 6, 7) @ POIDS_7,
+            signatures[:, 50:92].reshape(n, 6, 7) @ POIDS_7)
+
+
+def _motifs_valides(signatures):
+    """Nombre de groupes reconnus par signature (L ou G a gauche, R a droite)."""
+    gauche, droite = _groupes(signatures)
+    return (((TABLE_L[gauche] >= 0) | (TABLE_G[gauche] >= 0)).sum(axis=1)
+            + (TABLE_R[droite] >= 0).sum(axis=1))
+
+
+def sens_inverse(signatures):
+    """
+    Detecte les signatures lues de droite a gauche.
+
+    Parametres:
+        signatures (array-like): Matrice (N, 95) de bits.
+
+    Retourne:
+        numpy.ndarray: Masque (N,) des signatures a retourner.
+
+    Remarque:
+        - Les gardes sont symetriques, mais pas les motifs : a l'envers, les
+          motifs R deviennent des motifs G et les motifs L ne sont plus
+          reconnus. Une signature intacte compte 12 groupes reconnus dans
+          son sens et au plus 9 dans l'autre ; le sens retenu est celui qui
+          en reconnait le plus (l'endroit en cas d'egalite).
+    """
+    signatures = np.asarray(signatures, dtype=np.uint8).reshape(-1, 95)
+    return _motifs_valides(signatures[:, ::-1]) > _motifs_valides(signatures)
+
+
 def decode_ean13_signature(binary_signature):
     """
     Decoder un code-barres EAN-13 a partir de sa signature binaire.
 
     Parametres:
-    - binary_signature: liste d'entiers (0 ou 1), representant la signature binaire du code-barres (95 bits)
+    - binary_signature: liste ou tableau numpy d'entiers (0 ou 1), representant
+      la signature binaire du code-barres (95 bits), lue dans un sens ou dans
+      l'autre (voir sens_inverse)
 
     Retourne:
     - code_barres: chaîne de caracteres representant le code EAN-13 decode
@@ -21,142 +158,558 @@ def decode_ean13_signature(binary_signature):
     # Verifier la longueur de la signature
     if len(binary_signature) != 95:
         raise ValueError("La signature binaire doit contenir exactement 95 bits.")
-
-    # Motifs de garde
-    guard_left = [1, 0, 1]
-    guard_center = [0, 1, 0, 1, 0]
-    guard_right = [1, 0, 1]
+    signature = np.asarray(binary_signature, dtype=np.uint8)
+    if sens_inverse(signature)[0]:
+        signature = signature[::-1]
 
     # Verifier les motifs de garde
-    if binary_signature[0:3] != guard_left:
-        raise ValueError("Motif de garde gauche incorrect.")
-    if binary_signature[45:50] != guard_center:
-        raise ValueError("Motif de garde central incorrect.")
-    if binary_signature[92:95] != guard_right:
-        raise ValueError("Motif de garde droit incorrect.")
-
-    # Tables de codage pour les chiffres
-    code_L = {
-        '0001101': '0',
-        '0011001': '1',
-        '0010011': '2',
-        '0111101': '3',
-        '0100011': '4',
-        '0110001': '5',
-        '0101111': '6',
-        '0111011': '7',
-        '0110111': '8',
-        '0001011': '9',
-    }
-
-    code_G = {
-        '0100111': '0',
-        '0110011': '1',
-        '0011011': '2',
-        '0100001': '3',
-        '0011101': '4',
-        '0111001': '5',
-        '0000101': '6',
-        '0010001': '7',
-        '0001001': '8',
-        '0010111': '9',
-    }
-
-    code_R = {
-        '1110010': '0',
-        '1100110': '1',
-        '1101100': '2',
-        '1000010': '3',
-        '1011100': '4',
-        '1001110': '5',
-        '1010000': '6',
-        '1000100': '7',
-        '1001000': '8',
-        '1110100': '9',
-    }
-
-    # Table de parite pour determiner le premier chiffre
-    parity_table = {
-        'LLLLLL': '0',
-        'LLGLGG': '1',
-        'LLGGLG': '2',
-        'LLGGGL': '3',
-        'LGLLGG': '4',
-        'LGGLLG': '5',
-        'LGGGLL': '6',
-        'LGLGLG': '7',
-        'LGLGGL': '8',
-        'LGGLGL': '9',
-    }
-
-    # Decodage des 6 chiffres de gauche
-    left_digits = []
-    parity_pattern = ''
-    for i in range(6):
-        start = 3 + i * 7
-        end = start + 7
-        pattern_bits = binary_signature[start:end]
-        pattern = ''.join(map(str, pattern_bits))
-
-        if pattern in code_L:
-            digit = code_L[pattern]
-            parity_pattern += 'L'
-        elif pattern in code_G:
-            digit = code_G[pattern]
-            parity_pattern += 'G'
-        else:
-            raise ValueError(f"Motif inconnu dans la partie gauche : {pattern}")
-        left_digits.append(digit)
+    for position, motif, nom in GARDES:
+        if not np.array_equal(signature[position], motif):
+            raise ValueError(f"Motif de garde {nom} incorrect.")
+
+    # Chaque groupe de 7 modules devient un indice dans les tables
+    gauche = signature[3:45].reshape(6, 7) @ POIDS_7
+    droite = signature[50:92].reshape(6, 7) @ POIDS_7
+
+    # Decodage des 6 chiffres de gauche (parite L ou G)
+    chiffres_L = TABLE_L[gauche]
+    chiffres_G = TABLE_G[gauche]
+    inconnus = (chiffres_L < 0) & (chiffres_G < 0)
+    if inconnus.any():
+        motif = format(int(gauche[np.argmax(inconnus)]), '07b')
+        raise ValueError(f"Motif inconnu dans la partie gauche : {motif}")
 
     # Determiner le premier chiffre a partir du motif de parite
-    if parity_pattern in parity_table:
-        first_digit = parity_table[parity_pattern]
-    else:
-        raise ValueError(f"Motif de parite inconnu : {parity_pattern}")
+    parite = chiffres_G >= 0
+    first_digit = TABLE_PARITE[parite @ POIDS_6]
+    if first_digit < 0:
+        motif = ''.join('G' if p else 'L' for p in parite)
+        raise ValueError(f"Motif de parite inconnu : {motif}")
 
     # Decodage des 6 chiffres de droite
-    right_digits = []
-    for i in range(6):
-        start = 50 + i * 7
-        end = start + 7
-        pattern_bits = binary_signature[start:end]
-        pattern = ''.join(map(str, pattern_bits))
-
-        if pattern in code_R:
-            digit = code_R[pattern]
-        else:
-            raise ValueError(f"Motif inconnu dans la partie droite : {pattern}")
-        right_digits.append(digit)
+    chiffres_R = TABLE_R[droite]
+    if (chiffres_R < 0).any():
+        motif = format(int(droite[np.argmax(chiffres_R < 0)]), '07b')
+        raise ValueError(f"Motif inconnu dans la partie droite : {motif}")
 
     # Construire le code-barres complet
-    code_barres = first_digit + ''.join(left_digits) + ''.join(right_digits)
+    digits = np.concatenate(([first_digit], np.maximum(chiffres_L, chiffres_G), chiffres_R))
+    code_barres = ''.join(map(str, digits))
 
     # Verifier la cle de controle
-    digits = list(map(int, code_barres))
-    if len(digits) != 13:
-        raise ValueError("Le code-barres doit contenir 13 chiffres.")
+    check_digit = cle_controle(digits)
+    if check_digit != digits[-1]:
+        raise ValueError(f"Cle de controle invalide : attendu {check_digit}, obtenu {digits[-1]}")
 
-    # Calcul de la cle de controle selon la norme EAN-13
-    # etape 1 : Somme des chiffres en positions paires (2e, 4e, ..., 12e)
-    sum_even = sum(digits[i] for i in range(1, 12, 2))
+    return code_barres
 
-    # etape 2 : Multiplier la somme par 3
-    sum_even *= 3
 
-    # etape 3 : Somme des chiffres en positions impaires (1ere, 3e, ..., 11e)
-    sum_odd = sum(digits[i] for i in range(0, 12, 2))
+def decode_ean13_lot(signatures):
+    """
+    Decode en une passe vectorisee un lot de signatures EAN-13.
 
-    # etape 4 : Calculer le total
-    total = sum_even + sum_odd
+    Parametres:
+        signatures (array-like): Matrice (N, 95) de bits (liste, tableau numpy
+            ou une seule signature de 95 bits), chacune lue dans un sens ou
+            dans l'autre.
 
-    # etape 5 : Calculer la cle de controle
-    check_digit = (10 - (total % 10)) % 10
+    Retourne:
+        tuple:
+            - codes (list): Code EAN-13 (str) de chaque signature, ou None.
+            - statuts (numpy.ndarray): Statut (N,) : DECODAGE_OK, ERREUR_GARDE,
+              ERREUR_MOTIF, ERREUR_PARITE ou ERREUR_CLE (premiere erreur).
 
-    # Verifier si la cle de controle est correcte
-    if check_digit != digits[-1]:
-        raise ValueError(f"Cle de controle invalide : attendu {check_digit}, obtenu {digits[-1]}")
+    Remarque:
+        - Le sens de chaque signature est celui ou elle compte le plus de
+          groupes de 7 modules reconnus (voir sens_inverse) : les signatures
+          a l'envers sont retournees avant l'unique passe de decodage.
+    """
+    signatures = np.asarray(signatures, dtype=np.uint8).reshape(-1, 95)
+    n = len(signatures)
+    inverses = sens_inverse(signatures)
+    if inverses.any():
+        signatures = signatures.copy()
+        signatures[inverses] = signatures[inverses, ::-1]
+
+    # Gardes
+    gardes_ok = np.ones(n, dtype=bool)
+    for position, motif, _ in GARDES:
+        gardes_ok &= (signatures[:, position] == motif).all(axis=1)
+
+    # Chiffres de gauche et de droite, par consultation des tables
+    gauche, droite = _groupes(signatures)
+    chiffres_L, chiffres_G, chiffres_R = TABLE_L[gauche], TABLE_G[gauche], TABLE_R[droite]
+    motifs_ok = ((chiffres_L >= 0) | (chiffres_G >= 0)).all(axis=1) & (chiffres_R >= 0).all(axis=1)
+
+    # Premier chiffre par la parite
+    premier = TABLE_PARITE[(chiffres_G >= 0) @ POIDS_6]
+    parite_ok = premier >= 0
+
+    chiffres = np.concatenate((premier[:, None], np.maximum(chiffres_L, chiffres_G), chiffres_R), axis=1)
+    cle_ok = cle_controle(chiffres) == chiffres[:, 12]
+
+    # Statut : premiere verification en echec, dans l'ordre du decodage
+    statuts = np.full(n, ERREUR_CLE, dtype=np.int8)
+    statuts[cle_ok] = DECODAGE_OK
+    statuts[~parite_ok] = ERREUR_PARITE
+    statuts[~motifs_ok] = ERREUR_MOTIF
+    statuts[~gardes_ok] = ERREUR_GARDE
+
+    # Conversion en chaines des seuls codes valides
+    valides = statuts == DECODAGE_OK
+    codes = [None] * n
+    textes = (chiffres[valides].astype(np.uint8) + ord('0')).view('S13').ravel()
+    for i, texte in zip(np.flatnonzero(valides), textes):
+        codes[i] = texte.decode()
+    return codes, statuts
+
+###############################################################################
+#                           DECODAGE TOLERANT                                 #
+###############################################################################
+
+def decode_ean13_tolerant(signatures, distance_max=1):
+    """
+    Decode un lot de signatures par motif le plus proche (distance de Hamming).
+
+    Parametres:
+        signatures (array-like): Matrice (N, 95) de bits, chacune lue dans un
+            sens ou dans l'autre.
+        distance_max (int): Nombre maximal de modules faux par groupe de 7
+            (et dans l'ensemble des gardes).
+
+    Retourne:
+        tuple:
+            - codes (list): Code EAN-13 (str) de chaque signature, ou None.
+            - confiances (numpy.ndarray): Confiance (N,) dans [0, 1], celle
+              du chiffre le moins sur (0 si la signature est rejetee).
+            - marges (numpy.ndarray): Ecart (N, 13) entre la distance du
+              deuxieme meilleur chiffre et celle du chiffre retenu.
+            - statuts (numpy.ndarray): Statuts (N,), comme decode_ean13_lot.
+
+    Remarque:
+        - Chaque groupe est compare aux 10 motifs par consultation des
+          tables de distances (128 x 10). A gauche, la parite n'est pas
+          choisie groupe par groupe (L et G sont parfois a 1 module l'un de
+          l'autre) : chaque premier chiffre fixe le motif de parite des 6
+          groupes et forme une hypothese.
+        - Chaque module etant faux avec la probabilite PROBA_ERREUR_MODULE,
+          la probabilite a posteriori de chaque chiffre est sommee sur tous
+          les codes dont la cle est juste (passes avant et arriere sur la
+          somme de controle partielle modulo 10). Le chiffre retenu a chaque
+          position est le plus probable : la cle peut departager deux motifs
+          a egalite, mais ce choix se paie dans la confiance, et aucune
+          lecture dont la cle est fausse n'est renvoyee.
+        - Une lecture sans aucun module faux (celle de decode_ean13_lot) a
+          une confiance de 1 : elle reste acceptee quel que soit le seuil.
+    """
+    signatures = np.asarray(signatures, dtype=np.uint8).reshape(-1, 95)
+    n = len(signatures)
+    inverses = sens_inverse(signatures)
+    if inverses.any():
+        signatures = signatures.copy()
+        signatures[inverses] = signatures[inverses, ::-1]
+
+    # Distances des gardes et de chaque groupe a chaque motif
+    distance_gardes = np.zeros(n, dtype=int)
+    for position, motif, _ in GARDES:
+        distance_gardes += (signatures[:, position] != motif).sum(axis=1)
+    gauche, droite = _groupes(signatures)
+    d_L, d_G, d_R = DISTANCES_L[gauche], DISTANCES_G[gauche], DISTANCES_R[droite]
+
+    # Une hypothese par premier chiffre : il fixe la parite des 6 groupes de
+    # gauche, d'ou les distances (N, 10, 12, 10) des 12 autres positions
+    d_gauche = np.where(MOTIFS_PARITE[None, :, :, None], d_G[:, None], d_L[:, None])
+    distances = np.concatenate((d_gauche, np.broadcast_to(d_R[:, None], d_gauche.shape)),
+                               axis=2).astype(int)
+    vraisemblances = (PROBA_ERREUR_MODULE / (1 - PROBA_ERREUR_MODULE)) ** distances
+
+    # Passes avant et arriere sur la somme de controle partielle (N, 10, 10) :
+    # le chiffre c en position k la fait passer de m a m + poids * c
+    sommes = np.arange(10)
+    avant = [np.broadcast_to((sommes == sommes[:, None]).astype(float), (n, 10, 10))]
+    for k in range(12):
+        origines = (sommes[None, :] - POIDS_CLE[k + 1] * sommes[:, None]) % 10      # (chiffre, somme)
+        avant.append((avant[k][..., origines] * vraisemblances[:, :, k, :, None]).sum(axis=2))
+    apres = np.broadcast_to((sommes == 0).astype(float), (n, 10, 10))
+    marginales = np.empty((n, 10, 12, 10))
+    for k in range(11, -1, -1):
+        destinations = (sommes[None, :] + POIDS_CLE[k + 1] * sommes[:, None]) % 10  # (chiffre, somme)
+        chemins = apres[..., destinations] * vraisemblances[:, :, k, :, None]
+        marginales[:, :, k] = (avant[k][:, :, None, :] * chemins).sum(axis=3)
+        apres = chemins.sum(axis=2)
+
+    # Premier chiffre le plus probable, puis chiffre le plus probable a
+    # chaque position ; confiance : probabilite jointe du premier chiffre et
+    # du chiffre le moins sur
+    totaux = avant[12][:, :, 0]
+    premier = totaux.argmax(axis=1)
+    lignes = np.arange(n)
+    probabilites = marginales[lignes, premier] / np.maximum(totaux.sum(axis=1), 1e-300)[:, None, None]
+    chiffres = probabilites.argmax(axis=2)
+    confiances = np.take_along_axis(probabilites, chiffres[..., None], axis=2)[..., 0].min(axis=1)
+
+    # Marges : ecart au deuxieme candidat (premier chiffre : deuxieme
+    # hypothese, de cout la somme des distances minimales)
+    couts = distances.min(axis=3).sum(axis=2)
+    ecarts_couts = np.where(sommes == premier[:, None], np.iinfo(int).max,
+                            couts - couts[lignes, premier][:, None])
+    distances = distances[lignes, premier]
+    retenues = np.take_along_axis(distances, chiffres[..., None], axis=2)[..., 0]
+    autres = np.where(sommes == chiffres[..., None], np.iinfo(int).max, distances)
+    marges = np.concatenate((ecarts_couts.min(axis=1)[:, None], autres.min(axis=2) - retenues), axis=1)
+    chiffres = np.concatenate((premier[:, None], chiffres), axis=1)
+
+    # Statut : premiere verification en echec, dans l'ordre du decodage
+    statuts = np.full(n, DECODAGE_OK, dtype=np.int8)
+    statuts[(cle_controle(chiffres) != chiffres[:, 12]) | (retenues > distance_max).any(axis=1)] = ERREUR_CLE
+    statuts[(distances.min(axis=2) > distance_max).any(axis=1)] = ERREUR_MOTIF
+    statuts[distance_gardes > distance_max] = ERREUR_GARDE
+
+    # Lecture exacte (celle de decode_ean13_lot) : toujours acceptee
+    valides = statuts == DECODAGE_OK
+    confiances[valides & (distance_gardes == 0) & (retenues == 0).all(axis=1)] = 1.0
+    confiances[~valides] = 0.0
+    codes = [None] * n
+    textes = (chiffres[valides].astype(np.uint8) + ord('0')).view('S13').ravel()
+    for i, texte in zip(np.flatnonzero(valides), textes):
+        codes[i] = texte.decode()
+    return codes, confiances, marges, statuts
+
+
+###############################################################################
+#                      DECODAGE SOUPLE (PROFILS D'INTENSITE)                  #
+###############################################################################
+
+# Echantillons par module des profils d'intensite, et decalage maximal (en
+# modules) des chiffres par rapport a leur position nominale
+ECHANTILLONS_MODULE = 4
+DECALAGE_MAX = 2
+
+# Correlation moyenne minimale, par echantillon, des gardes et du code retenu
+# avec leurs gabarits (profil normalise : +1 barre, -1 espace)
+CORRELATION_MIN = 0.1
+
+# Variance minimale du bruit d'un profil normalise, pour la confiance
+VARIANCE_MIN = 0.05
+
+# Confiance minimale d'une lecture sur profil acceptee : plus stricte que
+# CONFIANCE_MIN, les gardes n'etant pas verifiees module par module
+CONFIANCE_MIN_PROFIL = 0.9
+
+
+def _gabarits(motifs, echantillons):
+    """Gabarits (..., 7 * echantillons) de motifs binaires, en +1 (barre) / -1 (espace)."""
+    bits = np.array([[int(b) for b in motif] for motif in motifs], dtype=float)
+    return np.repeat(2 * bits - 1, echantillons, axis=-1)
+
+
+def _relacher(messages):
+    """Maximum sur les decalages voisins (-1, 0, +1 echantillon), axe 2."""
+    relaches = messages.copy()
+    np.maximum(relaches[:, :, 1:], messages[:, :, :-1], out=relaches[:, :, 1:])
+    np.maximum(relaches[:, :, :-1], messages[:, :, 1:], out=relaches[:, :, :-1])
+    return relaches
+
+
+def _correlations(profils, debuts, gabarits):
+    """Correlation des fenetres commencant en `debuts` (K, O) avec des gabarits (..., W)."""
+    largeur = gabarits.shape[-1]
+    fenetres = np.lib.stride_tricks.sliding_window_view(profils, largeur, axis=1)
+    return np.einsum('nkow,...w->nko...', fenetres[:, debuts], gabarits)
+
+
+def _scores_profils(profils, echantillons, decalage_max):
+    """
+    Correlations des chiffres et des gardes avec leurs gabarits, a chaque decalage.
+
+    Retourne:
+        tuple: (scores (N, 10, 12, O, 10) par premier chiffre, position,
+        decalage et chiffre ; correlation moyenne des gardes (N,)).
+    """
+    S = echantillons
+    D = decalage_max * S
+    etendus = np.pad(profils, ((0, 0), (D, D)))
+    decalages = np.arange(2 * D + 1)
+
+    # Gardes : meilleure correlation de chacune sur les decalages
+    gardes = 0.0
+    for position, motif, _ in GARDES:
+        gabarit = np.repeat(2 * np.asarray(motif, dtype=float) - 1, S)
+        debuts = np.array([[position.start * S]]) + decalages
+        gardes = gardes + _correlations(etendus, debuts, gabarit)[:, 0].max(axis=1)
+
+    # Les 30 gabarits en un produit ; a gauche, L ou G selon le premier chiffre
+    nominaux = np.concatenate((3 + 7 * np.arange(6), 50 + 7 * np.arange(6))) * S
+    gabarits = np.stack([_gabarits(code, S) for code in (CODE_L, CODE_G, CODE_R)])
+    correlations = _correlations(etendus, nominaux[:, None] + decalages, gabarits).astype(np.float32)
+    gauche = np.where(MOTIFS_PARITE[None, :, :, None, None],
+                      correlations[:, None, :6, :, 1], correlations[:, None, :6, :, 0])
+    droite = np.broadcast_to(correlations[:, None, 6:, :, 2], gauche.shape)
+    return np.concatenate((gauche, droite), axis=2), gardes / (11 * S)
+
+
+def _max_marginales(scores):
+    """
+    Max-marginales des codes a cle juste, par programmation dynamique.
+
+    Parametres:
+        scores (numpy.ndarray): Scores (N, 10, 12, O, 10) de _scores_profils.
+
+    Retourne:
+        numpy.ndarray: Max-marginales (N, 10, 12, 10) : score du meilleur code
+        de cle juste ayant ce premier chiffre et ce chiffre a cette position.
+
+    Remarque:
+        - Les messages (N, premier chiffre, decalage, somme) portent le
+          decalage du dernier chiffre place, qui varie d'au plus un
+          echantillon d'un chiffre au suivant, et la somme de controle
+          partielle modulo 10 ; le chiffre c en position k la fait passer
+          de m a m + poids * c.
+    """
+    n, _, _, n_decalages, _ = scores.shape
+    sommes = np.arange(10)
+    forme = (n, 10, n_decalages, 10)
+
+    # Passe avant : la somme part du premier chiffre (poids 1)
+    avant = [np.broadcast_to(np.where(sommes == sommes[:, None], 0, -np.inf)
+                             .astype(np.float32)[None, :, None, :], forme)]
+    for k in range(12):
+        avant[k] = _relacher(avant[k])
+        suivant = np.full(forme, -np.inf, dtype=np.float32)
+        for chiffre in range(10):
+            decale = np.roll(avant[k], POIDS_CLE[k + 1] * chiffre % 10, axis=3)
+            decale += scores[:, :, k, :, chiffre, None]
+            np.maximum(suivant, decale, out=suivant)
+        avant.append(suivant)
+
+    # Passe arriere : la somme doit finir a 0
+    apres = np.broadcast_to(np.where(sommes == 0, 0, -np.inf).astype(np.float32), forme)
+    marginales = np.empty((n, 10, 12, 10), dtype=np.float32)
+    for k in range(11, -1, -1):
+        precedent = np.full(forme, -np.inf, dtype=np.float32)
+        for chiffre in range(10):
+            chemin = np.roll(apres, -(POIDS_CLE[k + 1] * chiffre % 10), axis=3)
+            chemin += scores[:, :, k, :, chiffre, None]
+            np.maximum(precedent, chemin, out=precedent)
+            chemin += avant[k]
+            marginales[:, :, k, chiffre] = chemin.reshape(n, 10, -1).max(axis=2)
+        apres = _relacher(precedent)
+    return marginales
+
+
+def decode_ean13_profils(profils, echantillons=ECHANTILLONS_MODULE, decalage_max=DECALAGE_MAX):
+    """
+    Decode des profils d'intensite sans seuillage, par correlation avec les motifs.
+
+    Parametres:
+        profils (array-like): Matrice (N, 95 * echantillons) de profils
+            normalises (+1 au niveau des barres, -1 a celui des espaces, voir
+            fonctions.profils_multiple), lus dans un sens ou dans l'autre.
+        echantillons (int): Echantillons par module.
+        decalage_max (int): Decalage maximal d'un chiffre par rapport a sa
+            position nominale, en modules.
+
+    Retourne:
+        tuple:
+            - codes (list): Code EAN-13 (str) de chaque profil, ou None.
+            - confiances (numpy.ndarray): Confiance (N,) dans [0, 1], celle
+              du chiffre le moins sur (0 si le profil est rejete).
+            - statuts (numpy.ndarray): Statuts (N,), comme decode_ean13_lot.
+
+    Remarque:
+        - Chaque chiffre est correle, a chaque decalage, avec les gabarits
+          des 30 motifs (10 chiffres, codes L, G et R) en un seul produit.
+        - Les limites des chiffres ne sont pas fixees : une programmation
+          dynamique (voir _max_marginales) choisit les decalages, ce qui
+          absorbe une erreur d'echelle ou de bord de la zone utile, et les
+          chiffres du code de score maximal dont la cle est juste.
+        - Le sens retenu est celui ou les meilleurs motifs de chaque position
+          correlent le mieux (a l'envers, les motifs L de droite ne sont pas
+          reconnus) ; seul ce sens est decode.
+        - La confiance d'un chiffre est sa probabilite a posteriori, tiree des
+          max-marginales et de la variance du bruit estimee sur le residu ;
+          les echantillons d'un meme module comptent pour une observation.
+    """
+    profils = np.atleast_2d(np.asarray(profils, dtype=float))
+    n, S = len(profils), echantillons
+    lignes = np.arange(n)
+
+    # Sens de lecture : meilleure somme des correlations chiffre par chiffre
+    scores, gardes = _scores_profils(np.concatenate((profils, profils[:, ::-1])), S, decalage_max)
+    gloutons = scores.max(axis=(3, 4)).sum(axis=2).max(axis=1)
+    retenus = np.where(gloutons[n:] > gloutons[:n], lignes + n, lignes)
+    scores, gardes = scores[retenus], gardes[retenus]
+    profils = np.where((retenus >= n)[:, None], profils[:, ::-1], profils)
+
+    # Premier chiffre, puis chiffre de max-marginale maximale a chaque position
+    marginales = _max_marginales(scores)
+    par_premier = marginales[:, :, 0].max(axis=2)
+    premier = par_premier.argmax(axis=1)
+    marginales = np.concatenate((par_premier[:, None], marginales[lignes, premier]), axis=1)
+    chiffres = marginales.argmax(axis=2)
+    score = par_premier.max(axis=1)
+
+    # Bruit : residu du code retenu, somme (x - t)^2 = somme x^2 - 2 score + somme t^2
+    energie = (profils[:, 3 * S:45 * S] ** 2).sum(axis=1) + (profils[:, 50 * S:92 * S] ** 2).sum(axis=1)
+    variances = np.maximum((energie - 2 * score + 84 * S) / (84 * S), VARIANCE_MIN)
+
+    # Probabilite a posteriori du chiffre retenu a chaque position
+    ecarts = (marginales - marginales.max(axis=2, keepdims=True)) / (S * variances[:, None, None])
+    confiances = (1 / np.exp(ecarts).sum(axis=2)).min(axis=1)
+
+    # Statut ; la cle ne peut etre fausse que par egalite entre deux codes
+    statuts = np.full(n, DECODAGE_OK, dtype=np.int8)
+    statuts[cle_controle(chiffres) != chiffres[:, 12]] = ERREUR_CLE
+    statuts[score / (84 * S) < CORRELATION_MIN] = ERREUR_MOTIF
+    statuts[gardes < CORRELATION_MIN] = ERREUR_GARDE
+
+    valides = statuts == DECODAGE_OK
+    confiances[~valides] = 0.0
+    codes = [None] * n
+    textes = (chiffres[valides].astype(np.uint8) + ord('0')).view('S13').ravel()
+    for i, texte in zip(np.flatnonzero(valides), textes):
+        codes[i] = texte.decode()
+    return codes, confiances, statuts
+
+
+###############################################################################
+#                         CONSENSUS MULTI-RAYONS                              #
+###############################################################################
+
+class ConsensusEAN13:
+    """
+    Vote par chiffre sur les signatures de plusieurs rayons d'un meme code.
+
+    Chaque groupe de 7 modules reconnu vote pour un chiffre (et, a gauche,
+    pour sa parite L ou G) a sa position ; les groupes illisibles ne votent
+    pas. Un rayon abime contribue donc par ses chiffres intacts, et deux
+    moities lues sur des rayons differents se completent.
+
+    Parametres:
+        votes_min (int): Votes minimaux du chiffre retenu a chaque position ;
+            2 evite qu'un seul groupe abime, tombe sur un autre motif valide,
+            ne decide d'une position.
+
+    Remarque:
+        - Le sens de chaque signature est choisi comme dans sens_inverse ;
+          une signature sans sens prefere ne vote pas.
+        - Le code n'est emis que si le chiffre retenu a chaque position l'est
+          sans egalite, que la parite donne un premier chiffre et que la cle
+          de controle est verifiee.
+    """
+
+    def __init__(self, votes_min=2):
+        self.votes_min = votes_min
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """Oublie les votes accumules."""
+        self.votes_gauche = np.zeros((6, 2, 10), dtype=np.int32)   # position, L/G, chiffre
+        self.votes_droite = np.zeros((6, 10), dtype=np.int32)
+        self.n_signatures = 0
+
+    def ajouter(self, signatures, valides=None):
+        """
+        Ajoute les votes d'un lot de signatures.
+
+        Parametres:
+            signatures (array-like): Matrice (N, 95) de bits, dans l'un ou
+                l'autre sens de lecture.
+            valides (array-like): Masque (N,) des signatures a prendre en compte.
+
+        Retourne:
+            str ou None: Code EAN-13 du consensus (voir code).
+        """
+        signatures = np.asarray(signatures, dtype=np.uint8).reshape(-1, 95)
+        if valides is not None:
+            signatures = signatures[np.asarray(valides, dtype=bool)]
+        if len(signatures) == 0:
+            return self.code
+
+        # Sens de lecture de chaque signature
+        endroit, envers = _motifs_valides(signatures), _motifs_valides(signatures[:, ::-1])
+        signatures = np.concatenate((signatures[endroit > envers],
+                                     signatures[envers > endroit, ::-1]))
+        self.n_signatures += len(signatures)
+        gauche, droite = _groupes(signatures)
+
+        # Votes de la partie gauche : parite L (0) ou G (1) et chiffre
+        position = np.broadcast_to(np.arange(6), gauche.shape)
+        for parite, table in enumerate((TABLE_L, TABLE_G)):
+            chiffres = table[gauche]
+            lus = chiffres >= 0
+            np.add.at(self.votes_gauche, (position[lus], parite, chiffres[lus]), 1)
+
+        # Votes de la partie droite
+        chiffres = TABLE_R[droite]
+        lus = chiffres >= 0
+        np.add.at(self.votes_droite, (position[lus], chiffres[lus]), 1)
+        return self.code
+
+    @staticmethod
+    def _gagnants(votes):
+        """Indice du maximum par position, et validite (pas d'egalite) ; votes (6, K)."""
+        ordonnes = np.sort(votes, axis=1)
+        return votes.argmax(axis=1), ordonnes[:, -1], ordonnes[:, -1] > ordonnes[:, -2]
+
+    @property
+    def code(self):
+        """Code EAN-13 du vote majoritaire, ou None s'il n'est pas encore sur."""
+        gauche, votes_g, nets_g = self._gagnants(self.votes_gauche.reshape(6, 20))
+        droite, votes_d, nets_d = self._gagnants(self.votes_droite)
+        if not (nets_g.all() and nets_d.all()):
+            return None
+        if min(votes_g.min(), votes_d.min()) < self.votes_min:
+            return None
+
+        premier = TABLE_PARITE[(gauche // 10) @ POIDS_6]
+        if premier < 0:
+            return None
+        chiffres = np.concatenate(([premier], gauche % 10, droite))
+        if cle_controle(chiffres) != chiffres[12]:
+            return None
+        return ''.join(map(str, chiffres))
+
+    @property
+    def confiance(self):
+        """Part des votes obtenue par le chiffre retenu, a chaque position (12,)."""
+        gauche, droite = self.votes_gauche.reshape(6, 20), self.votes_droite
+        totaux = np.concatenate((gauche.sum(axis=1), droite.sum(axis=1)))
+        maxima = np.concatenate((gauche.max(axis=1), droite.max(axis=1)))
+        return maxima / np.maximum(totaux, 1)
+
+
+###############################################################################
+#                               ENCODAGE                                      #
+###############################################################################
+
+def encode_ean13(code):
+    """
+    Signature binaire de 95 modules d'un code EAN-13 (inverse du decodage).
+
+    Parametres:
+        code (str): 13 chiffres, ou 12 chiffres (la cle de controle est alors
+            calculee).
+
+    Retourne:
+        numpy.ndarray: Signature (95,) en uint8, 1 pour un module noir.
+    """
+    chiffres = [int(c) for c in code]
+    if len(chiffres) == 12:
+        chiffres.append(int(cle_controle(chiffres)))
+    if len(chiffres) != 13:
+        raise ValueError("Un code EAN-13 contient 12 ou 13 chiffres.")
+    if cle_controle(chiffres) != chiffres[12]:
+        raise ValueError(f"Cle de controle invalide pour {code}.")
+
+    parite = PARITES[chiffres[0]]
+    motifs = ['101']
+    motifs += [(CODE_L if p == 'L' else CODE_G)[c] for p, c in zip(parite, chiffres[1:7])]
+    motifs.append('01010')
+    motifs += [CODE_R[c] for c in chiffres[7:]]
+    motifs.append('101')
+    return np.frombuffer(''.join(motifs).encode(), dtype=np.uint8) - ord('0')
 
-    return code_barres
 
 # Exemple d'utilisation
 if __name__ == "__main__":
@@ -9,39 +9,14 @@ Created on Fri Dec 13 09:55:00 2024
 import cv2
 import numpy as np
 
+from seuillage import seuil_otsu
+
 def otsu_threshold(signal):
     """
     Calcule le seuil d'Otsu à partir d'un tableau 1D (signal).
-    Retourne le seuil calculé.
+    Retourne le seuil calculé (borne inférieure entière de la classe retenue).
     """
-    hist, bins = np.histogram(signal, bins=256, range=(0, 256))
-    total_pixels = signal.size
-    sum_total = sum(i * h for i, h in enumerate(hist))
-
-    max_criteria = -1
-    threshold = 0
-
-    w_b = 0
-    sum_b = 0
-
-    for k in range(256):
-        w_b += hist[k]
-        if w_b == 0:
-            continue
-        w_f = total_pixels - w_b
-        if w_f == 0:
-            break
-
-        sum_b += k * hist[k]
-        m_b = sum_b / w_b if w_b != 0 else 0
-        m_f = (sum_total - sum_b) / w_f if w_f != 0 else 0
-
-        criteria = w_b * w_f * (m_b - m_f) ** 2
-        if criteria > max_criteria:
-            max_criteria = criteria
-            threshold = k
-
-    return threshold
+    return int(seuil_otsu(signal, plage=(0, 256)))
 
 def extract(cv_image, p1, p2):
     """
@@ -21,6 +21,9 @@ from tkinter import messagebox
 from PIL import Image, ImageTk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
+from seuillage import seuil_otsu
+from instrumentation import journal
+
 def cv2_to_imageTk(cv2_image):
     if len(cv2_image.shape) == 2:  # grayscale
         cv2_image_rgb = cv2.cvtColor(cv2_image, cv2.COLOR_GRAY2RGB)
@@ -78,7 +81,7 @@ class ImageApp(tk.Tk):
         p1, p2 = self.points
         # 1. Calculer la longueur du rayon
         longueur_rayon = np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-        print(f"Longueur du rayon: {longueur_rayon:.2f} pixels")
+        journal(f"Longueur du rayon: {longueur_rayon:.2f} pixels")
 
         # 2. Extraire la première signature
         nb_points = max(int(longueur_rayon), 95)
@@ -87,35 +90,11 @@ class ImageApp(tk.Tk):
         y = np.array([p1[1] + (p2[1] - p1[1])*t_i for t_i in t], dtype=np.float32)
         signature = cv2.remap(self.cv_image, x.reshape(-1,1), y.reshape(-1,1), cv2.INTER_LINEAR)[:, 0]
 
-        # 3. Calculer et appliquer le seuil d'Otsu
-        hist, bins = np.histogram(signature, bins=256, range=(0, 256))
-        total_pixels = signature.size
-        sum_total = sum(i * h for i, h in enumerate(hist))
-
-        max_criteria = -1
-        threshold = 0
-        criteria_values = []  # Pour stocker les valeurs du critère
-
-        for k in range(256):
-            w_b = sum(hist[:k])
-            w_f = total_pixels - w_b
-
-            if w_b == 0 or w_f == 0:
-                criteria_values.append(0)
-                continue
-
-            sum_b = sum(i * hist[i] for i in range(k))
-            m_b = sum_b / w_b if w_b != 0 else 0
-            m_f = (sum_total - sum_b) / w_f if w_f != 0 else 0
-
-            criteria = w_b * w_f * (m_b - m_f) ** 2
-            criteria_values.append(criteria)
-
-            if criteria > max_criteria:
-                max_criteria = criteria
-                threshold = k
+        # 3. Calculer et appliquer le seuil d'Otsu (critere conserve pour l'affichage)
+        threshold, criteria_values = seuil_otsu(signature, plage=(0, 256), critere=True)
+        threshold = int(threshold)
 
-        print(f"Seuil d'Otsu calcule : {threshold}")
+        journal(f"Seuil d'Otsu calcule : {threshold}")
 
         # 4. Binariser la première signature
         binary_signature = (signature > threshold).astype(np.uint8)
@@ -125,7 +104,7 @@ class ImageApp(tk.Tk):
         if len(non_zero) > 0:
             start_idx = non_zero[0]
             end_idx = non_zero[-1]
-            print(f"Limites utiles : {start_idx} à {end_idx}")
+            journal(f"Limites utiles : {start_idx} à {end_idx}")
 
             # 6. Calculer les coordonnees des points du rayon utile
             t_start = start_idx / nb_points
@@ -144,7 +123,7 @@ class ImageApp(tk.Tk):
             useful_length = np.sqrt((useful_p2[0] - useful_p1[0])**2 +
                                     (useful_p2[1] - useful_p1[1])**2)
             u = max(1, int(useful_length / 95))
-            print(f"Unite de base u calculee : {u}")
+            journal(f"Unite de base u calculee : {u}")
 
             # 8. Extraire la nouvelle signature le long du rayon utile
             nb_points_final = 95 * u
@@ -159,8 +138,8 @@ class ImageApp(tk.Tk):
             # Affichage des resultats
             self.display_plots(signature, binary_signature, final_signature, final_binary_signature, nb_points_final, criteria_values)
             len_sin=len(final_binary_signature)
-            print(f"Taille signature : {len_sin}")
-            print(final_binary_signature)
+            journal(f"Taille signature : {len_sin}")
+            journal(final_binary_signature)
 
             # Afficher l'image avec les rayons
             cv2.line(self.cv_image_color, p1, p2, (0, 255, 0), 1)  # Rayon initial en vert
@@ -173,7 +152,7 @@ class ImageApp(tk.Tk):
             self.canvas.itemconfig(self.canvas_image, image=self.photo_image)
             self.status_label.config(text="Traitement termine.")
         else:
-            print("Aucune region utile trouvee dans la signature")
+            journal("Aucune region utile trouvee dans la signature")
             messagebox.showinfo("Information", "Aucune region utile trouvee dans la signature")
             self.status_label.config(text="Aucune region utile trouvee dans la signature.")
 
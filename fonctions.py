@@ -17,80 +17,551 @@ Diverses Fonctions
 # Modules standards
 import os
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Modules scientifiques
+# Modules scientifiques (skimage.io, skimage.color et skimage.morphology,
+# longs a importer, sont charges par les fonctions qui les utilisent)
 import numpy as np
-from scipy.signal import convolve2d
-from skimage import color, io
-from skimage.morphology import closing, opening, square
+from skimage import img_as_float
 from skimage.measure import label, regionprops
-from skimage.filters import threshold_otsu
+from scipy.ndimage import find_objects, map_coordinates
 
-# Modules pour l'interface graphique
-import tkinter as tk
-from tkinter import messagebox
-from PIL import Image, ImageTk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from scipy.ndimage import map_coordinates
+# Modules du projet
+from filtrage import convolution_gaussienne, reduire_image
+from decodage_signature import (decode_ean13_signature, decode_ean13_tolerant, decode_ean13_profils,
+                                ConsensusEAN13, CONFIANCE_MIN, CONFIANCE_MIN_PROFIL, DECODAGE_OK,
+                                ECHANTILLONS_MODULE)
+from seuillage import seuil_otsu
+from instrumentation import chrono, compter, compter_echec, journal
 
 ###############################################################################
 #                              SEGMENTATION                                   #
 ###############################################################################
 
-def segmentation(image_path):
-    # Chargement de l'image
-    img = io.imread(image_path)
-    if img.shape[-1] == 4:
-        img = img[..., :3]
-    I = color.rgb2gray(img)
+# Cote minimal (en pixels) du niveau le plus reduit de la pyramide
+TAILLE_MIN_PYRAMIDE = 64
 
-    # Parametres
-    sigma_noise = 0.02
-    sigma_G = 1.8
-    sigma_T = 18
-    seuil_coherence = 0.3
+# Rapport longueur / hauteur d'un symbole EAN-13 (37,29 mm x 25,93 mm)
+RAPPORT_EAN13 = 1.44
 
-    # Ajout de bruit
-    bruit = np.random.normal(0, sigma_noise, I.shape)
-    I_bruite = np.clip(I + bruit, 0, 1)
+# Aire minimale d'une region candidate, relative a la plus grande
+AIRE_MIN_RELATIVE = 0.05
 
-    # Calcul des gradients
-    size = int(3 * sigma_G)
-    x, y = np.meshgrid(np.arange(-size, size+1), np.arange(-size, size+1))
+# Memoire de travail par pixel en segmentation (bruit, gradient, norme,
+# tenseur, D1, masque, labels et temporaires des convolutions), en octets
+OCTETS_PAR_PIXEL = 128
 
-    G_x = -(x / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2*sigma_G**2))
-    G_y = -(y / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2*sigma_G**2))
+def charger_image(image_path):
+    """
+    Charge une image et la convertit en niveaux de gris dans [0, 1].
+
+    Parametres:
+        image_path (str): Chemin de l'image.
+
+    Retourne:
+        numpy.ndarray: Image 2D en niveaux de gris (float).
+    """
+    from skimage import color, io
+
+    with chrono('chargement'):
+        img = io.imread(image_path)
+        if img.ndim == 2:
+            return img_as_float(img)
+        if img.shape[-1] == 4:
+            img = img[..., :3]
+        return color.rgb2gray(img)
+
+
+def gradients(I, sigma_noise=0.02, sigma_G=1.8, methode='auto', workers=1):
+    """
+    Calcule le gradient normalise de l'image bruitee.
+
+    Parametres:
+        I (numpy.ndarray): Image en niveaux de gris.
+        sigma_noise, sigma_G, methode, workers: Voir segmentation_image.
+
+    Retourne:
+        tuple: (I_x, I_y), composantes du gradient de norme 1.
+    """
+    with chrono('gradient'):
+        # Ajout de bruit
+        bruit = np.random.normal(0, sigma_noise, I.shape)
+        I_bruite = np.clip(I + bruit, 0, 1)
+
+        # Calcul des gradients (noyaux separables g'(x) g(y) et g(x) g'(y))
+        size = int(3 * sigma_G)
+        I_x = convolution_gaussienne(I_bruite, sigma_G, size, (0, 1), methode, workers)
+        I_y = convolution_gaussienne(I_bruite, sigma_G, size, (1, 0), methode, workers)
+
+        norme = np.sqrt(I_x**2 + I_y**2) + 1e-8
+        I_x /= norme
+        I_y /= norme
+        return I_x, I_y
 
-    I_x = convolve2d(I_bruite, G_x, mode='same', boundary='symm')
-    I_y = convolve2d(I_bruite, G_y, mode='same', boundary='symm')
 
-    norme = np.sqrt(I_x**2 + I_y**2) + 1e-8
-    I_x /= norme
-    I_y /= norme
+def tenseur_structure(I_x, I_y, sigma_T=18, methode='auto', workers=1):
+    """
+    Lisse les produits du gradient pour former le tenseur de structure.
+
+    Parametres:
+        I_x, I_y (numpy.ndarray): Gradient normalise.
+        sigma_T, methode, workers: Voir segmentation_image.
 
-    # Tenseur de structure
+    Retourne:
+        tuple: (T_xx, T_xy, T_yy), composantes du tenseur.
+    """
     size_T = int(2 * sigma_T)
-    G = (1 / (2 * np.pi * sigma_T**2)) * np.exp(-(x**2 + y**2) / (2 * sigma_T**2))
+    with chrono('tenseur'):
+        T_xx = convolution_gaussienne(I_x**2, sigma_T, size_T, methode=methode, workers=workers)
+        T_xy = convolution_gaussienne(I_x * I_y, sigma_T, size_T, methode=methode, workers=workers)
+        T_yy = convolution_gaussienne(I_y**2, sigma_T, size_T, methode=methode, workers=workers)
+    return T_xx, T_xy, T_yy
+
+
+def coherence(T_xx, T_xy, T_yy):
+    """
+    Mesure de coherence D1 : proche de 0 sur les barres paralleles, proche de 1
+    sur les zones isotropes.
+    """
+    return 1 - np.sqrt((T_xx - T_yy)**2 + 4 * (T_xy**2)) / (T_xx + T_yy + 1e-15)
+
+
+def carte_coherence(I, sigma_noise=0.02, sigma_G=1.8, sigma_T=18, methode='auto', workers=1):
+    """
+    Calcule la mesure de coherence D1 du tenseur de structure.
+
+    Parametres:
+        I (numpy.ndarray): Image en niveaux de gris.
+        sigma_noise, sigma_G, sigma_T, methode, workers: Voir segmentation_image.
+
+    Retourne:
+        numpy.ndarray: Carte D1.
+    """
+    I_x, I_y = gradients(I, sigma_noise, sigma_G, methode, workers)
+    return coherence(*tenseur_structure(I_x, I_y, sigma_T, methode, workers))
+
+
+def masque_coherent(D1, seuil_coherence=0.3):
+    """
+    Binarise la carte de coherence et nettoie le masque obtenu.
+
+    Parametres:
+        D1 (numpy.ndarray): Carte de coherence.
+        seuil_coherence (float): Seuil sur D1 (les barres donnent D1 faible).
+
+    Retourne:
+        numpy.ndarray: Masque binaire (0/1) des zones de barres paralleles.
+    """
+    from skimage.morphology import closing, opening, square
+
+    with chrono('masque'):
+        M = (D1 < seuil_coherence).astype(int)
+        M_clean = closing(M, square(3))
+        return opening(M_clean, square(2))
+
+
+def regions_coherentes(D1, seuil_coherence=0.3):
+    """
+    Extrait les composantes connexes des zones de barres paralleles.
+
+    Parametres:
+        D1 (numpy.ndarray): Carte de coherence.
+        seuil_coherence (float): Seuil sur D1.
+
+    Retourne:
+        list: Regions (skimage.measure.regionprops), eventuellement vide.
+    """
+    masque = masque_coherent(D1, seuil_coherence)
+    with chrono('regions'):
+        return regionprops(label(masque))
+
 
-    T_xx = convolve2d(I_x**2, G, mode='same', boundary='symm')
-    T_xy = convolve2d(I_x * I_y, G, mode='same', boundary='symm')
-    T_yy = convolve2d(I_y**2, G, mode='same', boundary='symm')
+def orientation_region(T_xx, T_xy, T_yy, coords):
+    """
+    Orientation dominante du gradient sur une region, d'apres le tenseur de structure.
+
+    Parametres:
+        T_xx, T_xy, T_yy (numpy.ndarray): Composantes du tenseur.
+        coords (numpy.ndarray): Pixels (ligne, colonne) de la region, p. ex.
+            l'attribut coords d'une region de regionprops.
+
+    Retourne:
+        float: Angle (radians, repere image x vers la droite, y vers le bas) de
+        la direction du gradient, c'est-a-dire perpendiculaire aux barres.
+    """
+    rows, cols = coords[:, 0], coords[:, 1]
+    S_xx = T_xx[rows, cols].sum()
+    S_xy = T_xy[rows, cols].sum()
+    S_yy = T_yy[rows, cols].sum()
+    return 0.5 * np.arctan2(2 * S_xy, S_xx - S_yy)
+
+
+def axes_principaux(points):
+    """
+    Analyse en composantes principales d'un nuage de points.
+
+    Parametres:
+        points (array-like): Points (x, y) de forme (N, 2), p. ex. les pixels
+            d'une region (region.coords[:, ::-1]).
+
+    Retourne:
+        tuple: (barycentre, covariance 2x2, u1, u2) ou u1 est l'axe de plus
+        grande variance et u2 l'axe orthogonal, (u1, u2) formant une base directe.
+
+    Remarque:
+        - Le cout est en O(N) sur les seuls pixels de la region, sans grille
+          de coordonnees de la taille de l'image.
+    """
+    points = np.asarray(points, dtype=float)
+    O = points.mean(axis=0)
+    centres = points - O
+    covariance = centres.T @ centres / len(points)
+
+    # Valeurs propres croissantes : le dernier vecteur est l'axe principal
+    _, vecteurs = np.linalg.eigh(covariance)
+    u1 = vecteurs[:, 1]
+    u2 = np.array([-u1[1], u1[0]])
+    return O, covariance, u1, u2
 
-    D1 = 1 - np.sqrt((T_xx - T_yy)**2 + 4 * (T_xy**2)) / (T_xx + T_yy + 1e-15)
 
-    # Segmentation
-    M = (D1 > seuil_coherence).astype(int)
-    M_clean = closing(M, square(3))
-    M_clean = opening(M_clean, square(2))
+def rectangle_oriente(points, orientation=None):
+    """
+    Plus petit rectangle d'axes (u1, u2) contenant un nuage de points.
+
+    Parametres:
+        points (array-like): Points (x, y) de forme (N, 2), p. ex. les coins de
+            la boite englobante ou les pixels de la region.
+        orientation (float): Angle (radians) de l'axe u1, p. ex. la direction de
+            lecture donnee par orientation_region ; None pour l'axe principal
+            du nuage (voir axes_principaux).
 
-    labels = label(M_clean)
-    if labels.max() > 0:
-        regions = regionprops(labels)
-        largest_region = max(regions, key=lambda r: r.area)
-        return largest_region.bbox 
+    Retourne:
+        tuple: Coins (x, y) C1, C2, C3, C4 ; le cote C1 -> C2 suit u1.
+    """
+    points = np.asarray(points, dtype=float)
+    if orientation is None:
+        O, _, u1, u2 = axes_principaux(points)
     else:
+        O = points.mean(axis=0)
+        u1 = np.array([np.cos(orientation), np.sin(orientation)])
+        u2 = np.array([-u1[1], u1[0]])
+
+    # Coordonnees des points dans la base (u1, u2)
+    alpha = (points - O) @ u1
+    beta = (points - O) @ u2
+
+    def corner(a, b):
+        return tuple(O + a * u1 + b * u2)
+
+    return (corner(alpha.min(), beta.min()), corner(alpha.max(), beta.min()),
+            corner(alpha.max(), beta.max()), corner(alpha.min(), beta.max()))
+
+
+def _boite_pyramide(I, niveaux, sigma_noise, sigma_G, sigma_T, seuil_coherence, methode, workers):
+    """Boite englobante grossiere, calculee sur le niveau le plus reduit."""
+    I_reduite = I
+    for _ in range(niveaux):
+        I_reduite = reduire_image(I_reduite)
+
+    echelle = 2 ** niveaux
+    D1 = carte_coherence(I_reduite, sigma_noise,
+                         max(sigma_G / echelle, 0.8), sigma_T / echelle, methode, workers)
+    regions = regions_coherentes(D1, seuil_coherence)
+    if not regions:
+        raise ValueError("Aucune region coherente detectee.")
+
+    min_row, min_col, max_row, max_col = max(regions, key=lambda r: r.area).bbox
+    return min_row * echelle, min_col * echelle, max_row * echelle, max_col * echelle
+
+
+def _halo_tuiles(sigma_G, sigma_T):
+    """Marge d'une tuile : supports du gradient et du tenseur, plus la morphologie."""
+    return int(3 * sigma_G) + int(2 * sigma_T) + 4
+
+
+def _racine(parent, i):
+    """Racine de i dans la foret union-find `parent` (avec compression de chemin)."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _fusionner_couture(parent, bord_a, bord_b):
+    """Unit les labels voisins (8-connexite) de part et d'autre d'une couture."""
+    paires = []
+    for a, b in ((bord_a, bord_b), (bord_a[1:], bord_b[:-1]), (bord_a[:-1], bord_b[1:])):
+        contact = (a > 0) & (b > 0)
+        paires.append(np.column_stack((a[contact], b[contact])))
+    for a, b in np.unique(np.concatenate(paires), axis=0):
+        ra, rb = _racine(parent, a), _racine(parent, b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+
+def _statistiques_labels(labels, n, T, r0, c0):
+    """Aire, boite globale et sommes du tenseur de chaque label d'une tuile, (n, 8)."""
+    if n == 0:
+        return np.zeros((0, 8))
+    indices = labels.ravel()
+    aires = np.bincount(indices, minlength=n + 1)[1:]
+    sommes = [np.bincount(indices, weights=t.ravel(), minlength=n + 1)[1:] for t in T]
+    boites = np.array([(lignes.start + r0, colonnes.start + c0, lignes.stop + r0, colonnes.stop + c0)
+                       for lignes, colonnes in find_objects(labels)])
+    return np.column_stack((aires, boites, *sommes))
+
+
+def _segmentation_tuilee(I, sigma_noise, sigma_G, sigma_T, seuil_coherence, methode, memoire_max,
+                         workers):
+    """
+    Segmentation par tuiles recouvrantes, a memoire bornee.
+
+    Chaque tuile est etendue d'un halo couvrant les supports des filtres, de
+    sorte que D1 et le masque sont identiques au calcul sur l'image entiere
+    dans le coeur de la tuile. Les composantes connexes sont recollees aux
+    coutures par union-find ; seules leurs statistiques (aire, boite, sommes
+    du tenseur) sont conservees, jamais l'image des labels complete.
+
+    Retourne:
+        tuple: (boite, orientation) de la plus grande region.
+    """
+    H, W = I.shape
+    halo = _halo_tuiles(sigma_G, sigma_T)
+    cote = int(np.sqrt(memoire_max / OCTETS_PAR_PIXEL)) - 2 * halo
+    if cote < halo:
+        raise ValueError(f"Budget memoire insuffisant : au moins "
+                         f"{9 * halo**2 * OCTETS_PAR_PIXEL} octets pour sigma_T = {sigma_T}.")
+
+    parent = [0]         # Foret union-find des labels globaux (0 : fond)
+    statistiques = []    # Une ligne par label global, dans l'ordre des labels
+    bas_precedent = None
+    for r0 in range(0, H, cote):
+        r1 = min(r0 + cote, H)
+        haut, bas = np.zeros(W, dtype=int), np.zeros(W, dtype=int)
+        droite_precedente = None
+
+        for c0 in range(0, W, cote):
+            c1 = min(c0 + cote, W)
+            R0, C0 = max(r0 - halo, 0), max(c0 - halo, 0)
+            R1, C1 = min(r1 + halo, H), min(c1 + halo, W)
+
+            # Segmentation de la tuile etendue, puis restriction a son coeur
+            I_x, I_y = gradients(I[R0:R1, C0:C1], sigma_noise, sigma_G, methode, workers)
+            T = tenseur_structure(I_x, I_y, sigma_T, methode, workers)
+            coeur = (slice(r0 - R0, r1 - R0), slice(c0 - C0, c1 - C0))
+            labels = label(masque_coherent(coherence(*T), seuil_coherence)[coeur])
+
+            n = labels.max()
+            decalage = len(parent) - 1
+            parent.extend(range(decalage + 1, decalage + n + 1))
+            statistiques.append(_statistiques_labels(labels, n, [t[coeur] for t in T], r0, c0))
+            labels[labels > 0] += decalage
+
+            # Couture verticale avec la tuile de gauche
+            if droite_precedente is not None:
+                _fusionner_couture(parent, droite_precedente, labels[:, 0])
+            droite_precedente = labels[:, -1]
+            haut[c0:c1], bas[c0:c1] = labels[0], labels[-1]
+
+        # Couture horizontale avec la rangee de tuiles precedente
+        if bas_precedent is not None:
+            _fusionner_couture(parent, bas_precedent, haut)
+        bas_precedent = bas
+
+    statistiques = np.concatenate(statistiques)
+    if len(statistiques) == 0:
         raise ValueError("Aucune region coherente detectee.")
 
+    # Regroupement des labels par composante recollee
+    racines = np.array([_racine(parent, i) for i in range(1, len(parent))])
+    _, composantes = np.unique(racines, return_inverse=True)
+    region = composantes == np.argmax(np.bincount(composantes, weights=statistiques[:, 0]))
+    boites, sommes = statistiques[region, 1:5], statistiques[region, 5:].sum(axis=0)
+
+    bbox = (int(boites[:, 0].min()), int(boites[:, 1].min()),
+            int(boites[:, 2].max()), int(boites[:, 3].max()))
+    S_xx, S_xy, S_yy = sommes
+    return bbox, 0.5 * np.arctan2(2 * S_xy, S_xx - S_yy)
+
+
+def segmentation_image(I, sigma_noise=0.02, sigma_G=1.8, sigma_T=18,
+                       seuil_coherence=0.3, methode='auto', pyramide=0,
+                       orientation=False, memoire_max=None, workers=1,
+                       rectangle=False):
+    """
+    Detecte la region du code-barres par mesure de coherence du tenseur de structure.
+
+    Parametres:
+        I (numpy.ndarray): Image en niveaux de gris (voir charger_image).
+        sigma_noise (float): Ecart-type du bruit ajoute avant le calcul du gradient.
+        sigma_G (float): Ecart-type des derivees de gaussienne (gradient).
+        sigma_T (float): Ecart-type du lissage des composantes du tenseur.
+        seuil_coherence (float): Seuil applique a la coherence D1.
+        methode (str): Methode de convolution (voir filtrage.METHODES).
+        pyramide (int): Nombre de reductions par 2 pour la detection grossiere
+            (0 : segmentation directe en pleine resolution).
+        orientation (bool): Renvoie aussi l'orientation des barres.
+        memoire_max (int): Budget (octets) de la segmentation pleine
+            resolution ; au-dela, l'image est traitee par tuiles (None : sans limite).
+        workers (int): Nombre de threads pour les convolutions (resultat
+            identique au calcul sequentiel, voir filtrage.convolution_gaussienne).
+        rectangle (bool): Renvoie aussi le rectangle oriente C1..C4 de la region.
+
+    Retourne:
+        tuple: Boite englobante (min_row, min_col, max_row, max_col) de la plus
+        grande region coherente ; avec orientation=True et/ou rectangle=True,
+        le tuple (boite[, angle du gradient en radians][, coins C1..C4]).
+
+    Remarque:
+        - En mode pyramide, D1 est d'abord calcule sur l'image reduite (sigmas
+          divises d'autant), puis la boite est affinee en pleine resolution dans
+          la zone candidate elargie d'une marge de 2 * sigma_T * 2**pyramide,
+          doublee tant que la region touche le bord de la zone.
+        - En mode tuiles, le resultat est celui de l'image entiere (a bruit
+          egal : le bruit ajoute est tire tuile par tuile). Le budget ne
+          compte pas l'image d'entree elle-meme.
+        - Le rectangle est calcule sur les seuls pixels de la region, d'axe u1
+          la direction de lecture ; en mode tuiles, ou les pixels ne sont pas
+          conserves, il entoure la boite englobante.
+    """
+    # Pas de reduction en dessous de TAILLE_MIN_PYRAMIDE pixels de cote
+    while pyramide > 0 and min(I.shape) / 2 ** pyramide < TAILLE_MIN_PYRAMIDE:
+        pyramide -= 1
+
+    if pyramide > 0:
+        boite_grossiere = _boite_pyramide(
+            I, pyramide, sigma_noise, sigma_G, sigma_T, seuil_coherence, methode, workers)
+        marge = int(2 * sigma_T) * 2 ** pyramide
+    else:
+        boite_grossiere, marge = (0, 0) + I.shape, 0
+
+    # La zone candidate est elargie tant que la region en touche un bord
+    # interieur a l'image (boite grossiere sous-estimee)
+    while True:
+        r0, c0 = max(boite_grossiere[0] - marge, 0), max(boite_grossiere[1] - marge, 0)
+        r1 = min(boite_grossiere[2] + marge, I.shape[0])
+        c1 = min(boite_grossiere[3] + marge, I.shape[1])
+        zone = I[r0:r1, c0:c1]
+
+        if memoire_max is not None and zone.size * OCTETS_PAR_PIXEL > memoire_max:
+            (min_row, min_col, max_row, max_col), angle = _segmentation_tuilee(
+                zone, sigma_noise, sigma_G, sigma_T, seuil_coherence, methode, memoire_max, workers)
+            region = None
+        else:
+            I_x, I_y = gradients(zone, sigma_noise, sigma_G, methode, workers)
+            T = tenseur_structure(I_x, I_y, sigma_T, methode, workers)
+            regions = regions_coherentes(coherence(*T), seuil_coherence)
+            if not regions:
+                raise ValueError("Aucune region coherente detectee.")
+            region = max(regions, key=lambda r: r.area)
+            min_row, min_col, max_row, max_col = region.bbox
+
+        bord = ((min_row == 0 and r0 > 0) or (min_col == 0 and c0 > 0)
+                or (max_row == zone.shape[0] and r1 < I.shape[0])
+                or (max_col == zone.shape[1] and c1 < I.shape[1]))
+        if not bord:
+            break
+        marge *= 2
+
+    bbox = (min_row + r0, min_col + c0, max_row + r0, max_col + c0)
+    if region is None:
+        points = [(bbox[1], bbox[0]), (bbox[3], bbox[0]), (bbox[3], bbox[2]), (bbox[1], bbox[2])]
+    else:
+        if not (orientation or rectangle):
+            return bbox
+        angle = orientation_region(*T, region.coords)
+        # Pixels (x, y) de la region, dans le repere de l'image entiere
+        points = region.coords[:, ::-1] + (c0, r0)
+
+    resultat = (bbox,)
+    if orientation:
+        resultat += (angle,)
+    if rectangle:
+        resultat += (rectangle_oriente(points, angle),)
+    return resultat if len(resultat) > 1 else bbox
+
+
+def classer_regions(regions, T_xx, T_xy, T_yy, D1, n_max=None):
+    """
+    Classe les regions candidates par aire, coherence et forme de code-barres.
+
+    Parametres:
+        regions (list): Regions de regionprops (voir regions_coherentes).
+        T_xx, T_xy, T_yy (numpy.ndarray): Composantes du tenseur.
+        D1 (numpy.ndarray): Carte de coherence.
+        n_max (int): Nombre maximal de candidats renvoyes (None : tous).
+
+    Retourne:
+        list: Candidats {bbox, orientation, coins, aire, coherence, rapport,
+        score}, par score decroissant ; coins est le rectangle oriente C1..C4.
+
+    Remarque:
+        - score = aire relative x coherence moyenne (1 - D1) x facteur de
+          forme, ce dernier valant 1 quand le rapport longueur / hauteur du
+          rectangle oriente vaut RAPPORT_EAN13.
+        - Les regions de moins de AIRE_MIN_RELATIVE fois la plus grande sont
+          ecartees.
+    """
+    if not regions:
+        return []
+    aire_max = max(region.area for region in regions)
+
+    candidats = []
+    for region in regions:
+        if region.area < AIRE_MIN_RELATIVE * aire_max:
+            continue
+        rows, cols = region.coords[:, 0], region.coords[:, 1]
+        angle = orientation_region(T_xx, T_xy, T_yy, region.coords)
+        coins = rectangle_oriente(region.coords[:, ::-1], angle)
+
+        longueur = np.hypot(*np.subtract(coins[1], coins[0]))
+        hauteur = np.hypot(*np.subtract(coins[3], coins[0]))
+        rapport = longueur / max(hauteur, 1.0)
+        coherence_moyenne = 1 - D1[rows, cols].mean()
+        forme = np.exp(-0.5 * np.log(rapport / RAPPORT_EAN13)**2)
+
+        candidats.append({'bbox': region.bbox, 'orientation': angle, 'coins': coins,
+                          'aire': int(region.area), 'coherence': float(coherence_moyenne),
+                          'rapport': float(rapport),
+                          'score': float(region.area / aire_max * coherence_moyenne * forme)})
+
+    candidats.sort(key=lambda candidat: candidat['score'], reverse=True)
+    return candidats[:n_max]
+
+
+def segmentation_multiple(I, sigma_noise=0.02, sigma_G=1.8, sigma_T=18,
+                          seuil_coherence=0.3, methode='auto', n_max=8, workers=1):
+    """
+    Detecte toutes les regions candidates de l'image, et non la seule plus grande.
+
+    Parametres:
+        I (numpy.ndarray): Image en niveaux de gris.
+        n_max (int): Nombre maximal de candidats.
+        Autres parametres: voir segmentation_image.
+
+    Retourne:
+        list: Candidats classes (voir classer_regions), eventuellement vide.
+    """
+    I_x, I_y = gradients(I, sigma_noise, sigma_G, methode, workers)
+    T = tenseur_structure(I_x, I_y, sigma_T, methode, workers)
+    D1 = coherence(*T)
+    return classer_regions(regions_coherentes(D1, seuil_coherence), *T, D1, n_max)
+
+
+def segmentation(image_path, **parametres):
+    """
+    Charge l'image puis detecte la region du code-barres (voir segmentation_image).
+
+    Parametres:
+        image_path (str): Chemin de l'image.
+        **parametres: Parametres de segmentation_image.
+
+    Retourne:
+        tuple: Boite englobante (min_row, min_col, max_row, max_col).
+    """
+    return segmentation_image(charger_image(image_path), **parametres)
+
 
 ###############################################################################
 #                          RAYON ALeATOIRE                                    #
@@ -136,12 +607,177 @@ def lancer_aleatoire(C1, C2, C3, C4):
     return (x_start, y_start), (x_end, y_end)
 
 
-        
+def lancer_orientes(C1, C2, C3, C4, orientation, n_rayons=20, jitter=np.radians(3)):
+    """
+    Genere des rayons paralleles, perpendiculaires aux barres, couvrant la zone.
+
+    Parametres:
+        C1, C2, C3, C4 (tuple): Coordonnees des coins de la region (x, y).
+        orientation (float): Direction du gradient en radians (voir
+            orientation_region), c'est-a-dire la direction de lecture.
+        n_rayons (int): Nombre de rayons.
+        jitter (float): Ecart angulaire maximal (radians) tire autour de la
+            direction de lecture.
+
+    Retourne:
+        numpy.ndarray: Extremites des rayons, de forme (n_rayons, 2, 2), au
+        format attendu par extraction_multiple.
+
+    Remarque:
+        - Les rayons sont decales parallelement sur toute la largeur de la zone
+          (sans ses bords) et tries du centre vers l'exterieur.
+        - L'orientation du tenseur n'est definie qu'a pi pres ; le sens de
+          lecture de chaque rayon est reconnu au decodage.
+        - Chaque rayon deborde de 5 % la zone pour inclure les marges claires.
+    """
+    coins = np.array([C1, C2, C3, C4], dtype=float)
+    centre = coins.mean(axis=0)
+    direction = np.array([np.cos(orientation), np.sin(orientation)])
+    normale = np.array([-direction[1], direction[0]])
+
+    # etendue de la zone le long de la direction de lecture et de sa normale
+    demi_longueur = 1.05 * np.abs((coins - centre) @ direction).max()
+    decalages_extremes = (coins - centre) @ normale
+    decalages = np.linspace(decalages_extremes.min(), decalages_extremes.max(), n_rayons + 2)[1:-1]
+    decalages = decalages[np.argsort(np.abs(decalages), kind='stable')]
+
+    angles = orientation + np.random.uniform(-jitter, jitter, n_rayons)
+    directions = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+
+    milieux = centre + decalages[:, None] * normale
+    return np.stack((milieux - demi_longueur * directions,
+                     milieux + demi_longueur * directions), axis=1)
+
+
 ###############################################################################
 #                               EXTRACTION                                    #
 ###############################################################################
 
 
+def _echantillonner_rayons(image, debuts, fins, nb_points):
+    """
+    Interpole l'image le long de N rayons de longueurs differentes en un seul appel.
+
+    Retourne:
+        tuple: (intensites (N, max(nb_points)), masque des echantillons valides).
+    """
+    j = np.arange(nb_points.max())
+    valides = j[None, :] < nb_points[:, None]
+    t = np.minimum(j[None, :] / np.maximum(nb_points - 1, 1)[:, None], 1.0)
+
+    x = debuts[:, 0, None] + (fins[:, 0] - debuts[:, 0])[:, None] * t
+    y = debuts[:, 1, None] + (fins[:, 1] - debuts[:, 1])[:, None] * t
+    intensites = map_coordinates(image, [y, x], order=1, mode='reflect')
+    return intensites, valides
+
+
+def _zones_utiles(image, debuts, fins):
+    """
+    Limites de la zone utile de N rayons (de la premiere a la derniere barre sombre).
+
+    Retourne:
+        tuple: (debuts utiles (N, 2), fins utiles (N, 2), masque (N,) des
+        rayons ou une barre a ete trouvee).
+    """
+    # Echantillonnage initial (un point par pixel, au moins 95), binarise
+    # avec le seuil d'Otsu de chaque ligne
+    longueurs = np.hypot(*(fins - debuts).T).astype(int)
+    nb_points = np.maximum(longueurs, 95)
+    intensites, masque = _echantillonner_rayons(image, debuts, fins, nb_points)
+    seuils = seuil_otsu(intensites, masque)
+    barres = (intensites <= seuils[:, None]) & masque
+
+    valides = barres.any(axis=1)
+    premier = np.argmax(barres, axis=1)
+    dernier = barres.shape[1] - 1 - np.argmax(barres[:, ::-1], axis=1)
+    t_debut = (premier / np.maximum(nb_points - 1, 1))[:, None]
+    t_fin = (dernier / np.maximum(nb_points - 1, 1))[:, None]
+    return debuts + (fins - debuts) * t_debut, debuts + (fins - debuts) * t_fin, valides
+
+
+def extraction_multiple(image, rayons):
+    """
+    Extrait en une passe les signatures binaires de 95 bits le long de N rayons.
+
+    Parametres:
+        image (numpy.ndarray): Image en niveaux de gris.
+        rayons (array-like): Extremites des rayons, de forme (N, 2, 2) :
+            rayons[i] = [(x1, y1), (x2, y2)].
+
+    Retourne:
+        tuple:
+            - signatures (numpy.ndarray): Matrice (N, 95) uint8, 1 = barre sombre.
+            - valides (numpy.ndarray): Masque (N,) des rayons exploitables.
+
+    Remarque:
+        - Les rayons sont echantillonnes dans une matrice completee (padding),
+          chaque ligne etant binarisee avec son propre seuil d'Otsu.
+        - Chaque bit est lu au centre de son module sur la zone utile
+          (de la premiere a la derniere barre sombre du rayon).
+    """
+    rayons = np.asarray(rayons, dtype=float).reshape(-1, 2, 2)
+    n_rayons = len(rayons)
+    signatures = np.zeros((n_rayons, 95), dtype=np.uint8)
+    if n_rayons == 0:
+        return signatures, np.zeros(0, dtype=bool)
+
+    # etapes 1 a 3 : Binarisation d'Otsu et limites utiles de chaque rayon
+    debuts_utiles, fins_utiles, valides = _zones_utiles(image, rayons[:, 0], rayons[:, 1])
+
+    # etape 4 : Reechantillonnage sur 95 * u points, u unite de base par rayon
+    longueurs_utiles = np.hypot(*(fins_utiles - debuts_utiles).T)
+    u = np.maximum(1, (longueurs_utiles / 95).astype(int))
+    intensites, masque = _echantillonner_rayons(image, debuts_utiles, fins_utiles, 95 * u)
+
+    seuils = seuil_otsu(intensites, masque)
+    barres = (intensites <= seuils[:, None]) & masque
+
+    # etape 5 : Lecture d'un bit au centre de chacun des 95 modules
+    centres = np.arange(95)[None, :] * u[:, None] + (u // 2)[:, None]
+    signatures[valides] = np.take_along_axis(barres, centres, axis=1)[valides]
+    return signatures, valides
+
+
+def profils_multiple(image, rayons, echantillons=ECHANTILLONS_MODULE):
+    """
+    Extrait les profils d'intensite normalises de N rayons, sans les binariser.
+
+    Parametres:
+        image (numpy.ndarray): Image en niveaux de gris.
+        rayons (array-like): Extremites des rayons, de forme (N, 2, 2).
+        echantillons (int): Echantillons par module.
+
+    Retourne:
+        tuple:
+            - profils (numpy.ndarray): Matrice (N, 95 * echantillons), +1 au
+              niveau moyen des barres et -1 a celui des espaces.
+            - valides (numpy.ndarray): Masque (N,) des rayons exploitables.
+
+    Remarque:
+        - La zone utile est celle d'extraction_multiple ; les profils sont
+          destines a decode_ean13_profils, qui tolere une erreur de quelques
+          modules sur ses limites.
+    """
+    rayons = np.asarray(rayons, dtype=float).reshape(-1, 2, 2)
+    n_rayons = len(rayons)
+    if n_rayons == 0:
+        return np.zeros((0, 95 * echantillons)), np.zeros(0, dtype=bool)
+
+    debuts_utiles, fins_utiles, valides = _zones_utiles(image, rayons[:, 0], rayons[:, 1])
+    intensites, _ = _echantillonner_rayons(image, debuts_utiles, fins_utiles,
+                                           np.full(n_rayons, 95 * echantillons))
+
+    # Niveaux moyens des barres et des espaces, de part et d'autre du seuil d'Otsu
+    seuils = seuil_otsu(intensites)[:, None]
+    sombres = intensites <= seuils
+    n_sombres = np.maximum(sombres.sum(axis=1, keepdims=True), 1)
+    n_clairs = np.maximum((~sombres).sum(axis=1, keepdims=True), 1)
+    niveau_barres = np.where(sombres, intensites, 0).sum(axis=1, keepdims=True) / n_sombres
+    niveau_espaces = np.where(sombres, 0, intensites).sum(axis=1, keepdims=True) / n_clairs
+    demi_ecarts = np.maximum((niveau_espaces - niveau_barres) / 2, 1e-6)
+    return ((niveau_espaces + niveau_barres) / 2 - intensites) / demi_ecarts, valides
+
+
 def extraction(image, p1, p2):
     """
     Extrait une signature binaire de 95 bits le long d'un rayon defini par deux points.
@@ -152,230 +788,170 @@ def extraction(image, p1, p2):
         - p2 (tuple): Point d'arrivee du rayon (x, y).
 
     Retourne:
-        - signature_95bits (list): Liste de 95 bits representant la signature extraite.
+        - signature_95bits (numpy.ndarray): 95 bits (1 = barre sombre), ou None
+          si aucune barre n'est trouvee sur le rayon.
     """
-
-    # etape 1 : Calcul de la longueur du rayon
     longueur_rayon = int(np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2))
-    print(f"Longueur du rayon: {longueur_rayon} pixels")
-
-    # etape 2 : Extraction initiale de la signature
-    nb_points = max(longueur_rayon, 95)  # Nombre de points a echantillonner
-    t = np.linspace(0, 1, nb_points)    # Parametre d'interpolation
-
-    # Calcul des coordonnees du rayon
-    x = p1[0] + (p2[0] - p1[0]) * t
-    y = p1[1] + (p2[1] - p1[1]) * t
-
-    # Extraction des intensites sur le rayon avec interpolation bilineaire
-    intensities = map_coordinates(image, [y, x], order=1, mode='reflect')
-
-    # etape 3 : Application du seuil d'Otsu
-    threshold = threshold_otsu(intensities)  # Calcul du seuil d'Otsu
-    binary_signature = (intensities > threshold).astype(int)  # Binarisation
-
-    # etape 4 : Trouver les limites utiles
-    non_zero = np.nonzero(binary_signature)[0]
-    if len(non_zero) == 0:
-        print("Aucune region utile trouvee dans la signature.")
-        return None  # Retourne None si aucune donnee utile
-
-    # etape 5 : Reduction aux indices utiles
-    start_idx = non_zero[0]
-    end_idx = non_zero[-1]
-
-    # Coordonnees des points utiles
-    t_start = start_idx / nb_points
-    t_end = end_idx / nb_points
-
-    useful_p1 = (
-        p1[0] + (p2[0] - p1[0]) * t_start,
-        p1[1] + (p2[1] - p1[1]) * t_start
-    )
-    useful_p2 = (
-        p1[0] + (p2[0] - p1[0]) * t_end,
-        p1[1] + (p2[1] - p1[1]) * t_end
-    )
-
-    # etape 6 : Ajustement et extraction finale
-    useful_length = np.sqrt((useful_p2[0] - useful_p1[0])**2 + (useful_p2[1] - useful_p1[1])**2)
-    u = max(1, int(useful_length / 95))  # Calcul de l'unite de base
-    print(f"Unite de base u calculee : {u}")
-
-    # etape 7 : Extraction finale sur 95 * u points
-    nb_points_final = 95 * u
-    t = np.linspace(0, 1, nb_points_final)
-    x = useful_p1[0] + (useful_p2[0] - useful_p1[0]) * t
-    y = useful_p1[1] + (useful_p2[1] - useful_p1[1]) * t
-
-    # Extraction finale avec interpolation
-    final_signature = map_coordinates(image, [y, x], order=1, mode='reflect')
-
-    # Binarisation finale avec Otsu
-    final_threshold = threshold_otsu(final_signature)
-    final_binary_signature = (final_signature > final_threshold).astype(int)
-
-    # etape 8 : Selection des 95 premiers bits
-    if len(final_binary_signature) >= 95:
-        signature_95bits = final_binary_signature[:95]
-        return signature_95bits  # Retourne la signature binaire
-    else:
-        print("La signature extraite est trop courte.")
+    journal(f"Longueur du rayon: {longueur_rayon} pixels")
+
+    with chrono('extraction'):
+        signatures, valides = extraction_multiple(image, [[p1, p2]])
+    compter('rayons')
+    if not valides[0]:
+        journal("Aucune region utile trouvee dans la signature.")
         return None
+    return signatures[0]
 
 
 ###############################################################################
-#                               DeCODAGE                                      #
+#                        BALAYAGE PAR LIGNES PARALLELES                       #
 ###############################################################################
 
-def decode_ean13_signature(binary_signature):
+def ordre_bissection(n):
     """
-    Decoder un code-barres EAN-13 a partir de sa signature binaire.
+    Positions relatives (dans ]0, 1[) de n lignes, dans l'ordre de visite.
+
+    Le centre est visite en premier, puis chaque intervalle restant est coupe
+    en deux : 1/2, 1/4, 3/4, 1/8, 3/8, 5/8, 7/8, ... La couverture de la zone
+    est ainsi la meilleure possible quel que soit le nombre de lignes visitees.
+    """
+    positions = []
+    niveau = 1
+    while len(positions) < n:
+        denominateur = 2 ** niveau
+        positions.extend((2 * j + 1) / denominateur for j in range(2 ** (niveau - 1)))
+        niveau += 1
+    return np.array(positions[:n])
+
+
+def lignes_balayage(C1, C2, C3, C4, n_lignes=16, marge=0.1):
+    """
+    Lignes de balayage paralleles au cote C1 -> C2 d'un rectangle oriente.
 
     Parametres:
-    - binary_signature: liste d'entiers (0 ou 1), representant la signature binaire du code-barres (95 bits)
+        C1, C2, C3, C4 (tuple): Coins (x, y) du rectangle ; C1 -> C2 est la
+            direction de lecture (voir rectangle_oriente).
+        n_lignes (int): Nombre de lignes.
+        marge (float): Prolongement de chaque ligne a ses deux bouts, en
+            fraction de sa longueur, pour inclure les marges claires.
 
     Retourne:
-    - code_barres: chaîne de caracteres representant le code EAN-13 decode
-    """
-    # Verifier la longueur de la signature
-    if len(binary_signature) != 95:
-        raise ValueError("La signature binaire doit contenir exactement 95 bits.")
-
-    # Motifs de garde
-    guard_left = [1, 0, 1]
-    guard_center = [0, 1, 0, 1, 0]
-    guard_right = [1, 0, 1]
-
-    # Verifier les motifs de garde
-    if binary_signature[0:3] != guard_left:
-        raise ValueError("Motif de garde gauche incorrect.")
-    if binary_signature[45:50] != guard_center:
-        raise ValueError("Motif de garde central incorrect.")
-    if binary_signature[92:95] != guard_right:
-        raise ValueError("Motif de garde droit incorrect.")
-
-    # Tables de codage pour les chiffres
-    code_L = {
-        '0001101': '0',
-        '0011001': '1',
-        '0010011': '2',
-        '0111101': '3',
-        '0100011': '4',
-        '0110001': '5',
-        '0101111': '6',
-        '0111011': '7',
-        '0110111': '8',
-        '0001011': '9',
-    }
-
-    code_G = {
-        '0100111': '0',
-        '0110011': '1',
-        '0011011': '2',
-        '0100001': '3',
-        '0011101': '4',
-        '0111001': '5',
-        '0000101': '6',
-        '0010001': '7',
-        '0001001': '8',
-        '0010111': '9',
-    }
-
-    code_R = {
-        '1110010': '0',
-        '1100110': '1',
-        '1101100': '2',
-        '1000010': '3',
-        '1011100': '4',
-        '1001110': '5',
-        '1010000': '6',
-        '1000100': '7',
-        '1001000': '8',
-        '1110100': '9',
-    }
-
-    # Table de parite pour determiner le premier chiffre
-    parity_table = {
-        'LLLLLL': '0',
-        'LLGLGG': '1',
-        'LLGGLG': '2',
-        'LLGGGL': '3',
-        'LGLLGG': '4',
-        'LGGLLG': '5',
-        'LGGGLL': '6',
-        'LGLGLG': '7',
-        'LGLGGL': '8',
-        'LGGLGL': '9',
-    }
-
-    # Decodage des 6 chiffres de gauche
-    left_digits = []
-    parity_pattern = ''
-    for i in range(6):
-        start = 3 + i * 7
-        end = start + 7
-        pattern_bits = binary_signature[start:end]
-        pattern = ''.join(map(str, pattern_bits))
-
-        if pattern in code_L:
-            digit = code_L[pattern]
-            parity_pattern += 'L'
-        elif pattern in code_G:
-            digit = code_G[pattern]
-            parity_pattern += 'G'
-        else:
-            raise ValueError(f"Motif inconnu dans la partie gauche : {pattern}")
-        left_digits.append(digit)
-
-    # Determiner le premier chiffre a partir du motif de parite
-    if parity_pattern in parity_table:
-        first_digit = parity_table[parity_pattern]
-    else:
-        raise ValueError(f"Motif de parite inconnu : {parity_pattern}")
-
-    # Decodage des 6 chiffres de droite
-    right_digits = []
-    for i in range(6):
-        start = 50 + i * 7
-        end = start + 7
-        pattern_bits = binary_signature[start:end]
-        pattern = ''.join(map(str, pattern_bits))
-
-        if pattern in code_R:
-            digit = code_R[pattern]
-        else:
-            raise ValueError(f"Motif inconnu dans la partie droite : {pattern}")
-        right_digits.append(digit)
+        numpy.ndarray: Extremites des lignes, de forme (n_lignes, 2, 2), dans
+        l'ordre de visite de ordre_bissection.
+    """
+    C1, C2, C3, C4 = (np.asarray(C, dtype=float) for C in (C1, C2, C3, C4))
+    t = ordre_bissection(n_lignes)[:, None]
 
-    # Construire le code-barres complet
-    code_barres = first_digit + ''.join(left_digits) + ''.join(right_digits)
+    # Interpolation sur les cotes C1 -> C4 (depart) et C2 -> C3 (arrivee)
+    debuts = C1 * (1 - t) + C4 * t
+    fins = C2 * (1 - t) + C3 * t
+    prolongement = marge * (fins - debuts)
+    return np.stack((debuts - prolongement, fins + prolongement), axis=1)
 
-    # Verifier la cle de contrôle
-    digits = list(map(int, code_barres))
-    if len(digits) != 13:
-        raise ValueError("Le code-barres doit contenir 13 chiffres.")
 
-    # Calcul de la cle de contrôle selon la norme EAN-13
-    # etape 1 : Somme des chiffres en positions paires (2e, 4e, ..., 12e)
-    sum_even = sum(digits[i] for i in range(1, 12, 2))
+def decoder_balayage(image, C1, C2, C3, C4, n_lignes=16, lot=4, echeance=None,
+                     consensus=True, confiance_min=CONFIANCE_MIN, profils=True):
+    """
+    Balaye le rectangle ligne par ligne et s'arrete au premier code valide.
 
-    # etape 2 : Multiplier la somme par 3
-    sum_even *= 3
+    Parametres:
+        image (numpy.ndarray): Image en niveaux de gris.
+        C1, C2, C3, C4 (tuple): Coins du rectangle oriente (voir lignes_balayage).
+        n_lignes (int): Nombre maximal de lignes, qui borne le temps de lecture.
+        lot (int): Nombre de lignes extraites et decodees ensemble.
+        echeance (float): Date limite (time.perf_counter) au-dela de laquelle
+            aucun nouveau lot n'est extrait.
+        consensus (bool): Quand aucune ligne ne se decode seule, vote par
+            chiffre sur toutes les lignes visitees (voir ConsensusEAN13).
+        confiance_min (float): Confiance minimale d'une ligne lue (voir
+            decode_ean13_tolerant).
+        profils (bool): Quand aucune ligne d'un lot ne se decode, decode
+            leurs profils d'intensite sans seuillage (voir decode_ean13_profils).
 
-    # etape 3 : Somme des chiffres en positions impaires (1ere, 3e, ..., 11e)
-    sum_odd = sum(digits[i] for i in range(0, 12, 2))
+    Retourne:
+        tuple: (code_barres ou None, nombre de lignes visitees).
 
-    # etape 4 : Calculer le total
-    total = sum_even + sum_odd
+    Remarque:
+        - Le sens de lecture du rectangle n'est connu qu'a pi pres : le sens
+          de chaque signature est reconnu au decodage (voir decode_ean13_tolerant).
+        - Chaque ligne est decodee par motif le plus proche : quelques
+          modules faux n'empechent pas la lecture si la confiance suffit.
+        - Lignes visitees, rayons extraits, lectures et causes d'echec sont
+          comptes par l'instrumentation (voir instrumentation.bilan).
+    """
+    lignes = lignes_balayage(C1, C2, C3, C4, n_lignes)
+    votes = ConsensusEAN13() if consensus else None
+
+    for debut in range(0, n_lignes, lot):
+        if echeance is not None and time.perf_counter() > echeance:
+            return None, debut
+        with chrono('extraction'):
+            signatures, valides = extraction_multiple(image, lignes[debut:debut + lot])
+        n = len(signatures)
+        with chrono('decodage'):
+            codes, confiances, _, statuts = decode_ean13_tolerant(signatures)
+        compter('rayons', n)
+
+        for i in range(n):
+            if valides[i] and codes[i] is not None and confiances[i] >= confiance_min:
+                compter('tentatives', i + 1)
+                compter('lectures')
+                return codes[i], debut + i + 1
+            if valides[i] and statuts[i] == DECODAGE_OK:
+                compter('echec_confiance')
+            else:
+                compter_echec(valides[i], statuts[i])
+        compter('tentatives', n)
+
+        # Lignes floues ou peu contrastees : decodage des profils non binarises
+        if profils:
+            with chrono('extraction'):
+                intensites, lisibles = profils_multiple(image, lignes[debut:debut + lot])
+            with chrono('decodage'):
+                codes, confiances, _ = decode_ean13_profils(intensites)
+            for i in range(n):
+                if lisibles[i] and codes[i] is not None and confiances[i] >= CONFIANCE_MIN_PROFIL:
+                    compter('lectures')
+                    compter('lectures_profils')
+                    return codes[i], debut + i + 1
+
+        # Lignes abimees : les chiffres intacts de chacune votent
+        if votes is not None and votes.ajouter(signatures, valides) is not None:
+            compter('lectures')
+            compter('lectures_consensus')
+            return votes.code, debut + n
+
+    return None, n_lignes
+
+
+def decoder_regions(image, candidats, n_lignes=16, budget=None, workers=4):
+    """
+    Decode toutes les regions candidates en parallele et fusionne les doublons.
 
-    # etape 5 : Calculer la cle de contrôle
-    check_digit = (10 - (total % 10)) % 10
+    Parametres:
+        image (numpy.ndarray): Image en niveaux de gris.
+        candidats (list): Candidats classes (voir segmentation_multiple).
+        n_lignes (int): Nombre maximal de lignes de balayage par candidat.
+        budget (float): Temps total (s) partage par tous les candidats ;
+            passe ce delai, les balayages en cours s'arretent (None : sans limite).
+        workers (int): Nombre de threads.
 
-    # Verifier si la cle de contrôle est correcte
-    if check_digit != digits[-1]:
-        raise ValueError(f"Cle de contrôle invalide : attendu {check_digit}, obtenu {digits[-1]}")
+    Retourne:
+        list: Un enregistrement {code, bbox, coins, score, lignes} par code
+        distinct, dans l'ordre des candidats ; un code lu dans plusieurs
+        regions est attribue a la mieux classee.
+    """
+    echeance = None if budget is None else time.perf_counter() + budget
 
-    return code_barres
+    def lire(candidat):
+        return decoder_balayage(image, *candidat['coins'], n_lignes, echeance=echeance)
 
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(candidats)))) as pool:
+        lectures = list(pool.map(lire, candidats))
 
+    resultats = {}
+    for candidat, (code, lignes) in zip(candidats, lectures):
+        if code is not None and code not in resultats:
+            resultats[code] = {'code': code, 'bbox': candidat['bbox'], 'coins': candidat['coins'],
+                               'score': candidat['score'], 'lignes': lignes}
+    return list(resultats.values())
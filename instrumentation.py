@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Jan 26 09:47:30 2025
+
+@author: Mehdi
+
+Instrumentation legere de la chaine de lecture
+
+Chronometres par etape, compteurs (tentatives, echecs par cause, rayons
+extraits, lectures reussies) et crochets appeles a chaque evenement. Une
+mesure coute un appel a time.perf_counter et une mise a jour de dict : elle
+reste active en production. Les messages de progression (journal) ne sont
+affiches que si le mode bavard est active (variable d'environnement
+CODEBARRE_BAVARD ou INSTRUMENTATION.bavard = True).
+
+Exemple :
+    from instrumentation import ajouter_crochet, bilan
+    ajouter_crochet(lambda evenement, donnees: print(evenement, donnees))
+    ...
+    print(bilan())
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+###############################################################################
+#                              PARAMETRES                                     #
+###############################################################################
+
+@lru_cache(maxsize=None)
+def causes_echec():
+    """Causes d'echec d'une ligne, indexees par les statuts de decode_ean13_lot."""
+    # Import differe : importer instrumentation ne charge pas NumPy
+    from decodage_signature import ERREUR_GARDE, ERREUR_MOTIF, ERREUR_PARITE, ERREUR_CLE
+    return {ERREUR_GARDE: 'garde', ERREUR_MOTIF: 'motif',
+            ERREUR_PARITE: 'parite', ERREUR_CLE: 'cle'}
+
+###############################################################################
+#                            INSTRUMENTATION                                  #
+###############################################################################
+
+class Instrumentation:
+    """
+    Registre de chronometres, de compteurs et de crochets, partage entre threads.
+
+    Remarque:
+        - Un crochet est une fonction crochet(evenement, donnees) appelee
+          pour chaque evenement : 'etape' {etape, duree}, 'compteur' {nom, n},
+          'journal' {message}, ou tout evenement emis par evenement().
+        - Sans crochet enregistre, aucun dict d'evenement n'est construit.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.crochets = []
+        self.bavard = bool(os.environ.get('CODEBARRE_BAVARD'))
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """Remet a zero les chronometres et les compteurs (pas les crochets)."""
+        with self._verrou:
+            self.temps = {}        # etape -> [duree cumulee (s), nombre d'appels]
+            self.compteurs = {}
+
+    # Crochets -----------------------------------------------------------------
+
+    def ajouter_crochet(self, crochet):
+        """Enregistre un crochet ; le renvoie, pour usage en decorateur."""
+        self.crochets.append(crochet)
+        return crochet
+
+    def retirer_crochet(self, crochet):
+        """Retire un crochet enregistre."""
+        self.crochets.remove(crochet)
+
+    def evenement(self, evenement, **donnees):
+        """Transmet un evenement a tous les crochets."""
+        for crochet in self.crochets:
+            crochet(evenement, donnees)
+
+    # Mesures ------------------------------------------------------------------
+
+    @contextmanager
+    def chrono(self, etape):
+        """Chronometre le bloc `with` et cumule sa duree sous le nom `etape`."""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - debut
+            with self._verrou:
+                cumul = self.temps.setdefault(etape, [0.0, 0])
+                cumul[0] += duree
+                cumul[1] += 1
+            if self.crochets:
+                self.evenement('etape', etape=etape, duree=duree)
+
+    def compter(self, nom, n=1):
+        """Incremente le compteur `nom` de n."""
+        with self._verrou:
+            self.compteurs[nom] = self.compteurs.get(nom, 0) + n
+        if self.crochets:
+            self.evenement('compteur', nom=nom, n=n)
+
+    def compter_echec(self, valide, *statuts):
+        """
+        Compte l'echec de lecture d'une ligne par sa cause.
+
+        Parametres:
+            valide (bool): Une signature a ete extraite de la ligne.
+            *statuts (int): Statuts de decode_ean13_lot (un par decodage
+                tente) ; on retient l'etape la plus avancee.
+        """
+        if not valide:
+            self.compter('echec_sans_signature')
+        else:
+            self.compter('echec_' + causes_echec()[max(statuts)])
+
+    def journal(self, message):
+        """Message de progression, affiche seulement en mode bavard."""
+        if self.bavard:
+            print(message)
+        if self.crochets:
+            self.evenement('journal', message=message)
+
+    def bilan(self):
+        """
+        Etat courant des mesures.
+
+        Retourne:
+            dict: {temps: {etape: {total, appels}}, compteurs: {...},
+            rayons_par_lecture: rayons extraits par lecture reussie (ou None)}.
+        """
+        with self._verrou:
+            compteurs = dict(self.compteurs)
+            temps = {etape: {'total': total, 'appels': appels}
+                     for etape, (total, appels) in self.temps.items()}
+        lectures = compteurs.get('lectures', 0)
+        return {'temps': temps, 'compteurs': compteurs,
+                'rayons_par_lecture': compteurs.get('rayons', 0) / lectures if lectures else None}
+
+
+# Instance du processus et raccourcis
+INSTRUMENTATION = Instrumentation()
+chrono = INSTRUMENTATION.chrono
+compter = INSTRUMENTATION.compter
+compter_echec = INSTRUMENTATION.compter_echec
+journal = INSTRUMENTATION.journal
+ajouter_crochet = INSTRUMENTATION.ajouter_crochet
+retirer_crochet = INSTRUMENTATION.retirer_crochet
+bilan = INSTRUMENTATION.bilan
+reinitialiser = INSTRUMENTATION.reinitialiser
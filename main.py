@@ -13,7 +13,9 @@ main program
 ###############################################################################
 
 import os
-from fonctions import segmentation, lancer_aleatoire, extract_signature, decode_ean13_signature
+from fonctions import decode_ean13_signature
+from instrumentation import journal
+from session import ScanSession
 
 ###############################################################################
 #                               MAIN                                          #
@@ -24,8 +26,9 @@ def main():
     Programme principal :
     1. Charge une image fournie par l'utilisateur.
     2. Effectue la segmentation pour detecter la region d'interet.
-    3. Lance des rayons aleatoires pour extraire des signatures.
-    4. Tente de decoder le code-barres EAN-13 jusqu'a reussir ou atteindre la limite.
+    3. Balaye la region par lignes paralleles, perpendiculaires aux barres.
+    4. Tente de decoder le code-barres EAN-13 ligne par ligne, jusqu'a reussir
+       ou avoir visite toutes les lignes (temps de lecture borne).
     """
     # Demande a l'utilisateur de fournir un chemin d'image valide
     image_path = input("Veuillez entrer le chemin du fichier image : ")
@@ -35,42 +38,39 @@ def main():
 
     # etape 1 : Segmentation pour detecter la region d'interet
     try:
-        min_row, min_col, max_row, max_col = segmentation(image_path)
+        # L'image est chargee une seule fois pour toutes les etapes
+        session = ScanSession(image_path)
+        session.segmenter()
         print("Segmentation reussie. Region detectee.")
     except Exception as e:
         print(f"Erreur lors de la segmentation : {e}")
         return
 
-    # Definir les coins de la region detectee
-    p1 = (min_col, min_row)
-    p2 = (max_col, min_row)
-    p3 = (max_col, max_row)
-    p4 = (min_col, max_row)
-
-    # etape 2 : Recherche d'un code-barres en lancant des rayons aleatoires
-    max_attempts = 20  # Limite d'essais
+    # etape 2 : Recherche d'un code-barres par balayage du rectangle oriente
+    max_attempts = 16  # Nombre de lignes de balayage
     attempt = 0
     code_barres = None
+    lignes = session.lignes_balayage(max_attempts)
 
     while attempt < max_attempts:
-        print(f"Tentative {attempt + 1}/{max_attempts}...")
+        journal(f"Tentative {attempt + 1}/{max_attempts}...")
 
-        # Generer un rayon aleatoire
-        point1, point2 = lancer_aleatoire(p1, p2, p3, p4)
+        # Ligne suivante (centre d'abord, puis par bissection)
+        point1, point2 = lignes[attempt]
 
         # Extraire la signature le long du rayon genere
-        signature_95bits = extract_signature(image_path, point1, point2)
+        signature_95bits = session.extraire(point1, point2)
 
         if signature_95bits is not None:
             try:
-                # Tenter de decoder la signature
+                # Tenter de decoder la signature (le sens de lecture est reconnu)
                 code_barres = decode_ean13_signature(signature_95bits)
-                print(f"Code-barres detecte : {code_barres}")
+                journal(f"Code-barres detecte : {code_barres}")
                 break  # Arreter la boucle si un code valide est trouve
             except ValueError as e:
-                print(f"Erreur de decodage : {e}")
+                journal(f"Erreur de decodage : {e}")
         else:
-            print("Signature non valide ou non extraite correctement.")
+            journal("Signature non valide ou non extraite correctement.")
 
         attempt += 1
 
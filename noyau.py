@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Jan 29 09:21:07 2025
+
+@author: Mehdi
+
+Noyau de lecture sans interface graphique
+
+Point d'entree des outils sans affichage (lots, service, scripts) : il
+expose la chaine de lecture (chargement, segmentation, extraction, decodage)
+sans jamais importer tkinter, PIL.ImageTk ni matplotlib. Importer noyau ne
+coute presque rien : chaque module du projet (et donc NumPy, SciPy ou
+scikit-image) n'est charge qu'au premier acces a l'un de ses noms, et la
+duree de ce chargement est conservee dans TEMPS_IMPORT. batch, service et
+instrumentation n'importent pas NumPy non plus : seuls les processus de
+decodage chargent la pile numerique, pas les processus repartiteurs.
+
+Exemples :
+    import noyau
+    code, lignes = noyau.ScanSession('images/thon.png').decoder()
+
+    python noyau.py                     # cout d'import de chaque module
+    python noyau.py fonctions --json
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+###############################################################################
+#                              PARAMETRES                                     #
+###############################################################################
+
+# Noms exposes, par module du projet qui les definit
+EXPORTS = {
+    'decodage_signature': ('decode_ean13_signature', 'decode_ean13_lot', 'decode_ean13_tolerant',
+                           'decode_ean13_profils', 'encode_ean13', 'cle_controle',
+                           'ConsensusEAN13', 'CONFIANCE_MIN', 'CONFIANCE_MIN_PROFIL'),
+    'filtrage': ('convolution_gaussienne',),
+    'fonctions': ('charger_image', 'carte_coherence', 'segmentation', 'segmentation_image',
+                  'segmentation_multiple', 'lancer_aleatoire', 'lancer_orientes',
+                  'extraction', 'extraction_multiple', 'profils_multiple', 'lignes_balayage',
+                  'decoder_balayage', 'decoder_regions'),
+    'session': ('ScanSession',),
+}
+
+# Modules d'interface qui ne doivent jamais etre importes par le noyau
+MODULES_INTERFACE = ('tkinter', 'PIL.ImageTk', 'matplotlib')
+
+###############################################################################
+#                          CHARGEMENT PARESSEUX                               #
+###############################################################################
+
+_MODULE_DE = {nom: module for module, noms in EXPORTS.items() for nom in noms}
+
+__all__ = sorted(_MODULE_DE)
+
+# Duree (s) du premier chargement de chaque module, declenche par le noyau
+TEMPS_IMPORT = {}
+
+
+def _importer(module):
+    """Importe un module du projet en chronometrant son premier chargement."""
+    if module not in TEMPS_IMPORT:
+        debut = time.perf_counter()
+        importlib.import_module(module)
+        TEMPS_IMPORT[module] = time.perf_counter() - debut
+    return sys.modules[module]
+
+
+def __getattr__(nom):
+    module = _MODULE_DE.get(nom)
+    if module is None:
+        raise AttributeError(f"module 'noyau' has no attribute {nom!r}")
+    valeur = getattr(_importer(module), nom)
+    globals()[nom] = valeur
+    return valeur
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULE_DE))
+
+
+###############################################################################
+#                           MESURE DES IMPORTS                                #
+###############################################################################
+
+def mesurer_import(module, n_dependances=5):
+    """
+    Mesure l'import d'un module dans un interpreteur neuf (python -X importtime).
+
+    Parametres:
+        module (str): Nom du module.
+        n_dependances (int): Nombre de dependances directes les plus couteuses
+            a rapporter.
+
+    Retourne:
+        dict: {total (s), dependances: [(module, s), ...], interface: modules
+        d'interface charges par l'import}.
+    """
+    sonde = (f"import sys, {module}; "
+             f"print(' '.join(m for m in {MODULES_INTERFACE!r} if m in sys.modules))")
+    # Depuis le dossier du projet, quel que soit le repertoire courant
+    processus = subprocess.run([sys.executable, '-X', 'importtime', '-c', sonde],
+                               capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    # Lignes "import time: propre | cumule | [indentation]module", en microsecondes
+    total, dependances = None, []
+    for ligne in processus.stderr.splitlines():
+        if not ligne.startswith('import time:') or '|' not in ligne:
+            continue
+        _, cumule, nom = ligne.split('|')
+        if not cumule.strip().isdigit():
+            continue
+        niveau = (len(nom) - len(nom.lstrip()) - 1) // 2
+        if nom.strip() == module and niveau == 0:
+            total = int(cumule) / 1e6
+        elif niveau == 1:
+            dependances.append((nom.strip(), int(cumule) / 1e6))
+
+    # Avec -X importtime, les dependances sont listees avant leur parent
+    dependances.sort(key=lambda d: -d[1])
+    return {'total': total, 'dependances': dependances[:n_dependances],
+            'interface': sorted(processus.stdout.split())}
+
+
+###############################################################################
+#                                   MAIN                                      #
+###############################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cout d'import des modules du projet.")
+    parser.add_argument('modules', nargs='*',
+                        default=['noyau'] + list(EXPORTS),
+                        help="Modules a mesurer (defaut : noyau et ses modules).")
+    parser.add_argument('--json', action='store_true', help="Sortie JSON.")
+    args = parser.parse_args(argv)
+
+    mesures = {module: mesurer_import(module) for module in args.modules}
+    if args.json:
+        print(json.dumps(mesures, indent=1))
+        return
+
+    for module, mesure in mesures.items():
+        dependances = ', '.join(f"{nom} {1e3 * duree:.0f}" for nom, duree in mesure['dependances'])
+        alerte = f"  INTERFACE : {' '.join(mesure['interface'])}" if mesure['interface'] else ''
+        print(f"{module:20s} {1e3 * mesure['total']:8.1f} ms   ({dependances}){alerte}")
+
+
+###############################################################################
+#                            EXECUTION DU PROGRAMME                           #
+###############################################################################
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jan 24 15:27:09 2025
+
+@author: Mehdi
+
+Rapport de precision du lissage approche du tenseur de structure
+
+Compare, sur une ou plusieurs images, la carte de coherence D1 et la boite
+englobante obtenues avec le lissage gaussien exact et avec une methode
+approchee (par defaut 'boites', voir filtrage.py). Le gradient est calcule
+une seule fois, de sorte que seul le lissage du tenseur differe.
+
+Verifie aussi que le calcul par bandes paralleles (workers > 1) redonne au
+bit pres le resultat sequentiel, pour chaque methode de convolution.
+
+Exemples :
+    python precision.py scans/*.jpg --methode boites --sigma_T 18
+    python precision.py scans/*.jpg --workers 4
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import argparse
+import time
+
+import numpy as np
+
+from filtrage import METHODES, convolution_gaussienne
+from fonctions import (charger_image, gradients, tenseur_structure, coherence,
+                       regions_coherentes)
+
+###############################################################################
+#                               PRECISION                                     #
+###############################################################################
+
+def iou_boites(boite_a, boite_b):
+    """
+    Rapport intersection sur union de deux boites (min_row, min_col, max_row, max_col).
+    """
+    hauteur = min(boite_a[2], boite_b[2]) - max(boite_a[0], boite_b[0])
+    largeur = min(boite_a[3], boite_b[3]) - max(boite_a[1], boite_b[1])
+    intersection = max(hauteur, 0) * max(largeur, 0)
+
+    def aire(boite):
+        return (boite[2] - boite[0]) * (boite[3] - boite[1])
+
+    union = aire(boite_a) + aire(boite_b) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def _boite(D1, seuil_coherence):
+    """Boite de la plus grande region coherente, ou None."""
+    regions = regions_coherentes(D1, seuil_coherence)
+    if not regions:
+        return None
+    return max(regions, key=lambda r: r.area).bbox
+
+
+def rapport_precision(I, methode='boites', reference='separable', sigma_noise=0.02,
+                      sigma_G=1.8, sigma_T=18, seuil_coherence=0.3):
+    """
+    Compare le tenseur lisse par `methode` au tenseur de reference.
+
+    Parametres:
+        I (numpy.ndarray): Image en niveaux de gris.
+        methode (str): Methode approchee (voir filtrage.METHODES).
+        reference (str): Methode exacte de reference.
+        sigma_noise, sigma_G, sigma_T, seuil_coherence: Voir segmentation_image.
+
+    Retourne:
+        dict: Ecarts max et moyen sur D1, proportion de pixels changeant de
+        classe au seuil, boites, IoU des boites et temps de lissage (s).
+    """
+    I_x, I_y = gradients(I, sigma_noise, sigma_G, reference)
+
+    debut = time.perf_counter()
+    D1_reference = coherence(*tenseur_structure(I_x, I_y, sigma_T, reference))
+    temps_reference = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    D1 = coherence(*tenseur_structure(I_x, I_y, sigma_T, methode))
+    temps = time.perf_counter() - debut
+
+    ecart = np.abs(D1 - D1_reference)
+    boite_reference = _boite(D1_reference, seuil_coherence)
+    boite = _boite(D1, seuil_coherence)
+    iou = (iou_boites(boite, boite_reference)
+           if boite is not None and boite_reference is not None else None)
+
+    return {'ecart_max_D1': float(ecart.max()),
+            'ecart_moyen_D1': float(ecart.mean()),
+            'pixels_changes': float(np.mean((D1 < seuil_coherence)
+                                            != (D1_reference < seuil_coherence))),
+            'boite_reference': boite_reference, 'boite': boite, 'iou': iou,
+            'temps_reference': temps_reference, 'temps': temps}
+
+
+def ecarts_workers(I, workers=4, sigma=3.0, rayon=9):
+    """
+    Ecart entre les convolutions par bandes paralleles et sequentielles.
+
+    Parametres:
+        I (numpy.ndarray): Image en niveaux de gris.
+        workers (int): Nombre de bandes du calcul parallele.
+        sigma (float), rayon (int): Noyau gaussien (voir convolution_gaussienne).
+
+    Retourne:
+        dict: Ecart maximal absolu, par methode, sur le lissage et les deux
+        derivees premieres ; 0 attendu partout.
+    """
+    ecarts = {}
+    for methode in METHODES:
+        if methode == 'auto':
+            continue
+        ecarts[methode] = max(
+            float(np.abs(convolution_gaussienne(I, sigma, rayon, ordre, methode, workers)
+                         - convolution_gaussienne(I, sigma, rayon, ordre, methode, 1)).max())
+            for ordre in ((0, 0), (1, 0), (0, 1)))
+    return ecarts
+
+
+###############################################################################
+#                                   MAIN                                      #
+###############################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precision du lissage approche du tenseur.")
+    parser.add_argument('images', nargs='+', help="Images a analyser.")
+    parser.add_argument('--methode', default='boites', help="Methode approchee.")
+    parser.add_argument('--reference', default='separable', help="Methode de reference.")
+    parser.add_argument('--sigma_T', type=float, default=18)
+    parser.add_argument('--workers', type=int,
+                        help="Compare plutot le calcul par bandes (workers) au calcul sequentiel.")
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        for image_path in args.images:
+            ecarts = ecarts_workers(charger_image(image_path), args.workers)
+            statut = 'identique' if not any(ecarts.values()) else 'DIFFERENT'
+            detail = ' '.join(f"{methode} {ecart:.1e}" for methode, ecart in ecarts.items())
+            print(f"{image_path[-30:]:30s} {statut:10s} {detail}")
+        return
+
+    print(f"{'image':30s} {'max|dD1|':>9s} {'moy|dD1|':>9s} {'pixels':>7s} "
+          f"{'IoU':>6s} {'t_ref':>7s} {'t_' + args.methode:>8s}")
+    for image_path in args.images:
+        r = rapport_precision(charger_image(image_path), args.methode,
+                              args.reference, sigma_T=args.sigma_T)
+        iou = f"{r['iou']:6.3f}" if r['iou'] is not None else '     -'
+        print(f"{image_path[-30:]:30s} {r['ecart_max_D1']:9.4f} {r['ecart_moyen_D1']:9.4f} "
+              f"{100 * r['pixels_changes']:6.2f}% {iou} "
+              f"{r['temps_reference']:7.3f} {r['temps']:8.3f}")
+
+
+###############################################################################
+#                            EXECUTION DU PROGRAMME                           #
+###############################################################################
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.signal import convolve2d
 from skimage import color
 
+from filtrage import convolution_gaussienne
+
 # Charger l'image
 img = plt.imread('Code-barre-FR.jpg')
 
@@ -22,15 +23,10 @@ I_bruite = np.clip(I_bruite, 0, 1)  # Pour s'assurer que les valeurs restent dan
 # Paramètre sigma pour les gradients
 sigma_G = 1.8
 size = int(3 * sigma_G)  # plus large pour un meilleur calcul du gradient
-x, y = np.meshgrid(np.arange(-size, size + 1), np.arange(-size, size + 1))
-
-# Définir les dérivées du filtre gaussien pour G_x et G_y
-G_x = -(x / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2 * sigma_G**2))
-G_y = -(y / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2 * sigma_G**2))
 
-# Calcul des composantes du gradient I_x et I_y
-I_x = convolve2d(I_bruite, G_x, mode='same', boundary='symm')  # Gradient horizontal
-I_y = convolve2d(I_bruite, G_y, mode='same', boundary='symm')  # Gradient vertical
+# Calcul des composantes du gradient I_x et I_y (dérivées de gaussienne séparables)
+I_x = convolution_gaussienne(I_bruite, sigma_G, size, ordre=(0, 1))  # Gradient horizontal
+I_y = convolution_gaussienne(I_bruite, sigma_G, size, ordre=(1, 0))  # Gradient vertical
 
 # Normalisation des gradients
 norme = np.sqrt(I_x**2 + I_y**2) +1e-8
@@ -43,15 +39,11 @@ I_y = I_y/norme
 # Filtre gaussien pour le lissage local des composants du tenseur
 sigma_T = 18
 size_T = int(2 * sigma_T)
-x_T, y_T = np.meshgrid(np.arange(-size_T, size_T + 1), np.arange(-size_T, size_T + 1))
-
-# Définition du filtre gaussien pour le lissage
-G = (1 / (2 * np.pi * sigma_T**2)) * np.exp(-(x_T**2 + y_T**2) / (2 * sigma_T**2))
 
 # Calcul des composantes du tenseur de structure
-T_xx = convolve2d(I_x**2, G, mode='same', boundary='symm')
-T_xy = convolve2d(I_x * I_y, G, mode='same', boundary='symm')
-T_yy = convolve2d(I_y**2, G, mode='same', boundary='symm')
+T_xx = convolution_gaussienne(I_x**2, sigma_T, size_T)
+T_xy = convolution_gaussienne(I_x * I_y, sigma_T, size_T)
+T_yy = convolution_gaussienne(I_y**2, sigma_T, size_T)
 
 # Mesure de cohérence
 D1 = 1 - np.sqrt((T_xx-T_yy)**2 + 4*(T_xy**2)) / (T_xx + T_yy)
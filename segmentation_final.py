@@ -10,11 +10,12 @@ code segmentation
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.signal import convolve2d
 from skimage import color, io
-from skimage.morphology import closing, opening, square
 from skimage.measure import label, regionprops
 
+from filtrage import convolution_gaussienne
+from fonctions import axes_principaux, masque_coherent, rectangle_oriente
+
 ###############################################################################
 #                              PARAMeTRES                                     #
 ###############################################################################
@@ -58,16 +59,10 @@ I_bruite = np.clip(I + bruit, 0, 1)
 #                    CALCUL DES GRADIENTS GAUSSIENS                           #
 ###############################################################################
 
-# Generer les filtres derives de la gaussienne
+# Appliquer les derivees de la gaussienne (noyaux separables) pour calculer les gradients
 size = int(3 * sigma_G)
-x, y = np.meshgrid(np.arange(-size, size+1), np.arange(-size, size+1))
-
-G_x = -(x / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2*sigma_G**2))
-G_y = -(y / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2*sigma_G**2))
-
-# Appliquer les filtres pour calculer les gradients
-I_x = convolve2d(I_bruite, G_x, mode='same', boundary='symm')
-I_y = convolve2d(I_bruite, G_y, mode='same', boundary='symm')
+I_x = convolution_gaussienne(I_bruite, sigma_G, size, ordre=(0, 1))
+I_y = convolution_gaussienne(I_bruite, sigma_G, size, ordre=(1, 0))
 
 # Normaliser les gradients
 norme = np.sqrt(I_x**2 + I_y**2) + 1e-8
@@ -78,15 +73,11 @@ I_y /= norme
 #                           TENSEUR DE STRUCTURE                              #
 ###############################################################################
 
-# Calcul du filtre gaussien pour le lissage
+# Calcul des composantes du tenseur (lissage gaussien separable)
 size_T = int(2 * sigma_T)
-x_T, y_T = np.meshgrid(np.arange(-size_T, size_T+1), np.arange(-size_T, size_T+1))
-G = (1 / (2 * np.pi * sigma_T**2)) * np.exp(-(x_T**2 + y_T**2)/(2*sigma_T**2))
-
-# Calcul des composantes du tenseur
-T_xx = convolve2d(I_x**2, G, mode='same', boundary='symm')
-T_xy = convolve2d(I_x * I_y, G, mode='same', boundary='symm')
-T_yy = convolve2d(I_y**2, G, mode='same', boundary='symm')
+T_xx = convolution_gaussienne(I_x**2, sigma_T, size_T)
+T_xy = convolution_gaussienne(I_x * I_y, sigma_T, size_T)
+T_yy = convolution_gaussienne(I_y**2, sigma_T, size_T)
 
 ###############################################################################
 #                       MESURE DE COHeRENCE ET SEGMENTATION                   #
@@ -95,16 +86,9 @@ T_yy = convolve2d(I_y**2, G, mode='same', boundary='symm')
 # Calcul de la coherence D
 D1 = 1 - np.sqrt((T_xx - T_yy)**2 + 4*(T_xy**2)) / (T_xx + T_yy + 1e-15)
 
-# Segmentation par seuil
-M = (D1 > seuil_coherence).astype(int)
-
-###############################################################################
-#                       NETTOYAGE MORPHOLOGIQUE                               #
-###############################################################################
-
-# Nettoyage avec ouverture et fermeture morphologiques
-M_clean = closing(M, square(3))  # Connexion des barres
-M_clean = opening(M_clean, square(2))  # Suppression du bruit
+# Segmentation par seuil (les barres donnent D1 faible), puis nettoyage par
+# fermeture (connexion des barres) et ouverture (suppression du bruit)
+M_clean = masque_coherent(D1, seuil_coherence)
 
 ###############################################################################
 #           EXTRACTION DE LA PLUS GRANDE ReGION CONNEXE (CODE-BARRE)          #
@@ -127,44 +111,12 @@ else:
 #          ANALYSE GEOMeTRIQUE DE LA ReGION IDENTIFIeE (PCA)                  #
 ###############################################################################
 
-Y, X = np.mgrid[0:M.shape[0], 0:M.shape[1]]
-
-if np.sum(M) > 0:
-    # Calcul du barycentre
-    O_x = np.sum(X * M) / np.sum(M)
-    O_y = np.sum(Y * M) / np.sum(M)
-
-    # Centrage des points
-    X_c = X - O_x
-    Y_c = Y - O_y
-
-    # Matrice de covariance
-    C_xx = np.sum(X_c * X_c * M) / np.sum(M)
-    C_xy = np.sum(X_c * Y_c * M) / np.sum(M)
-    C_yy = np.sum(Y_c * Y_c * M) / np.sum(M)
-
-    C = np.array([[C_xx, C_xy], [C_xy, C_yy]])
-
-    # Calcul des vecteurs propres
-    vals, vecs = np.linalg.eig(C)
-    idx = np.argsort(vals)[::-1]
-    vecs = vecs[:, idx]
-
-    # Calcul des coins du rectangle oriente
-    u1, u2 = vecs[:, 0], vecs[:, 1]
-    alpha = X_c * u1[0] + Y_c * u1[1]
-    beta = X_c * u2[0] + Y_c * u2[1]
-
-    alpha_min, alpha_max = np.min(alpha[M==0]), np.max(alpha[M==0])
-    beta_min, beta_max = np.min(beta[M==0]), np.max(beta[M==0])
-
-    def corner(a, b):
-        return (O_x + a * u1[0] + b * u2[0], O_y + a * u1[1] + b * u2[1])
-
-    C1 = corner(alpha_min, beta_min)
-    C2 = corner(alpha_max, beta_min)
-    C3 = corner(alpha_max, beta_max)
-    C4 = corner(alpha_min, beta_max)
+if labels.max() > 0:
+    # PCA sur les seuls pixels (x, y) de la region : barycentre, covariance,
+    # axes principaux u1, u2 puis coins du rectangle oriente
+    points = largest_region.coords[:, ::-1]
+    O, C, u1, u2 = axes_principaux(points)
+    C1, C2, C3, C4 = rectangle_oriente(points)
 else:
     C1 = C2 = C3 = C4 = (0, 0)
 
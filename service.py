@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Jan 28 10:12:44 2025
+
+@author: Mehdi
+
+Service HTTP local de decodage EAN-13
+
+Le corps d'une requete POST /decoder est une image (PNG, JPEG, ...) ; la
+reponse JSON contient le code lu et les temps par etape. Les requetes
+concurrentes sont regroupees en micro-lots (au plus LOT_MAX images, ou
+ATTENTE_LOT secondes d'attente) envoyes a un pool de processus prechauffes.
+Dans un lot, les lignes de balayage de chaque image sont extraites en un
+appel, et les signatures de toutes les images decodees en un seul appel a
+decode_ean13_tolerant. La file d'attente est bornee : un service sature repond
+503 plutot que d'accumuler les requetes.
+
+Exemples :
+    python service.py servir --port 8025 --workers 4
+    curl --data-binary @images/thon.png http://127.0.0.1:8025/decoder
+    python service.py charge http://127.0.0.1:8025 images/*.png --requetes 500 --concurrence 16
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import argparse
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent import futures
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import noyau
+from instrumentation import journal
+
+###############################################################################
+#                              PARAMETRES                                     #
+###############################################################################
+
+PORT = 8025
+
+# Micro-lots : nombre maximal d'images et attente maximale (s) pour le completer
+LOT_MAX = 8
+ATTENTE_LOT = 0.005
+
+# Requetes en attente au-dela desquelles le service repond 503
+FILE_MAX = 64
+
+# Lots en vol par processus : au-dela, les requetes restent dans la file
+LOTS_PAR_WORKER = 2
+
+# Taille maximale d'une image recue (octets) et delai maximal de reponse (s)
+TAILLE_MAX = 32 * 2**20
+DELAI_MAX = 30.0
+
+###############################################################################
+#                      DECODAGE D'UN LOT (PROCESSUS)                          #
+###############################################################################
+
+def decoder_lot(images, n_lignes=16):
+    """
+    Decode un micro-lot d'images.
+
+    Parametres:
+        images (list): Images, en octets (fichier encode) ou en tableaux
+            numpy en niveaux de gris.
+        n_lignes (int): Lignes de balayage par image.
+
+    Retourne:
+        list: Un enregistrement {code, confiance, statut, temps} par image ; le temps de
+        decodage est celui du lot entier, partage par ses images. Une image
+        dont le traitement leve une exception a le statut 'erreur' (message
+        dans 'erreur') sans affecter les autres.
+
+    Remarque:
+        - Chaque image est segmentee puis ses n_lignes lignes sont extraites
+          en un seul appel a extraction_multiple ; les signatures de tout le
+          lot sont ensuite decodees ensemble.
+        - Les images non lues sont reprises comme dans decoder_balayage : leurs
+          profils d'intensite sont decodes ensemble (decode_ean13_profils),
+          puis les lignes de chacune votent (ConsensusEAN13). Le temps de ces
+          reprises s'ajoute a ceux des seules images reprises.
+    """
+    # NumPy n'est charge que par les processus de decodage, pas par le serveur
+    import numpy as np
+
+    resultats = []
+    blocs = []          # (indice de l'image, lignes, signatures, valides)
+
+    for indice, image in enumerate(images):
+        resultat = {'code': None, 'statut': None, 'temps': {}}
+        resultats.append(resultat)
+        temps = resultat['temps']
+
+        debut = time.perf_counter()
+        try:
+            if not isinstance(image, np.ndarray):
+                image = noyau.charger_image(io.BytesIO(image))
+        except Exception as e:
+            resultat.update(statut='image_invalide', erreur=str(e))
+            continue
+        temps['chargement'] = time.perf_counter() - debut
+
+        # Une image degeneree ne doit pas faire echouer les autres images du lot
+        debut = time.perf_counter()
+        try:
+            coins = noyau.ScanSession(image).coins_orientes
+        except ValueError:
+            resultat['statut'] = 'echec_segmentation'
+            continue
+        except Exception as e:
+            resultat.update(statut='erreur', erreur=f"{type(e).__name__}: {e}")
+            continue
+        finally:
+            temps['segmentation'] = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        try:
+            lignes = noyau.lignes_balayage(*coins, n_lignes)
+            signatures, valides = noyau.extraction_multiple(image, lignes)
+        except Exception as e:
+            resultat.update(statut='erreur', erreur=f"{type(e).__name__}: {e}")
+            continue
+        finally:
+            temps['extraction'] = time.perf_counter() - debut
+        blocs.append((indice, image, lignes, signatures, valides))
+
+    if not blocs:
+        return resultats
+
+    # Decodage groupe de toutes les signatures du lot (sens reconnu au decodage)
+    debut = time.perf_counter()
+    codes, confiances, _, _ = noyau.decode_ean13_tolerant(np.concatenate([bloc[3] for bloc in blocs]))
+    duree = time.perf_counter() - debut
+
+    # Premier code valide de chaque image, dans l'ordre de visite des lignes
+    position = 0
+    echecs = []
+    for indice, image, lignes, bloc, valides in blocs:
+        resultat = resultats[indice]
+        resultat['temps']['decodage'] = duree
+        for i in range(len(bloc)):
+            code, confiance = codes[position + i], confiances[position + i]
+            if valides[i] and code is not None and confiance >= noyau.CONFIANCE_MIN:
+                resultat.update(code=code, confiance=float(confiance), tentatives=i + 1)
+                break
+        else:
+            echecs.append((indice, image, lignes, bloc, valides))
+        position += len(bloc)
+
+    # Images non lues : profils d'intensite de toutes leurs lignes, decodes ensemble
+    if echecs:
+        debut = time.perf_counter()
+        profils = []
+        for _, image, lignes, _, _ in echecs:
+            try:
+                profils.append(noyau.profils_multiple(image, lignes))
+            except Exception:
+                # Pas de profils : seul le vote des signatures reste pour cette image
+                profils.append((None, np.zeros(0, dtype=bool)))
+        duree = time.perf_counter() - debut
+        for indice, *_ in echecs:
+            resultats[indice]['temps']['extraction'] += duree / len(echecs)
+
+        debut = time.perf_counter()
+        intensites = [p for p, _ in profils if p is not None]
+        codes, confiances, _ = (noyau.decode_ean13_profils(np.concatenate(intensites))
+                                if intensites else ([], [], None))
+        position = 0
+        for (indice, _, _, bloc, valides), (_, lisibles) in zip(echecs, profils):
+            resultat = resultats[indice]
+            for i in range(len(lisibles)):
+                code, confiance = codes[position + i], confiances[position + i]
+                if lisibles[i] and code is not None and confiance >= noyau.CONFIANCE_MIN_PROFIL:
+                    resultat.update(code=code, confiance=float(confiance), tentatives=i + 1)
+                    break
+            position += len(lisibles)
+
+            # Lignes abimees : les chiffres intacts de chacune votent
+            if resultat['code'] is None:
+                code = noyau.ConsensusEAN13().ajouter(bloc, valides)
+                if code is not None:
+                    resultat.update(code=code, tentatives=len(bloc))
+        duree = time.perf_counter() - debut
+        for indice, *_ in echecs:
+            resultats[indice]['temps']['decodage'] += duree / len(echecs)
+
+    for indice, *_ in blocs:
+        resultats[indice]['statut'] = 'ok' if resultats[indice]['code'] is not None else 'echec_decodage'
+    return resultats
+
+
+def _prechauffer():
+    """Premiere lecture d'un processus : imports, noyaux et pools de filtrage."""
+    import numpy as np
+    from benchmark import generer_code, generer_image
+    rng = np.random.default_rng(0)
+    decoder_lot([generer_image(generer_code(rng), (320, 240), module=2, rng=rng)])
+    return os.getpid()
+
+
+###############################################################################
+#                                SERVICE                                      #
+###############################################################################
+
+class ServiceDecodage:
+    """
+    Regroupement des requetes en micro-lots sur un pool de processus.
+
+    Parametres:
+        workers (int): Nombre de processus (par defaut, un par coeur).
+        lot_max (int): Nombre maximal d'images par lot.
+        attente_lot (float): Attente maximale (s) pour completer un lot.
+        file_max (int): Requetes en attente avant refus (queue.Full).
+        n_lignes (int): Lignes de balayage par image.
+
+    Remarque:
+        - Un thread repartiteur forme les lots ; il attend qu'un processus se
+          libere (au plus LOTS_PAR_WORKER lots en vol par processus), de sorte
+          que la file se remplit quand le service est sature.
+        - Si un processus meurt, le pool est casse : les requetes des lots en
+          vol echouent (BrokenProcessPool), le pool est recree et le
+          repartiteur continue.
+    """
+
+    def __init__(self, workers=None, lot_max=LOT_MAX, attente_lot=ATTENTE_LOT,
+                 file_max=FILE_MAX, n_lignes=16):
+        self.workers = workers or os.cpu_count() or 1
+        self.lot_max = lot_max
+        self.attente_lot = attente_lot
+        self.n_lignes = n_lignes
+        self.file = queue.Queue(maxsize=file_max)
+        self.en_vol = threading.BoundedSemaphore(self.workers * LOTS_PAR_WORKER)
+        self.verrou_pool = threading.Lock()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        # Demarrage et prechauffage de tous les processus avant la premiere requete
+        for future in [self.pool.submit(_prechauffer) for _ in range(self.workers)]:
+            future.result()
+
+        self.repartiteur = threading.Thread(target=self._repartir, daemon=True)
+        self.repartiteur.start()
+
+    def soumettre(self, image):
+        """
+        Place une image dans la file.
+
+        Retourne:
+            concurrent.futures.Future: Enregistrement de decodage (voir decoder_lot).
+
+        Remarque:
+            - Leve queue.Full si la file est pleine.
+        """
+        future = Future()
+        self.file.put_nowait((image, future, time.perf_counter()))
+        return future
+
+    def _repartir(self):
+        while True:
+            element = self.file.get()
+            if element is None:
+                return
+
+            # Completer le lot tant que d'autres requetes arrivent a temps
+            lot = [element]
+            limite = time.perf_counter() + self.attente_lot
+            while len(lot) < self.lot_max:
+                reste = limite - time.perf_counter()
+                try:
+                    element = self.file.get(timeout=max(reste, 0)) if reste > 0 else self.file.get_nowait()
+                except queue.Empty:
+                    break
+                if element is None:
+                    self.file.put(None)
+                    break
+                lot.append(element)
+
+            self.en_vol.acquire()
+            depart = time.perf_counter()
+            pool = self.pool
+            try:
+                tache = pool.submit(decoder_lot, [image for image, _, _ in lot], self.n_lignes)
+            except Exception as e:
+                self.en_vol.release()
+                self._echouer(lot, e, pool)
+                continue
+            tache.add_done_callback(
+                lambda tache, lot=lot, depart=depart, pool=pool: self._distribuer(tache, lot, depart, pool))
+
+    def _distribuer(self, tache, lot, depart, pool):
+        self.en_vol.release()
+        try:
+            resultats = tache.result()
+        except Exception as e:
+            self._echouer(lot, e, pool)
+            return
+        for (_, future, arrivee), resultat in zip(lot, resultats):
+            resultat['temps']['attente'] = depart - arrivee
+            resultat['lot'] = len(lot)
+            future.set_result(resultat)
+
+    def _echouer(self, lot, erreur, pool):
+        """Fait echouer les requetes d'un lot ; recree le pool s'il est casse."""
+        for _, future, _ in lot:
+            future.set_exception(erreur)
+        if isinstance(erreur, BrokenProcessPool):
+            with self.verrou_pool:
+                # Tous les lots en vol du pool casse echouent : une seule reconstruction
+                if self.pool is pool:
+                    journal(f"pool de processus casse ({erreur}), reconstruction")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def etat(self):
+        """Etat courant : requetes en attente et parametres."""
+        return {'file': self.file.qsize(), 'file_max': self.file.maxsize,
+                'workers': self.workers, 'lot_max': self.lot_max}
+
+    def fermer(self):
+        """Arrete le repartiteur puis le pool."""
+        self.file.put(None)
+        self.repartiteur.join()
+        self.pool.shutdown()
+
+
+###############################################################################
+#                               SERVEUR HTTP                                  #
+###############################################################################
+
+class GestionnaireHTTP(BaseHTTPRequestHandler):
+    """POST /decoder (corps : image) et GET /sante."""
+
+    def _repondre(self, statut, donnees, entetes=None):
+        corps = json.dumps(donnees).encode()
+        self.send_response(statut)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corps)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        if self.path != '/sante':
+            self._repondre(404, {'erreur': 'chemin inconnu'})
+            return
+        self._repondre(200, self.server.service.etat())
+
+    def do_POST(self):
+        if self.path != '/decoder':
+            self._repondre(404, {'erreur': 'chemin inconnu'})
+            return
+        try:
+            longueur = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            longueur = -1
+        if longueur <= 0:
+            self._repondre(400, {'erreur': 'taille de l\'image invalide'})
+            return
+        if longueur > TAILLE_MAX:
+            self._repondre(413, {'erreur': 'image trop grande'})
+            return
+
+        debut = time.perf_counter()
+        image = self.rfile.read(longueur)
+        try:
+            future = self.server.service.soumettre(image)
+        except queue.Full:
+            self._repondre(503, {'erreur': 'service sature'}, {'Retry-After': '1'})
+            return
+
+        try:
+            resultat = future.result(timeout=DELAI_MAX)
+        except futures.TimeoutError:
+            self._repondre(504, {'erreur': 'delai depasse'})
+            return
+        except BrokenProcessPool:
+            self._repondre(503, {'erreur': 'processus de decodage interrompu'}, {'Retry-After': '1'})
+            return
+        except Exception as e:
+            self._repondre(500, {'erreur': str(e)})
+            return
+        resultat['temps']['total'] = time.perf_counter() - debut
+        self._repondre(200, resultat)
+
+    def log_message(self, format, *args):
+        journal(f"{self.address_string()} {format % args}")
+
+
+def servir(hote='127.0.0.1', port=PORT, **parametres):
+    """Demarre le service et repond aux requetes jusqu'a interruption."""
+    service = ServiceDecodage(**parametres)
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireHTTP)
+    serveur.service = service
+    print(f"Service pret sur http://{hote}:{port} ({service.workers} processus)", file=sys.stderr)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+        service.fermer()
+
+
+###############################################################################
+#                          GENERATEUR DE CHARGE                               #
+###############################################################################
+
+def generer_charge(url, images, requetes=200, concurrence=8):
+    """
+    Envoie des requetes concurrentes au service et mesure les reponses.
+
+    Parametres:
+        url (str): Adresse du service (http://hote:port).
+        images (list): Chemins des images envoyees a tour de role.
+        requetes (int): Nombre total de requetes.
+        concurrence (int): Requetes simultanees.
+
+    Retourne:
+        dict: Debit (requetes/s), latences p50/p95/p99 (ms) des reponses 200,
+        nombre de reponses par statut HTTP et taux de lecture.
+    """
+    import numpy as np
+
+    corps = []
+    for chemin in images:
+        with open(chemin, 'rb') as fichier:
+            corps.append(fichier.read())
+
+    def envoyer(i):
+        requete = urllib.request.Request(url.rstrip('/') + '/decoder', data=corps[i % len(corps)],
+                                         headers={'Content-Type': 'application/octet-stream'})
+        debut = time.perf_counter()
+        try:
+            with urllib.request.urlopen(requete, timeout=DELAI_MAX + 5) as reponse:
+                resultat = json.load(reponse)
+                return reponse.status, time.perf_counter() - debut, resultat
+        except urllib.error.HTTPError as e:
+            return e.code, time.perf_counter() - debut, None
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrence) as pool:
+        reponses = list(pool.map(envoyer, range(requetes)))
+    duree = time.perf_counter() - debut
+
+    statuts = {}
+    for statut, _, _ in reponses:
+        statuts[statut] = statuts.get(statut, 0) + 1
+    reussies = [(latence, resultat) for statut, latence, resultat in reponses if statut == 200]
+    latences = np.array([latence for latence, _ in reussies]) * 1e3
+    lus = sum(resultat['code'] is not None for _, resultat in reussies)
+    lots = [resultat['lot'] for _, resultat in reussies if 'lot' in resultat]
+
+    bilan = {'requetes': requetes, 'concurrence': concurrence, 'duree': duree,
+             'debit': requetes / duree, 'statuts': statuts,
+             'taux_lecture': lus / len(reussies) if reussies else None,
+             'lot_moyen': float(np.mean(lots)) if lots else None}
+    if len(latences):
+        bilan['latences_ms'] = dict(zip(('p50', 'p95', 'p99'), np.percentile(latences, [50, 95, 99])))
+    return bilan
+
+
+###############################################################################
+#                                   MAIN                                      #
+###############################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP local de decodage EAN-13.")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    serveur = commandes.add_parser('servir', help="Demarre le service.")
+    serveur.add_argument('--hote', default='127.0.0.1')
+    serveur.add_argument('--port', type=int, default=PORT)
+    serveur.add_argument('--workers', type=int, default=None,
+                         help="Nombre de processus (defaut : nombre de coeurs).")
+    serveur.add_argument('--lot', type=int, default=LOT_MAX, help="Images par micro-lot.")
+    serveur.add_argument('--attente', type=float, default=ATTENTE_LOT * 1e3,
+                         help="Attente maximale pour completer un lot, en ms.")
+    serveur.add_argument('--file', type=int, default=FILE_MAX,
+                         help="Requetes en attente avant de repondre 503.")
+    serveur.add_argument('--lignes', type=int, default=16, help="Lignes de balayage par image.")
+
+    charge = commandes.add_parser('charge', help="Generateur de charge.")
+    charge.add_argument('url')
+    charge.add_argument('images', nargs='+')
+    charge.add_argument('--requetes', type=int, default=200)
+    charge.add_argument('--concurrence', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    if args.commande == 'servir':
+        servir(args.hote, args.port, workers=args.workers, lot_max=args.lot,
+               attente_lot=args.attente / 1e3, file_max=args.file, n_lignes=args.lignes)
+    else:
+        bilan = generer_charge(args.url, args.images, args.requetes, args.concurrence)
+        print(json.dumps(bilan, indent=1))
+
+
+###############################################################################
+#                            EXECUTION DU PROGRAMME                           #
+###############################################################################
+
+if __name__ == "__main__":
+    main()
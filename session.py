@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Jan 20 14:05:37 2025
+
+@author: Mehdi
+
+Session de lecture d'une image
+
+L'image est decodee une seule fois ; le niveau de gris, le gradient, le
+tenseur de structure, la coherence, le masque et les regions sont calcules a
+la demande puis conserves, de sorte que segmentation, lancers de rayons,
+extraction et decodage travaillent en memoire sans relire le fichier.
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+from functools import cached_property
+
+import numpy as np
+from skimage.measure import label, regionprops
+
+from fonctions import (charger_image, gradients, tenseur_structure, coherence,
+                       masque_coherent, orientation_region, rectangle_oriente,
+                       segmentation_image, lancer_aleatoire, lancer_orientes,
+                       extraction, lignes_balayage, decoder_balayage,
+                       classer_regions, decoder_regions)
+from instrumentation import chrono
+
+###############################################################################
+#                               SESSION                                       #
+###############################################################################
+
+class ScanSession:
+    """
+    Lecture d'un code-barres sur une image chargee une seule fois.
+
+    Parametres:
+        image (str ou numpy.ndarray): Chemin de l'image ou image deja chargee
+            en niveaux de gris.
+        sigma_noise, sigma_G, sigma_T, seuil_coherence, methode, pyramide,
+        memoire_max, workers: Parametres de segmentation (voir fonctions.segmentation_image).
+
+    Remarque:
+        - Les attributs intermediaires (gradient, tenseur, D1, masque, regions)
+          sont des proprietes calculees au premier acces puis mises en cache.
+        - En mode pyramide ou avec un budget memoire, la boite est calculee par
+          segmentation_image sans passer par les intermediaires pleine resolution.
+    """
+
+    def __init__(self, image, sigma_noise=0.02, sigma_G=1.8, sigma_T=18,
+                 seuil_coherence=0.3, methode='auto', pyramide=0, memoire_max=None,
+                 workers=1):
+        if isinstance(image, np.ndarray):
+            self.image_path = None
+            self.image = image
+        else:
+            self.image_path = image
+            self.image = charger_image(image)
+
+        self.sigma_noise = sigma_noise
+        self.sigma_G = sigma_G
+        self.sigma_T = sigma_T
+        self.seuil_coherence = seuil_coherence
+        self.methode = methode
+        self.pyramide = pyramide
+        self.memoire_max = memoire_max
+        self.workers = workers
+
+    # Intermediaires de la segmentation ---------------------------------------
+
+    @cached_property
+    def gradients(self):
+        """Gradient normalise (I_x, I_y)."""
+        return gradients(self.image, self.sigma_noise, self.sigma_G, self.methode, self.workers)
+
+    @cached_property
+    def tenseur(self):
+        """Composantes (T_xx, T_xy, T_yy) du tenseur de structure."""
+        return tenseur_structure(*self.gradients, self.sigma_T, self.methode, self.workers)
+
+    @cached_property
+    def D1(self):
+        """Carte de coherence."""
+        return coherence(*self.tenseur)
+
+    @cached_property
+    def masque(self):
+        """Masque nettoye des zones de barres paralleles."""
+        return masque_coherent(self.D1, self.seuil_coherence)
+
+    @cached_property
+    def labels(self):
+        """Image des composantes connexes du masque."""
+        masque = self.masque
+        with chrono('regions'):
+            return label(masque)
+
+    @cached_property
+    def regions(self):
+        """Regions candidates (regionprops), eventuellement vides."""
+        return regionprops(self.labels)
+
+    @cached_property
+    def _segmentation(self):
+        """Boite, orientation et rectangle oriente de la plus grande region."""
+        if self.pyramide > 0 or self.memoire_max is not None:
+            return segmentation_image(self.image, self.sigma_noise, self.sigma_G,
+                                      self.sigma_T, self.seuil_coherence,
+                                      self.methode, self.pyramide, orientation=True,
+                                      memoire_max=self.memoire_max, workers=self.workers,
+                                      rectangle=True)
+        if not self.regions:
+            raise ValueError("Aucune region coherente detectee.")
+        largest_region = max(self.regions, key=lambda r: r.area)
+        angle = orientation_region(*self.tenseur, largest_region.coords)
+        return (largest_region.bbox, angle,
+                rectangle_oriente(largest_region.coords[:, ::-1], angle))
+
+    def candidats(self, n_max=8):
+        """Toutes les regions candidates, classees (voir fonctions.classer_regions)."""
+        return classer_regions(self.regions, *self.tenseur, self.D1, n_max)
+
+    @property
+    def bbox(self):
+        """Boite (min_row, min_col, max_row, max_col) de la plus grande region."""
+        return self._segmentation[0]
+
+    @property
+    def orientation(self):
+        """Direction du gradient (radians) sur la plus grande region."""
+        return self._segmentation[1]
+
+    @property
+    def coins(self):
+        """Coins (x, y) C1..C4 de la region detectee."""
+        min_row, min_col, max_row, max_col = self.bbox
+        return ((min_col, min_row), (max_col, min_row),
+                (max_col, max_row), (min_col, max_row))
+
+    @property
+    def coins_orientes(self):
+        """Rectangle C1..C4 des pixels de la region, aligne sur la direction de lecture (C1 -> C2)."""
+        return self._segmentation[2]
+
+    # Etapes de lecture -------------------------------------------------------
+
+    def segmenter(self):
+        """
+        Detecte la region du code-barres.
+
+        Retourne:
+            tuple: Boite englobante (min_row, min_col, max_row, max_col).
+        """
+        return self.bbox
+
+    def lancer_rayon(self):
+        """Tire un rayon aleatoire dans la region detectee."""
+        return lancer_aleatoire(*self.coins)
+
+    def lancer_rayons(self, n_rayons=20):
+        """Rayons perpendiculaires aux barres, (n_rayons, 2, 2), centre d'abord."""
+        return lancer_orientes(*self.coins, self.orientation, n_rayons)
+
+    def extraire(self, p1, p2):
+        """Extrait la signature 95 bits le long du rayon [p1, p2]."""
+        return extraction(self.image, p1, p2)
+
+    def lignes_balayage(self, n_lignes=16):
+        """Lignes de balayage du rectangle oriente, (n_lignes, 2, 2), centre d'abord."""
+        return lignes_balayage(*self.coins_orientes, n_lignes)
+
+    def decoder(self, n_lignes=16):
+        """
+        Balaye la region par lignes paralleles jusqu'au premier code EAN-13 valide.
+
+        Parametres:
+            n_lignes (int): Nombre maximal de lignes de balayage.
+
+        Retourne:
+            tuple: (code_barres ou None, nombre de lignes visitees).
+        """
+        return decoder_balayage(self.image, *self.coins_orientes, n_lignes)
+
+    def decoder_tout(self, n_lignes=16, budget=None, n_max=8, workers=4):
+        """
+        Decode tous les codes-barres de l'image (un par region candidate).
+
+        Parametres:
+            n_lignes (int): Nombre maximal de lignes de balayage par region.
+            budget (float): Temps total (s) partage par les regions.
+            n_max (int): Nombre maximal de regions essayees.
+            workers (int): Nombre de regions decodees en parallele.
+
+        Retourne:
+            list: Codes distincts lus (voir fonctions.decoder_regions).
+        """
+        return decoder_regions(self.image, self.candidats(n_max), n_lignes, budget, workers)
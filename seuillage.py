@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Jan 21 16:48:03 2025
+
+@author: Mehdi
+
+Seuillage d'Otsu vectorise, commun a toutes les extractions de signature
+
+Le critere de variance inter-classes est evalue pour tous les seuils a la
+fois par sommes cumulees sur l'histogramme (au lieu d'une boucle Python sur
+les 256 classes), et pour toutes les lignes d'une matrice de profils a la
+fois (un seuil par rayon).
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import numpy as np
+
+###############################################################################
+#                                OTSU                                         #
+###############################################################################
+
+def seuil_otsu(valeurs, masque=None, nbins=256, plage=None, critere=False):
+    """
+    Seuil d'Otsu d'un profil 1D, ou de chaque ligne d'une matrice de profils.
+
+    Parametres:
+        valeurs (array-like): Profil (L,) ou matrice (N, L) d'intensites.
+        masque (array-like): Echantillons a prendre en compte, de meme forme
+            (utile pour des rayons de longueurs differentes completes par padding).
+        nbins (int): Nombre de classes de l'histogramme.
+        plage (tuple): Bornes (min, max) de l'histogramme ; par defaut, les
+            extrema de chaque ligne.
+        critere (bool): Renvoie aussi la variance inter-classes de chaque seuil.
+
+    Retourne:
+        float ou numpy.ndarray: Seuil (centre de classe), un par ligne pour
+        une matrice. Avec critere=True, un couple (seuils, variances) ou
+        variances est de forme (..., nbins), la derniere classe valant 0.
+
+    Remarque:
+        - Sans plage, meme convention que skimage.filters.threshold_otsu : un
+          profil constant renvoie sa valeur.
+        - Les pixels superieurs au seuil forment la classe claire.
+    """
+    valeurs = np.asarray(valeurs, dtype=float)
+    profil_unique = valeurs.ndim == 1
+    valeurs = np.atleast_2d(valeurs)
+    n_lignes = valeurs.shape[0]
+    if masque is None:
+        masque = np.ones(valeurs.shape, dtype=bool)
+    else:
+        masque = np.atleast_2d(np.asarray(masque, dtype=bool))
+
+    # Bornes de l'histogramme de chaque ligne
+    if plage is None:
+        v_min = np.where(masque, valeurs, np.inf).min(axis=1)
+        v_max = np.where(masque, valeurs, -np.inf).max(axis=1)
+    else:
+        masque = masque & (valeurs >= plage[0]) & (valeurs <= plage[1])
+        v_min = np.full(n_lignes, float(plage[0]))
+        v_max = np.full(n_lignes, float(plage[1]))
+    etendue = np.where(v_max > v_min, v_max - v_min, 1.0)
+
+    # Histogrammes de toutes les lignes en un seul bincount
+    classes = ((valeurs - v_min[:, None]) / etendue[:, None] * nbins).astype(int)
+    classes = np.clip(classes, 0, nbins - 1) + nbins * np.arange(n_lignes)[:, None]
+    hist = np.bincount(classes[masque], minlength=n_lignes * nbins).reshape(n_lignes, nbins)
+    centres = v_min[:, None] + (np.arange(nbins) + 0.5) * (etendue / nbins)[:, None]
+
+    # Variance inter-classes pour tous les seuils, par sommes cumulees
+    poids1 = np.cumsum(hist, axis=1)
+    poids2 = np.cumsum(hist[:, ::-1], axis=1)[:, ::-1]
+    somme1 = np.cumsum(hist * centres, axis=1)
+    somme2 = np.cumsum((hist * centres)[:, ::-1], axis=1)[:, ::-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (poids1[:, :-1] * poids2[:, 1:]
+                    * (somme1[:, :-1] / poids1[:, :-1] - somme2[:, 1:] / poids2[:, 1:])**2)
+    variance = np.nan_to_num(variance)
+
+    seuils = centres[np.arange(n_lignes), np.argmax(variance, axis=1)]
+    if plage is None:
+        # Ligne constante : on renvoie la valeur elle-meme, comme skimage
+        seuils = np.where(v_max > v_min, seuils, v_min)
+
+    if profil_unique:
+        seuils = seuils[0]
+    if not critere:
+        return seuils
+
+    variances = np.pad(variance, ((0, 0), (0, 1)))
+    return seuils, (variances[0] if profil_unique else variances)
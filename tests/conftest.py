@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Configuration commune des tests : les modules du projet sont a la racine."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'ordre et de la geometrie des lignes de balayage (fonctions.py)."""
+
+import numpy as np
+
+from fonctions import lignes_balayage, ordre_bissection
+
+
+def test_ordre_bissection_premiers_niveaux():
+    attendu = [1/2, 1/4, 3/4, 1/8, 3/8, 5/8, 7/8]
+    np.testing.assert_allclose(ordre_bissection(7), attendu)
+
+
+def test_ordre_bissection_prefixes_et_unicite():
+    positions = ordre_bissection(31)
+    assert len(np.unique(positions)) == 31
+    assert ((positions > 0) & (positions < 1)).all()
+    # Un balayage interrompu a visite les memes lignes qu'un balayage plus court
+    np.testing.assert_array_equal(positions[:5], ordre_bissection(5))
+    # Apres 2^k - 1 lignes, la zone est decoupee en pas reguliers
+    np.testing.assert_allclose(np.sort(positions[:15]), np.arange(1, 16) / 16)
+
+
+def test_lignes_balayage_geometrie():
+    C1, C2, C3, C4 = (0, 0), (100, 0), (100, 40), (0, 40)
+    lignes = lignes_balayage(C1, C2, C3, C4, n_lignes=4, marge=0.1)
+    assert lignes.shape == (4, 2, 2)
+    # Ligne du centre en premier, puis quart et trois quarts
+    np.testing.assert_allclose(lignes[:, 0, 1], [20, 10, 30, 5])
+    np.testing.assert_allclose(lignes[:, 1, 1], [20, 10, 30, 5])
+    # Paralleles a C1 -> C2, prolongees de 10 % a chaque bout
+    np.testing.assert_allclose(lignes[:, 0, 0], -10)
+    np.testing.assert_allclose(lignes[:, 1, 0], 110)
+
+
+def test_lignes_balayage_sans_marge_restent_dans_le_rectangle():
+    C1, C2, C3, C4 = (10, 5), (80, 25), (70, 60), (0, 40)
+    lignes = lignes_balayage(C1, C2, C3, C4, n_lignes=8, marge=0.0)
+    t = ordre_bissection(8)[:, None]
+    np.testing.assert_allclose(lignes[:, 0], np.array(C1) * (1 - t) + np.array(C4) * t)
+    np.testing.assert_allclose(lignes[:, 1], np.array(C2) * (1 - t) + np.array(C3) * t)
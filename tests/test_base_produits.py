@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'index de la base de produits (base_produits.py)."""
+
+import os
+
+import numpy as np
+import pytest
+
+from base_produits import BaseProduits, charger_base, construire_index, en_entiers
+from instrumentation import INSTRUMENTATION
+
+CATALOGUE = ['code_ean', '4006381333931', '', '  5901234123457  ', 'Libelle produit',
+             '0123', '4006381333931', '9780201379624']
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    chemin = tmp_path / 'catalogue.txt'
+    chemin.write_text('\n'.join(CATALOGUE) + '\n')
+    return str(chemin)
+
+
+def _vieillir(chemin, secondes=10):
+    """Recule la date de modification d'un fichier (pour forcer une reconstruction)."""
+    date = os.path.getmtime(chemin) - secondes
+    os.utime(chemin, (date, date))
+
+
+###############################################################################
+#                                 CONVERSION                                  #
+###############################################################################
+
+def test_en_entiers_distingue_les_zeros_de_tete():
+    valeurs = en_entiers(['0123', '123', '00123'])
+    assert len(np.unique(valeurs)) == 3
+
+
+def test_en_entiers_codes_invalides_a_zero():
+    valeurs = en_entiers(['', 'abc', '12a', '١٢٣', '1' * 15, '4006381333931', 4006381333931])
+    np.testing.assert_array_equal(valeurs[:5], 0)
+    assert valeurs[5] == valeurs[6] != 0
+
+
+###############################################################################
+#                          CONSTRUCTION ET RECHERCHE                          #
+###############################################################################
+
+def test_construction_ignore_et_compte_les_lignes_non_codes(catalogue):
+    INSTRUMENTATION.reinitialiser()
+    index = construire_index(catalogue)
+    assert index.endswith('catalogue.npy')
+    codes = np.load(index)
+    assert len(codes) == 4
+    assert (np.diff(codes.astype(np.int64)) > 0).all()
+    assert INSTRUMENTATION.bilan()['compteurs']['lignes_ignorees'] == 2
+
+
+def test_recherche(catalogue):
+    base = BaseProduits(construire_index(catalogue))
+    assert len(base) == 4
+    assert '4006381333931' in base
+    assert 5901234123457 in base
+    assert '0123' in base and '123' not in base
+    assert 'code_ean' not in base
+    np.testing.assert_array_equal(
+        base.contient_lot(['9780201379624', '0000000000000', '']), [True, False, False])
+
+
+###############################################################################
+#                         MISES A JOUR INCREMENTALES                          #
+###############################################################################
+
+def test_ajouts_et_retraits(catalogue):
+    index = construire_index(catalogue)
+    base = BaseProduits(index)
+    base.ajouter(['3017620422003', 'pas un code'])
+    base.retirer(['5901234123457'])
+    assert '3017620422003' in base and '5901234123457' not in base
+    assert len(base) == 4
+
+    # Les mises a jour sont relues depuis le disque, l'index n'est pas reecrit
+    relue = BaseProduits(index)
+    assert '3017620422003' in relue and '5901234123457' not in relue
+    assert len(np.load(index)) == 4
+
+    # Re-ajouter un code retire l'enleve des retraits
+    relue.ajouter(['5901234123457'])
+    assert '5901234123457' in relue and len(relue) == 5
+
+
+def test_fusion(catalogue):
+    base = BaseProduits(construire_index(catalogue))
+    base.ajouter(['3017620422003'])
+    base.retirer(['0123'])
+    base.fusionner()
+    assert len(base.ajouts) == len(base.retraits) == 0
+    assert '3017620422003' in base and '0123' not in base
+    assert len(np.load(base.index)) == 4
+
+
+###############################################################################
+#                                 CHARGEMENT                                  #
+###############################################################################
+
+def test_charger_base_construit_et_met_en_cache(catalogue):
+    base = charger_base(catalogue)
+    assert os.path.exists(os.path.splitext(catalogue)[0] + '.npy')
+    assert charger_base(catalogue) is base
+    assert '4006381333931' in base
+
+
+def test_reconstruction_conserve_les_mises_a_jour(catalogue):
+    index = construire_index(catalogue)
+    base = BaseProduits(index)
+    base.ajouter(['3017620422003'])
+    base.retirer(['9780201379624'])
+
+    # Le catalogue change apres l'index : charger_base le reconstruit
+    with open(catalogue, 'a') as fichier:
+        fichier.write('8711000380071\n')
+    for chemin in (index, index + '.ajouts.npy', index + '.retraits.npy'):
+        _vieillir(chemin)
+    recharge = charger_base(catalogue)
+    assert '8711000380071' in recharge
+    assert '3017620422003' in recharge
+    assert '9780201379624' not in recharge
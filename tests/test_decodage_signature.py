@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""Tests du decodage des signatures EAN-13 (decodage_signature.py)."""
+
+import numpy as np
+import pytest
+
+from decodage_signature import (CODE_R, CONFIANCE_MIN, CONFIANCE_MIN_PROFIL, DECODAGE_OK,
+                                ECHANTILLONS_MODULE, ERREUR_CLE, ERREUR_GARDE, ERREUR_MOTIF,
+                                decode_ean13_lot, decode_ean13_profils, decode_ean13_signature,
+                                decode_ean13_tolerant, encode_ean13)
+
+CODES = ['4006381333931', '5901234123457', '9780201379624', '0012345678905', '3017620422003']
+
+
+# Modules des 12 chiffres (hors gardes)
+MODULES_CHIFFRES = list(range(3, 45)) + list(range(50, 92))
+
+
+def _cle_fausse(code):
+    """Signature de `code` dont le dernier groupe code une autre cle."""
+    signature = encode_ean13(code).copy()
+    autre = (int(code[-1]) + 1) % 10
+    signature[85:92] = [int(b) for b in CODE_R[autre]]
+    return signature
+
+
+###############################################################################
+#                        DECODAGE D'UNE SIGNATURE                             #
+###############################################################################
+
+@pytest.mark.parametrize('code', CODES)
+def test_aller_retour(code):
+    assert decode_ean13_signature(encode_ean13(code)) == code
+
+
+@pytest.mark.parametrize('code', CODES)
+def test_lecture_a_l_envers(code):
+    assert decode_ean13_signature(encode_ean13(code)[::-1]) == code
+
+
+def test_cle_calculee_a_l_encodage():
+    assert decode_ean13_signature(encode_ean13('400638133393')) == '4006381333931'
+
+
+def test_cle_fausse_rejetee():
+    with pytest.raises(ValueError, match="Cle de controle"):
+        decode_ean13_signature(_cle_fausse('4006381333931'))
+    with pytest.raises(ValueError):
+        encode_ean13('4006381333932')
+
+
+def test_garde_fausse_rejetee():
+    signature = encode_ean13('4006381333931').copy()
+    signature[46] ^= 1
+    with pytest.raises(ValueError, match="garde"):
+        decode_ean13_signature(signature)
+
+
+def test_longueur_invalide():
+    with pytest.raises(ValueError):
+        decode_ean13_signature(np.zeros(94, dtype=np.uint8))
+
+
+###############################################################################
+#                          DECODAGE PAR LOT                                   #
+###############################################################################
+
+def test_lot_egal_au_decodage_unitaire():
+    signatures = np.stack([encode_ean13(code) for code in CODES])
+    signatures[1::2] = signatures[1::2, ::-1]
+    codes, statuts = decode_ean13_lot(signatures)
+    assert codes == CODES
+    assert (statuts == DECODAGE_OK).all()
+
+
+def test_lot_statuts_d_echec():
+    garde = encode_ean13(CODES[0]).copy()
+    garde[0] = 0
+    codes, statuts = decode_ean13_lot([encode_ean13(CODES[1]), _cle_fausse(CODES[2]), garde])
+    assert codes == [CODES[1], None, None]
+    assert list(statuts) == [DECODAGE_OK, ERREUR_CLE, ERREUR_GARDE]
+
+
+def test_lot_signature_unique():
+    codes, statuts = decode_ean13_lot(encode_ean13(CODES[0]))
+    assert codes == [CODES[0]] and statuts.shape == (1,)
+
+
+###############################################################################
+#                          DECODAGE TOLERANT                                  #
+###############################################################################
+
+def test_tolerant_lecture_exacte_confiance_1():
+    signatures = np.stack([encode_ean13(code) for code in CODES])
+    signatures[::2] = signatures[::2, ::-1]
+    codes, confiances, marges, statuts = decode_ean13_tolerant(signatures)
+    assert codes == CODES
+    assert (confiances == 1).all() and (statuts == DECODAGE_OK).all()
+    assert marges.shape == (len(CODES), 13) and (marges[:, 1:] >= 1).all()
+
+
+@pytest.mark.parametrize('code', CODES)
+def test_tolerant_un_module_faux_jamais_mal_lu(code):
+    """Toute lecture acceptee d'une signature a un module faux est la bonne."""
+    signatures = np.repeat(encode_ean13(code)[None], len(MODULES_CHIFFRES), axis=0)
+    signatures[np.arange(len(MODULES_CHIFFRES)), MODULES_CHIFFRES] ^= 1
+    codes, confiances, _, _ = decode_ean13_tolerant(signatures)
+    acceptes = [lu for lu, confiance in zip(codes, confiances) if confiance >= CONFIANCE_MIN]
+    assert set(acceptes) <= {code}
+    assert ((0 <= confiances) & (confiances < 1)).all()
+
+
+def test_tolerant_un_module_faux_corrige():
+    signatures = np.repeat(encode_ean13(CODES[0])[None], len(MODULES_CHIFFRES), axis=0)
+    signatures[np.arange(len(MODULES_CHIFFRES)), MODULES_CHIFFRES] ^= 1
+    codes, confiances, _, statuts = decode_ean13_tolerant(signatures)
+    lus = [lu == CODES[0] and confiance >= CONFIANCE_MIN for lu, confiance in zip(codes, confiances)]
+    # Seuil prudent : un quart environ des modules faux est corrige (voir CONFIANCE_MIN)
+    assert 0.2 < np.mean(lus) < 1
+    assert (statuts == DECODAGE_OK).sum() > sum(lus)
+
+
+def test_tolerant_cle_fausse_non_reparee():
+    codes, confiances, _, statuts = decode_ean13_tolerant(_cle_fausse(CODES[0]))
+    assert codes == [None] and confiances[0] == 0 and statuts[0] == ERREUR_CLE
+
+
+def test_tolerant_groupe_trop_abime():
+    # Une barre pleine a la place du premier chiffre : a 2 modules au moins de tout motif
+    signature = encode_ean13(CODES[0]).copy()
+    signature[3:10] = 1
+    codes, confiances, _, statuts = decode_ean13_tolerant(signature)
+    assert codes == [None] and confiances[0] == 0 and statuts[0] == ERREUR_MOTIF
+
+
+def test_tolerant_confiance_decroit_avec_les_degats():
+    signature = encode_ean13(CODES[1])
+    abimee = signature.copy()
+    abimee[[10, 60]] ^= 1
+    _, confiances, _, _ = decode_ean13_tolerant(np.stack([signature, abimee]))
+    assert confiances[0] > confiances[1]
+
+
+###############################################################################
+#                        DECODAGE DES PROFILS                                 #
+###############################################################################
+
+def _profils(codes):
+    """Profils ideaux (+1 barre, -1 espace) de codes, echantillonnes."""
+    signatures = np.stack([encode_ean13(code) for code in codes])
+    return np.repeat(2.0 * signatures - 1, ECHANTILLONS_MODULE, axis=1)
+
+
+def test_profils_bruites_dans_les_deux_sens():
+    rng = np.random.default_rng(0)
+    profils = _profils(CODES) + rng.normal(0, 0.3, (len(CODES), 95 * ECHANTILLONS_MODULE))
+    profils[1::2] = profils[1::2, ::-1]
+    codes, confiances, statuts = decode_ean13_profils(profils)
+    assert codes == CODES
+    assert (confiances >= CONFIANCE_MIN_PROFIL).all() and (statuts == DECODAGE_OK).all()
+
+
+def test_profils_decales_et_flous():
+    rng = np.random.default_rng(1)
+    profils = np.roll(_profils(CODES), ECHANTILLONS_MODULE, axis=1)
+    noyau = np.exp(-np.arange(-6, 7)**2 / (2 * 2.0**2))
+    flous = np.array([np.convolve(profil, noyau / noyau.sum(), mode='same') for profil in profils])
+    flous = flous / flous.std(axis=1, keepdims=True) + rng.normal(0, 0.1, flous.shape)
+    codes, _, _ = decode_ean13_profils(flous)
+    assert codes == CODES
+
+
+def test_profils_bruit_seul_rejete():
+    bruit = np.random.default_rng(2).normal(0, 1, (20, 95 * ECHANTILLONS_MODULE))
+    _, confiances, _ = decode_ean13_profils(bruit)
+    assert (confiances < CONFIANCE_MIN_PROFIL).all()
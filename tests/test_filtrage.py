@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Tests de la convolution gaussienne (filtrage.py)."""
+
+import numpy as np
+import pytest
+
+from filtrage import METHODES, choisir_methode, convolution_gaussienne, noyau_gaussien_1d
+
+ORDRES = [(0, 0), (1, 0), (0, 1)]
+
+
+@pytest.fixture(scope='module')
+def image():
+    return np.random.default_rng(0).random((64, 80))
+
+
+@pytest.mark.parametrize('methode', ['separable', 'fft', 'auto'])
+@pytest.mark.parametrize('ordre', ORDRES)
+def test_methodes_exactes_egales_a_direct(image, methode, ordre):
+    reference = convolution_gaussienne(image, 2.0, 6, ordre, 'direct')
+    np.testing.assert_allclose(convolution_gaussienne(image, 2.0, 6, ordre, methode),
+                               reference, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('methode', ['iir', 'boites'])
+@pytest.mark.parametrize('sigma, rayon', [(2.0, 6), (5.0, 15)])
+def test_methodes_approchees_proches_de_direct(image, methode, sigma, rayon):
+    reference = convolution_gaussienne(image, sigma, rayon, methode='direct')
+    ecart = np.abs(convolution_gaussienne(image, sigma, rayon, methode=methode) - reference).max()
+    assert ecart < 0.05 * np.abs(reference).max()
+
+
+@pytest.mark.parametrize('methode', ['iir', 'boites'])
+def test_derivees_approchees_calculees_exactement(image, methode):
+    np.testing.assert_array_equal(convolution_gaussienne(image, 2.0, 6, (1, 0), methode),
+                                  convolution_gaussienne(image, 2.0, 6, (1, 0), 'separable'))
+
+
+@pytest.mark.parametrize('methode', METHODES)
+@pytest.mark.parametrize('ordre', ORDRES)
+def test_bandes_paralleles_identiques(image, methode, ordre):
+    sequentiel = convolution_gaussienne(image, 3.0, 9, ordre, methode, workers=1)
+    for workers in (2, 3, 4):
+        np.testing.assert_array_equal(
+            convolution_gaussienne(image, 3.0, 9, ordre, methode, workers=workers), sequentiel)
+
+
+def test_taille_conservee(image):
+    assert convolution_gaussienne(image, 18.0, 36).shape == image.shape
+
+
+def test_methode_auto_et_inconnue():
+    assert choisir_methode(6) == 'separable'
+    assert choisir_methode(200) == 'fft'
+    with pytest.raises(ValueError):
+        choisir_methode(6, 'spline')
+
+
+def test_noyau_1d():
+    g = noyau_gaussien_1d(2.0, 8)
+    assert len(g) == 17 and np.isclose(g.sum(), 1, atol=1e-3)
+    np.testing.assert_allclose(noyau_gaussien_1d(2.0, 8, 1), -noyau_gaussien_1d(2.0, 8, 1)[::-1])
+    with pytest.raises(ValueError):
+        noyau_gaussien_1d(2.0, 8, 2)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Tests du seuil d'Otsu vectorise (seuillage.py)."""
+
+import numpy as np
+import pytest
+
+from seuillage import seuil_otsu
+
+
+def _bimodal(rng, n=2000, sombre=40.0, clair=200.0, ecart=10.0):
+    return np.concatenate((rng.normal(sombre, ecart, n), rng.normal(clair, ecart, n)))
+
+
+def test_bimodal_separe_les_deux_modes():
+    valeurs = _bimodal(np.random.default_rng(0))
+    seuil = seuil_otsu(valeurs)
+    # Le critere est plat sur le creux : seule la separation compte
+    assert 40 < seuil < 200
+    # Classe claire : au-dessus du seuil
+    assert (valeurs > seuil).sum() == pytest.approx(2000, abs=5)
+
+
+def test_conforme_a_skimage():
+    filters = pytest.importorskip('skimage.filters')
+    valeurs = _bimodal(np.random.default_rng(1), sombre=60.0, clair=150.0, ecart=20.0)
+    assert seuil_otsu(valeurs) == pytest.approx(filters.threshold_otsu(valeurs))
+
+
+def test_profil_constant_renvoie_sa_valeur():
+    assert seuil_otsu(np.full(50, 7.0)) == 7.0
+
+
+def test_matrice_un_seuil_par_ligne():
+    rng = np.random.default_rng(2)
+    lignes = [_bimodal(rng, 500, s, c, 5.0) for s, c in [(10, 60), (100, 220), (0, 30)]]
+    seuils = seuil_otsu(np.stack(lignes))
+    assert seuils.shape == (3,)
+    for ligne, seuil in zip(lignes, seuils):
+        assert seuil == pytest.approx(seuil_otsu(ligne))
+
+
+def test_masque_ignore_le_padding():
+    valeurs = _bimodal(np.random.default_rng(3), 500)
+    complete = np.concatenate((valeurs, np.full(300, 1000.0)))
+    masque = np.arange(complete.size) < valeurs.size
+    assert seuil_otsu(complete, masque=masque) == pytest.approx(seuil_otsu(valeurs))
+
+
+def test_plage_et_critere():
+    valeurs = _bimodal(np.random.default_rng(4))
+    seuil, variances = seuil_otsu(valeurs, nbins=64, plage=(0, 255), critere=True)
+    assert variances.shape == (64,)
+    assert variances[-1] == 0
+    # Le seuil est le centre de la classe qui maximise la variance
+    assert seuil == pytest.approx((np.argmax(variances) + 0.5) * 255 / 64)
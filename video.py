@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan 23 11:12:45 2025
+
+@author: Mehdi
+
+Lecture de codes-barres sur un flux video (fichier, camera ou tube)
+
+La segmentation complete par tenseur de structure n'est lancee que lorsque
+le suivi est perdu : tant qu'un code est lu, la region et l'orientation de
+l'image precedente servent d'a priori et seules quelques lignes de balayage
+sont extraites ; apres chaque lecture, la region est resegmentee dans la
+zone suivie seulement, pour suivre le code qui se deplace. Les lectures repetees d'un meme code sur des images
+consecutives sont fusionnees.
+
+Exemples :
+    python video.py convoyeur.mp4
+    ffmpeg -i rtsp://camera -f matroska - | python video.py -
+"""
+
+###############################################################################
+#                            IMPORTATIONS                                    #
+###############################################################################
+
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from fonctions import decoder_balayage
+from session import ScanSession
+
+###############################################################################
+#                              PARAMETRES                                     #
+###############################################################################
+
+# Lignes de balayage dans la region suivie (moins qu'apres une segmentation)
+LIGNES_SUIVI = 6
+
+# Agrandissement de la region suivie pour tolerer le deplacement du code
+AGRANDISSEMENT_SUIVI = 1.2
+
+###############################################################################
+#                               SOURCES                                       #
+###############################################################################
+
+def ouvrir_source(source):
+    """
+    Ouvre une source video avec cv2.VideoCapture.
+
+    Parametres:
+        source (str ou int): Chemin d'un fichier video, indice de camera, ou
+            '-' pour lire un flux conteneurise sur l'entree standard.
+
+    Retourne:
+        cv2.VideoCapture: Capture ouverte.
+    """
+    if source == '-':
+        capture = cv2.VideoCapture('pipe:0', cv2.CAP_FFMPEG)
+    elif isinstance(source, str) and source.isdigit():
+        capture = cv2.VideoCapture(int(source))
+    else:
+        capture = cv2.VideoCapture(source)
+
+    if not capture.isOpened():
+        raise ValueError(f"Impossible d'ouvrir la source video : {source}")
+    return capture
+
+
+def images_niveaux_de_gris(capture):
+    """Generateur des images du flux, en niveaux de gris dans [0, 1]."""
+    while True:
+        ok, image = capture.read()
+        if not ok:
+            return
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        yield image.astype(np.float32) / 255
+
+
+###############################################################################
+#                                 SUIVI                                       #
+###############################################################################
+
+def _agrandir(coins, facteur):
+    """Agrandit un rectangle C1..C4 autour de son centre."""
+    coins = np.asarray(coins, dtype=float)
+    centre = coins.mean(axis=0)
+    return tuple(map(tuple, centre + facteur * (coins - centre)))
+
+
+def _recaler(image, coins):
+    """
+    Rectangle oriente du code, segmente dans la region suivie seulement.
+
+    Retourne:
+        tuple: Coins C1..C4 dans le repere de l'image, ou None si aucune
+        region n'est trouvee.
+    """
+    coins = np.asarray(coins, dtype=float)
+    x0, y0 = np.maximum(np.floor(coins.min(axis=0)).astype(int), 0)
+    x1, y1 = np.ceil(coins.max(axis=0)).astype(int)
+    x1, y1 = min(x1, image.shape[1]), min(y1, image.shape[0])
+    try:
+        recales = ScanSession(image[y0:y1, x0:x1]).coins_orientes
+    except ValueError:
+        return None
+    return tuple(map(tuple, np.asarray(recales, dtype=float) + (x0, y0)))
+
+
+class Dedoublonneur:
+    """
+    Fusionne les lectures repetees d'un meme code sur des images proches.
+
+    Parametres:
+        fenetre (int): Un code relu moins de `fenetre` images apres sa derniere
+            lecture n'est pas signale a nouveau.
+    """
+
+    def __init__(self, fenetre=30):
+        self.fenetre = fenetre
+        self.derniere_lecture = {}
+
+    def nouveau(self, code, indice):
+        """Enregistre une lecture et indique si elle doit etre signalee."""
+        # Les lectures sorties de la fenetre sont oubliees (memoire bornee)
+        self.derniere_lecture = {autre: precedente for autre, precedente in self.derniere_lecture.items()
+                                 if indice - precedente <= self.fenetre}
+        precedente = self.derniere_lecture.get(code)
+        self.derniere_lecture[code] = indice
+        return precedente is None
+
+
+def decoder_flux(images, pyramide=1, n_lignes=16, fenetre=30):
+    """
+    Lit les codes-barres d'une suite d'images en suivant la region d'une image a l'autre.
+
+    Parametres:
+        images (iterable): Images en niveaux de gris (voir images_niveaux_de_gris).
+        pyramide (int): Niveaux de reduction pour la segmentation complete.
+        n_lignes (int): Lignes de balayage apres une segmentation complete.
+        fenetre (int): Fenetre de dedoublonnage, en images.
+
+    Retourne:
+        generator: Un enregistrement {image, code, suivi, temps} par code
+        nouvellement lu ; `suivi` indique une lecture sur la region a priori.
+    """
+    dedoublonneur = Dedoublonneur(fenetre)
+    a_priori = None  # Rectangle oriente de la derniere lecture reussie
+
+    for indice, image in enumerate(images):
+        debut = time.perf_counter()
+        code = None
+        suivi = a_priori is not None
+
+        # 1. Lecture dans la region de l'image precedente, recalee sur le code lu
+        if suivi:
+            code, _ = decoder_balayage(image, *a_priori, LIGNES_SUIVI)
+            if code is not None:
+                coins = _recaler(image, a_priori)
+                if coins is not None:
+                    a_priori = _agrandir(coins, AGRANDISSEMENT_SUIVI)
+
+        # 2. Suivi perdu : segmentation complete
+        if code is None:
+            suivi = False
+            a_priori = None
+            session = ScanSession(image, pyramide=pyramide)
+            try:
+                coins = session.coins_orientes
+            except ValueError:
+                continue
+            code, _ = decoder_balayage(image, *coins, n_lignes)
+            if code is not None:
+                a_priori = _agrandir(coins, AGRANDISSEMENT_SUIVI)
+
+        if code is not None and dedoublonneur.nouveau(code, indice):
+            yield {'image': indice, 'code': code, 'suivi': suivi,
+                   'temps': time.perf_counter() - debut}
+
+
+###############################################################################
+#                                   MAIN                                      #
+###############################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lecture EAN-13 sur un flux video.")
+    parser.add_argument('source', help="Fichier video, indice de camera, ou '-' (entree standard).")
+    parser.add_argument('--pyramide', type=int, default=1,
+                        help="Niveaux de reduction pour la segmentation complete.")
+    parser.add_argument('--lignes', type=int, default=16,
+                        help="Lignes de balayage apres une segmentation complete.")
+    parser.add_argument('--fenetre', type=int, default=30,
+                        help="Fenetre de dedoublonnage des codes, en images.")
+    args = parser.parse_args(argv)
+
+    capture = ouvrir_source(args.source)
+    compteur = {'images': 0}
+
+    def compter(images):
+        for image in images:
+            compteur['images'] += 1
+            yield image
+
+    debut = time.perf_counter()
+    try:
+        for lecture in decoder_flux(compter(images_niveaux_de_gris(capture)),
+                                    args.pyramide, args.lignes, args.fenetre):
+            print(json.dumps(lecture), flush=True)
+    finally:
+        capture.release()
+
+    duree = time.perf_counter() - debut
+    print(f"{compteur['images']} images en {duree:.1f} s "
+          f"({compteur['images'] / max(duree, 1e-9):.1f} images/s)", file=sys.stderr)
+
+
+###############################################################################
+#                            EXECUTION DU PROGRAMME                           #
+###############################################################################
+
+if __name__ == "__main__":
+    main()